@@ -0,0 +1,836 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+import numpy as np
+from GitHubAnalyzer import Loader
+from GitHubAnalyzer import Cache
+from GitHubAnalyzer.Instrument import Stage, instrumented
+from GitHubAnalyzer.Locations import LocationResolver
+from GitHubAnalyzer.Sketch import HeavyHitters
+
+# Processed columns the aggregates are built from.
+AGGREGATE_COLS = [
+    'repository_url', 'repository_language', 'repository_watchers',
+    'actor_attributes_login', 'country', 'created_at', 'type'
+]
+
+# Weekday of the first day of the epoch, 1970-01-01, a Thursday.
+EPOCH_WEEKDAY = 3
+
+# Number of (repository, contributor) pairs of updates held before they are
+# deduplicated together with the distinct pairs seen so far.
+PENDING_PAIRS = 1000000
+
+class TimeCube:
+    """
+        Dense event counts by (hour of day, weekday, event type, country) built
+        in a single pass over the events. The time of day, weekday and country
+        activity analyses are answered from the counts for any number of day
+        chunks without scanning the events again. Events without a repository
+        or an actor country are counted under the empty country.
+    """
+
+    counts: np.ndarray              # Counts of shape (24, 7, types, countries).
+    types: pd.Index                 # Event types in order of first appearance.
+    countries: pd.Index             # Country names, including the empty country.
+    first_seen: pd.Series           # Earliest event time of each event type.
+
+    def __init__(self, counts, types, countries, first_seen):
+        """
+            Create a time cube from its counts and axis labels.
+        """
+        self.counts = counts
+        self.types = types
+        self.countries = countries
+        self.first_seen = first_seen
+
+    @classmethod
+    def fromFrame(cls, data):
+        """
+            Create a time cube of processed data.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+
+            Returns
+            -------
+            TimeCube
+                The counts of the data.
+        """
+        first_seen = data.groupby('type', observed=True)['created_at'].min().sort_values(kind='stable')
+        types = pd.Index(first_seen.index.to_numpy(), name='type')
+        type_codes = types.get_indexer(data['type'])
+        country = data['country'].astype(object).where(data['repository_url'].notna(), '')
+        country_codes, countries = pd.factorize(country)
+        countries = pd.Index(np.asarray(countries, dtype=object), name='country')
+        created_at = data['created_at']
+        keep = (type_codes >= 0) & created_at.notna().to_numpy() & (country_codes >= 0)
+        hours = created_at.dt.hour.to_numpy()[keep].astype(np.int64)
+        weekdays = created_at.dt.weekday.to_numpy()[keep].astype(np.int64)
+        codes = ((hours * 7 + weekdays) * len(types) + type_codes[keep]) * len(countries) + country_codes[keep]
+        shape = (24, 7, len(types), len(countries))
+        counts = np.bincount(codes, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(counts, types, countries, first_seen)
+
+    def merge(self, other):
+        """
+            Returns a time cube with the counts of this and another time cube.
+
+            Parameters
+            ----------
+            other: TimeCube
+                The time cube to add.
+
+            Returns
+            -------
+            TimeCube
+                The combined counts.
+        """
+        first_seen = pd.concat([self.first_seen, other.first_seen]).groupby(level=0).min().sort_values(kind='stable')
+        types = pd.Index(first_seen.index.to_numpy(), name='type')
+        countries = self.countries.append(other.countries.difference(self.countries, sort=False))
+        counts = np.zeros((24, 7, len(types), len(countries)), dtype=np.int64)
+        for cube in (self, other):
+            t = types.get_indexer(cube.types)
+            c = countries.get_indexer(cube.countries)
+            counts[:, :, t[:, None], c[None, :]] += cube.counts
+        return TimeCube(counts, types, countries, first_seen)
+
+    def chunked(self, chunks):
+        """
+            Returns the counts with the hours of the day grouped into chunks.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+
+            Returns
+            -------
+            np.ndarray
+                Counts of shape (chunks, 7, types, countries).
+        """
+        if 24 % chunks != 0:
+            raise ValueError('Bad chunk value. Chunk value must be factor of 24.')
+        shape = (chunks, 24 // chunks) + self.counts.shape[1:]
+        return self.counts.reshape(shape).sum(axis=1)
+
+    def timeOfDayActivity(self, chunks=4, main_country='United States'):
+        """
+            Gets activity count based on time of day.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            main_country: str
+                The name of the country to compare to all other countries.
+
+            Returns
+            -------
+            tuple: (list(dict), list(tuple))
+                The count of each activity type at each time of day and the
+                main country and other countries activity at each time of day.
+        """
+        type_counts = self.chunked(chunks).sum(axis=(1, 3))
+        events = [{t: int(n) for t, n in zip(self.types, row)} for row in type_counts]
+        return events, self.countryActivity(chunks, main_country)
+
+    def countryActivity(self, chunks=4, main_country='United States'):
+        """
+            Returns the activity count of the main country and other countries
+            at each time of day. Ignores activities without a country.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            main_country: str
+                The name of the country to compare to all other countries.
+
+            Returns
+            -------
+            list: tuple
+                The main country and other countries activity at each time of day.
+        """
+        country_counts = self.chunked(chunks).sum(axis=(1, 2))
+        is_main = np.asarray(self.countries == main_country)
+        is_other = np.asarray(self.countries != '') & ~is_main
+        main_counts = country_counts[:, is_main].sum(axis=1)
+        other_counts = country_counts[:, is_other].sum(axis=1)
+        return list(zip(main_counts, other_counts))
+
+    def dayOfWeek(self, chunks=4):
+        """
+            Gets time of day activity broken into days of the week.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+
+            Returns
+            -------
+            np.ndarray
+                Activity of shape (7, chunks) where each row is one weekday.
+        """
+        return np.transpose(self.chunked(chunks).sum(axis=(2, 3)))
+
+class Aggregates:
+    """
+        Mergeable event counts that answer the count based analyses without
+        keeping the events in memory. Aggregates of separate pieces of the data
+        can be merged and give the same answers as the whole data.
+    """
+
+    languages: pd.Series            # Event count of each repository language.
+    repos: pd.Series                # Event count of each repository, or a HeavyHitters tracker.
+    countries: pd.Series            # Event count of each actor country.
+    cube: TimeCube                  # Event count of each (hour, weekday, type, country).
+    watchers: pd.Series             # Peak watcher count of each repository.
+    contributors: pd.Series         # Distinct non watch event actor count of each repository.
+
+    def __init__(self, sketch_options=None):
+        """
+            Create an empty set of aggregates.
+
+            Parameters
+            ----------
+            sketch_options: dict
+                Optional HeavyHitters parameters. When given the repository
+                counts are approximated in fixed memory instead of kept exactly.
+        """
+        self.rows = 0
+        self.languages = None
+        self.repos = HeavyHitters(**sketch_options) if sketch_options else None
+        self.countries = None
+        self.cube = None
+        self._watchers = None
+        self._pairs = None
+        self._pending = list()
+        self._pending_rows = 0
+        self._deferred = list()
+        self._contributors = None
+
+    @property
+    def watchers(self):
+        self._resolve()
+        return self._watchers
+
+    @property
+    def contributors(self):
+        self._resolve()
+        if self._contributors is None:
+            pairs = self._distinctPairs()
+            if pairs is None:
+                self._contributors = pd.Series(dtype=np.int64)
+            else:
+                repos = pairs['repository_url'].cat
+                counts = np.bincount(repos.codes.to_numpy(), minlength=len(repos.categories)).astype(np.int64)
+                self._contributors = pd.Series(counts, index=pd.Index(repos.categories.to_numpy(dtype=object)))
+        return self._contributors
+
+    @classmethod
+    def fromFrame(cls, data, defer=False):
+        """
+            Create aggregates of processed data.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+            defer: bool
+                Compute the watchers and contributors the first time they are
+                used, for data that stays in memory. See update.
+
+            Returns
+            -------
+            Aggregates
+                The aggregates of the data.
+        """
+        agg = cls()
+        agg.update(data, defer)
+        return agg
+
+    @classmethod
+    def fromColumns(cls, cache_dir, key, workers=None, by='rows'):
+        """
+            Create aggregates of processed data saved as column files, see
+            Cache.save, on a pool of processes. The rows are split into one
+            shard per worker, and each worker memory maps only the columns and
+            rows of its shard and returns the shard's aggregates, which are
+            merged in shard order. No events are pickled between processes.
+
+            Parameters
+            ----------
+            cache_dir: str
+                Directory holding the cache entries.
+            key: str
+                The cache key of the data.
+            workers: int
+                Number of shards and processes. Defaults to the CPU count.
+            by: str
+                'rows' to shard contiguous row ranges, or 'repo' to shard by
+                repository so each repository's events are in one shard.
+
+            Returns
+            -------
+            Aggregates
+                The aggregates of all the rows.
+        """
+        if by not in ('rows', 'repo'):
+            raise ValueError("by must be 'rows' or 'repo'.")
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shards = executor.map(_columnShard, repeat(cache_dir), repeat(key), range(workers), repeat(workers), repeat(by))
+            agg = cls()
+            for shard in shards:
+                agg.merge(shard)
+        return agg
+
+    @classmethod
+    def fromFiles(cls, paths, chunksize=500000, countries=None, memo_path=None, sketch_options=None, workers=None):
+        """
+            Create aggregates by streaming input files in fixed size chunks.
+            Only one chunk of events is held in memory at a time. With several
+            workers the files are split into shards of consecutive files,
+            streamed on a pool of processes and their aggregates merged.
+
+            Parameters
+            ----------
+            paths: list(str)
+                The CSV or JSON input files.
+            chunksize: int
+                Number of events read and processed at a time.
+            countries: pd.DataFrame
+                The location and country table. Read from the default path if None.
+            memo_path: str
+                Optional file memoizing resolved locations between runs.
+            sketch_options: dict
+                Optional HeavyHitters parameters to approximate the repository counts.
+            workers: int
+                Number of processes to stream the files on. Defaults to
+                streaming them in this process.
+
+            Returns
+            -------
+            Aggregates
+                The aggregates of all the files.
+        """
+        if countries is None:
+            countries = Loader.readCountries()
+        resolver = LocationResolver(countries, memo_path)
+        agg = cls(sketch_options)
+        workers = max(1, min(workers or 1, len(paths)))
+        with Stage('stream_aggregates', 'Streaming Data', 'Data Successfully Streamed!') as stage:
+            if workers == 1:
+                _streamFiles(agg, paths, chunksize, resolver)
+            else:
+                shards = [paths[len(paths) * i // workers:len(paths) * (i + 1) // workers] for i in range(workers)]
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = executor.map(_fileShard, shards, repeat(chunksize), repeat(countries), repeat(memo_path), repeat(sketch_options))
+                    for shard, memo in results:
+                        agg.merge(shard)
+                        resolver.memo.update(memo)
+            resolver.saveMemo()
+            stage.record['rows'] = agg.rows
+        return agg
+
+    def update(self, data, defer=False):
+        """
+            Adds the counts of a piece of processed data to the aggregates.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+            defer: bool
+                Keep a reference to the data and add its watchers and
+                contributors the first time they are used, so analyses that
+                only need the counts never scan it for them. Otherwise they
+                are added now, as the distinct (repository, contributor)
+                pairs of the data.
+        """
+        self.rows += len(data)
+        self.languages = _add(self.languages, data.groupby('repository_language', observed=True)['repository_url'].count())
+        if isinstance(self.repos, HeavyHitters):
+            self.repos.update(data['repository_url'].to_numpy())
+        else:
+            self.repos = _add(self.repos, data['repository_url'].value_counts())
+        countries = data.groupby('country', observed=True)['repository_url'].count()
+        self.countries = _add(self.countries, countries.drop('', errors='ignore'))
+        cube = TimeCube.fromFrame(data)
+        self.cube = cube if self.cube is None else self.cube.merge(cube)
+        if defer:
+            self._deferred.append(data)
+        else:
+            self._updateRepos(data)
+
+    def defer(self, data):
+        """
+            Replaces the watchers and contributors with those of processed
+            data, computed the first time they are used. Analyses that only
+            need the counts never scan the data for them.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+        """
+        self._watchers = None
+        self._pairs = None
+        self._pending = list()
+        self._pending_rows = 0
+        self._contributors = None
+        self._deferred = [data]
+
+    def _resolve(self):
+        """
+            Computes the watchers and contributors of deferred data.
+        """
+        deferred, self._deferred = self._deferred, list()
+        for data in deferred:
+            self._updateRepos(data)
+
+    def _updateRepos(self, data):
+        """
+            Adds the peak watchers and distinct (repository, contributor)
+            pairs of processed data.
+        """
+        watchers = pd.to_numeric(data['repository_watchers'], errors='coerce')
+        self._watchers = _max(self._watchers, watchers.groupby(data['repository_url'], observed=True).max())
+        contribution_events = data.loc[data['type'] != 'WatchEvent', ['repository_url', 'actor_attributes_login']]
+        self._addPairs([contribution_events.dropna().drop_duplicates()])
+
+    def _addPairs(self, frames):
+        """
+            Adds frames of (repository, contributor) pairs. They are held
+            until there are more of them than PENDING_PAIRS and the distinct
+            pairs so far, so deduplicating them costs amortized constant time
+            per pair.
+        """
+        frames = [f for f in frames if f is not None and len(f)]
+        self._pending.extend(frames)
+        self._pending_rows += sum(len(f) for f in frames)
+        self._contributors = None
+        if self._pending_rows > max(PENDING_PAIRS, 0 if self._pairs is None else len(self._pairs)):
+            self._distinctPairs()
+
+    def _distinctPairs(self):
+        """
+            Returns the distinct (repository, contributor) pairs as
+            categorical columns, deduplicating the pending pairs into them.
+        """
+        if self._pending:
+            frames = ([] if self._pairs is None else [self._pairs]) + self._pending
+            pairs = pd.concat(frames, ignore_index=True).astype(object).drop_duplicates(ignore_index=True)
+            self._pairs = pairs.astype('category')
+            self._pending = list()
+            self._pending_rows = 0
+        return self._pairs
+
+    def merge(self, other):
+        """
+            Adds the counts of another set of aggregates to these aggregates.
+
+            Parameters
+            ----------
+            other: Aggregates
+                The aggregates to merge in.
+
+            Returns
+            -------
+            Aggregates
+                These aggregates.
+        """
+        self.rows += other.rows
+        for name in ['languages', 'countries']:
+            setattr(self, name, _add(getattr(self, name), getattr(other, name)))
+        if isinstance(self.repos, HeavyHitters):
+            self.repos.merge(other.repos)
+        else:
+            self.repos = _add(self.repos, other.repos)
+        if self.cube is None:
+            self.cube = other.cube
+        elif other.cube is not None:
+            self.cube = self.cube.merge(other.cube)
+        self._watchers = _max(self._watchers, other._watchers)
+        self._addPairs([other._pairs] + other._pending)
+        self._deferred.extend(other._deferred)
+        return self
+
+    @instrumented()
+    def topLanguages(self, num):
+        """
+            Returns the top repository languages in descending order.
+
+            Parameters
+            ----------
+            num: int
+                The number of top languages to return.
+
+            Returns
+            -------
+            tuple: (list, list)
+                The top languages and their event counts.
+        """
+        return _top(self.languages, num)
+
+    @instrumented()
+    def topActorCountries(self, num):
+        """
+            Returns the top countries for repository contribution in descending order.
+
+            Parameters
+            ----------
+            num: int
+                The number of top countries to return.
+
+            Returns
+            -------
+            tuple: (list, list)
+                The top countries and their event counts.
+        """
+        return _top(self.countries, num)
+
+    @instrumented()
+    def getPopularRepo(self, num):
+        """
+            Gets the top most popular repositories.
+
+            Parameters
+            ----------
+            num: int
+                The number of top respositories to return.
+
+            Returns
+            -------
+            tuple: (list, list)
+                The most popular repositories and their event counts.
+        """
+        if isinstance(self.repos, HeavyHitters):
+            return self.repos.top(num)
+        return _top(self.repos, num)
+
+    @instrumented()
+    def timeOfDayActivity(self, chunks=4, main_country='United States'):
+        """
+            Gets activity count based on time of day.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            main_country: str
+                The name of the country to compare to all other countries.
+
+            Returns
+            -------
+            tuple: (list(dict), list(tuple))
+                The count of each activity type at each time of day and the
+                main country and other countries activity at each time of day.
+        """
+        return self.cube.timeOfDayActivity(chunks, main_country)
+
+    @instrumented()
+    def countryActivity(self, chunks=4, main_country='United States'):
+        """
+            Returns the activity count of the main country and other countries
+            at each time of day. Ignores activities without a country.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            main_country: str
+                The name of the country to compare to all other countries.
+
+            Returns
+            -------
+            list: tuple
+                The main country and other countries activity at each time of day.
+        """
+        return self.cube.countryActivity(chunks, main_country)
+
+    @instrumented()
+    def dayOfWeek(self, chunks=4):
+        """
+            Gets time of day activity broken into days of the week.
+
+            Parameters
+            ----------
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+
+            Returns
+            -------
+            np.ndarray
+                Activity of shape (7, chunks) where each row is one weekday.
+        """
+        return self.cube.dayOfWeek(chunks)
+
+    @instrumented()
+    def getWatchersContributors(self, repo_url):
+        """
+            Returns the peak number of watchers of a repository and its unique
+            contributors count.
+
+            Parameters
+            ----------
+            repo_url: str
+                The url of the target repository.
+
+            Returns
+            -------
+            tuple: (int, int)
+                The peak number of watchers and unique contributors.
+        """
+        return self.getWatchersContributorsBatch([repo_url])[0]
+
+    @instrumented()
+    def getWatchersContributorsBatch(self, repo_urls):
+        """
+            Returns the peak number of watchers and unique contributors count of
+            several repositories.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The urls of the target repositories.
+
+            Returns
+            -------
+            list: (int, int)
+                The peak number of watchers and unique contributors of each repository.
+        """
+        watchers = self.watchers.reindex(repo_urls).astype('Int64')
+        contributors = self.contributors.reindex(repo_urls, fill_value=0).astype(np.int64)
+        return list(zip(watchers.values, contributors.tolist()))
+
+class HourlyCounts:
+    """
+        Event counts of every hour of processed data sorted by time, see
+        Loader.sortByTime. The count based analyses of a time range add up
+        the counts of the whole hours in the range and only scan the events
+        of the partial hours at its ends. Each count is kept sparse, as the
+        (code, count) runs of each hour in hour order.
+    """
+
+    first_hour: int                 # Hours since the epoch of the first event.
+    row_offsets: np.ndarray         # First row of each hour, and the row after the last hour.
+    runs: dict                      # (offsets, codes, values) of each count by name, see _runs.
+    languages: pd.Index             # Repository language of each language code.
+    countries: pd.Index             # Actor country of each country code.
+    repos: pd.Index                 # Repository url of each repository code.
+    types: pd.Index                 # Event type of each type code.
+    cube_countries: pd.Index        # Country of each time cube country code, including the empty country.
+    dtype: np.dtype                 # Data type of the event times.
+
+    def __init__(self, data):
+        """
+            Create the hourly counts of processed data sorted by time. Events
+            without a time are not counted.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data sorted by created_at.
+        """
+        created_at = data['created_at']
+        self.dtype = created_at.dtype
+        data = data.iloc[:int(created_at.notna().sum())]
+        times = data['created_at'].to_numpy()
+        hours = times.astype('datetime64[h]').view(np.int64)
+        self.first_hour = int(hours[0]) if len(hours) else 0
+        hours = hours - self.first_hour
+        n_hours = int(hours[-1]) + 1 if len(hours) else 0
+        self.row_offsets = np.searchsorted(hours, np.arange(n_hours + 1))
+        has_repo = data['repository_url'].notna().to_numpy()
+        language_codes, self.languages = _codes(data['repository_language'])
+        country_codes, self.countries = _codes(data['country'])
+        repo_codes, self.repos = _codes(data['repository_url'])
+        type_codes, self.types = _codes(data['type'])
+        located = country_codes >= 0
+        if '' in self.countries:
+            located &= country_codes != self.countries.get_loc('')
+            self.cube_countries = self.countries
+        else:
+            self.cube_countries = self.countries.append(pd.Index(['']))
+        cube_country_codes = np.where(has_repo, country_codes, self.cube_countries.get_loc(''))
+        cube_codes = type_codes * len(self.cube_countries) + cube_country_codes
+        typed = type_codes >= 0
+        self.runs = {
+            'languages': _runs(hours, language_codes, has_repo & (language_codes >= 0), n_hours),
+            'countries': _runs(hours, country_codes, has_repo & located, n_hours),
+            'repos': _runs(hours, repo_codes, repo_codes >= 0, n_hours),
+            'cube': _runs(hours, cube_codes, typed & (cube_country_codes >= 0), n_hours),
+            'first_seen': _runs(hours, type_codes, typed, n_hours, times.view(np.int64)),
+        }
+
+    def window(self, data, start_row, end_row):
+        """
+            Returns the aggregates of a range of the rows the counts were
+            built from. The watchers and contributors are computed from the
+            range's events the first time they are used.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                The processed data the counts were built from.
+            start_row: int
+                The first row of the range.
+            end_row: int
+                The row after the last row of the range.
+
+            Returns
+            -------
+            Aggregates
+                The aggregates of the rows.
+        """
+        h0 = int(np.searchsorted(self.row_offsets, start_row, 'left'))
+        h1 = int(np.searchsorted(self.row_offsets, end_row, 'right')) - 1
+        if h0 >= h1:
+            return Aggregates.fromFrame(data.iloc[start_row:end_row], defer=True)
+        agg = self.hours(h0, h1)
+        for i, j in [(start_row, self.row_offsets[h0]), (self.row_offsets[h1], end_row)]:
+            if j > i:
+                agg.merge(Aggregates.fromFrame(data.iloc[i:j], defer=True))
+        agg.defer(data.iloc[start_row:end_row])
+        return agg
+
+    def hours(self, h0, h1):
+        """
+            Returns the count aggregates of a range of whole hours, without
+            watchers or contributors.
+
+            Parameters
+            ----------
+            h0: int
+                The first hour, counted from the first event's hour.
+            h1: int
+                The hour after the last hour.
+
+            Returns
+            -------
+            Aggregates
+                The counts of the hours.
+        """
+        agg = Aggregates()
+        agg.rows = int(self.row_offsets[h1] - self.row_offsets[h0])
+        agg.languages = self._counts('languages', self.languages, h0, h1)
+        agg.countries = self._counts('countries', self.countries, h0, h1)
+        agg.repos = self._counts('repos', self.repos, h0, h1)
+        hours, codes, values = self._slice('cube', h0, h1)
+        hours = hours + self.first_hour
+        cells = ((hours % 24) * 7 + (hours // 24 + EPOCH_WEEKDAY) % 7) * len(self.types) * len(self.cube_countries) + codes
+        shape = (24, 7, len(self.types), len(self.cube_countries))
+        counts = np.bincount(cells, values, int(np.prod(shape))).astype(np.int64).reshape(shape)
+        _, type_codes, times = self._slice('first_seen', h0, h1)
+        first_seen = pd.Series(times, dtype=np.int64).groupby(type_codes).min()
+        first_seen = pd.Series(
+            first_seen.to_numpy().view(self.dtype), index=pd.Index(self.types[first_seen.index].to_numpy(), name='type')
+        ).sort_values(kind='stable')
+        type_codes = self.types.get_indexer(first_seen.index)
+        country_codes = np.flatnonzero(counts.sum(axis=(0, 1, 2)))
+        countries = pd.Index(self.cube_countries[country_codes].to_numpy(), name='country')
+        agg.cube = TimeCube(counts[:, :, type_codes][..., country_codes], first_seen.index, countries, first_seen)
+        return agg
+
+    def _slice(self, name, h0, h1):
+        """
+            Returns the hour, code and value of each run of a count in a range of hours.
+        """
+        offsets, codes, values = self.runs[name]
+        i, j = offsets[h0], offsets[h1]
+        hours = np.repeat(np.arange(h0, h1), np.diff(offsets[h0:h1 + 1]))
+        return hours, codes[i:j], values[i:j]
+
+    def _counts(self, name, labels, h0, h1):
+        """
+            Returns the nonzero totals of a count in a range of hours by label.
+        """
+        _, codes, values = self._slice(name, h0, h1)
+        totals = np.bincount(codes, values, len(labels)).astype(np.int64)
+        present = np.flatnonzero(totals)
+        return pd.Series(totals[present], index=labels[present])
+
+def _runs(hours, codes, keep, n_hours, times=None):
+    """
+        Returns the offsets of each hour's runs and the code and value of each
+        run of the kept events, sorted by hour and code. Values are event
+        counts, or the first event time of each run when times are given.
+    """
+    n_codes = int(codes[keep].max()) + 1 if keep.any() else 1
+    keys = hours[keep] * n_codes + codes[keep]
+    keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    offsets = np.searchsorted(keys // n_codes, np.arange(n_hours + 1))
+    values = counts if times is None else times[keep][first]
+    return offsets, keys % n_codes, values
+
+def _codes(column):
+    """
+        Returns the integer code of each value of a column and the values of
+        the codes. Missing values get the code -1.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.int64), pd.Index(column.cat.categories.to_numpy(dtype=object))
+    codes, values = pd.factorize(column)
+    return codes.astype(np.int64), pd.Index(np.asarray(values, dtype=object))
+
+def _streamFiles(agg, paths, chunksize, resolver):
+    """
+        Adds the events of input files to aggregates one chunk at a time.
+    """
+    for chunk in Loader.readChunks(paths, chunksize):
+        agg.update(Loader.process(chunk, resolver))
+    return agg
+
+def _fileShard(paths, chunksize, countries, memo_path, sketch_options):
+    """
+        Returns the aggregates of a shard of input files and the locations
+        resolved while reading them.
+    """
+    resolver = LocationResolver(countries, memo_path)
+    return _streamFiles(Aggregates(sketch_options), paths, chunksize, resolver), resolver.memo
+
+def _columnShard(cache_dir, key, shard, shards, by):
+    """
+        Returns the aggregates of one shard of the rows of cached column files.
+    """
+    if by == 'repo':
+        codes = Cache.loadCodes(cache_dir, key, 'repository_url', mmap_mode='r')
+        rows = np.flatnonzero(codes % shards == shard)
+    else:
+        count = Cache.rowCount(cache_dir, key)
+        rows = slice(count * shard // shards, count * (shard + 1) // shards)
+    return Aggregates.fromFrame(Cache.load(cache_dir, key, AGGREGATE_COLS, rows, mmap_mode='r'))
+
+def _add(total, counts):
+    """
+        Adds two count series together, aligning on their index.
+    """
+    if total is None:
+        return counts.astype(np.int64)
+    if counts is None:
+        return total
+    return total.add(counts, fill_value=0).astype(np.int64)
+
+def _top(counts, num):
+    """
+        Returns the index values and counts of the largest counts.
+    """
+    top = counts.nlargest(num)
+    return (top.index.to_numpy(), top.values)
+
+def _max(total, values):
+    """
+        Takes the larger of two series' values, aligning on their index.
+    """
+    if total is None:
+        return values
+    if values is None:
+        return total
+    return pd.concat([total, values]).groupby(level=0).max()
@@ -1,15 +1,62 @@
+import os
+import sys
+import copy
+import shutil
+import inspect
+import hashlib
+import tempfile
+import threading
+import functools
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
-from halo import Halo
-import glob
+from GitHubAnalyzer import Loader
+from GitHubAnalyzer import Cache
+from GitHubAnalyzer.Instrument import Stage, instrumented
+from GitHubAnalyzer.Aggregates import Aggregates, HourlyCounts
+from GitHubAnalyzer.Index import DescriptionIndex, TimeIndex
+from GitHubAnalyzer.Issues import IssueTable
+from GitHubAnalyzer.Locations import LocationResolver
+from GitHubAnalyzer.Sketch import HeavyHitters
+from GitHubAnalyzer.Results import ResultCache, memoized, MAX_BYTES
+
+# Number of time windows each Analyzer keeps, least recently used dropped first.
+MAX_WINDOWS = 16
+
+def windowed(method):
+    """
+        Decorates an Analyzer method with start and end time arguments so a
+        call given either runs on the window of the events in that range,
+        see Analyzer.window. Results are memoized under the window's version,
+        so ranges covering the same events share entries.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        start, end = bound.arguments['start'], bound.arguments['end']
+        if start is None and end is None:
+            return method(self, *args, **kwargs)
+        bound.arguments.update({'self': self.window(start, end), 'start': None, 'end': None})
+        return method(*bound.args, **bound.kwargs)
+
+    return wrapper
+
 class Analyzer:
 
     filename: str                   # The name of the input file for data.
     data: pd.DataFrame              # Data as pandas dataframes.
+    rows: int                       # Number of events, including appended files.
     countries: pd.DataFrame         # Location and Country data.
+    memory_report: pd.DataFrame     # Bytes used by each column before and after compacting, if measured.
+    sketch_options: dict            # HeavyHitters parameters of the approximate analyses.
+    manifest: dict                  # Size and modification time of each input file folded in.
+    version: str                    # Dataset version keying the memoized results.
+    results: ResultCache            # Memoized analysis results.
 
-    def __init__(self, file, dir_path=None):
+    def __init__(self, file, dir_path=None, workers=None, cache_dir=None, result_cache_bytes=MAX_BYTES, shards=None, shard_by='rows', memory_report=False):
         """
             Create an Analyzer object and sets the dataframes to input file data.
 
@@ -19,53 +66,347 @@ class Analyzer:
                 Path to input data file. Either a JSON or CSV file.
             dir: str
                 Optional directory path to multiple input csv files.
+            workers: int
+                Number of csv files to read in parallel in directory mode.
+                Defaults to the CPU count, 1 reads the files serially.
+            cache_dir: str
+                Optional directory to cache the processed data in. When the input
+                files and countries table are unchanged the cached data is loaded
+                instead of parsing the input again. Analysis results are also
+                kept in its results subdirectory.
+            result_cache_bytes: int
+                Memory cap of the memoized analysis results in bytes.
+            shards: int
+                Number of processes to build the aggregates on, see
+                Aggregates.fromColumns. Defaults to building them in process.
+            shard_by: str
+                'rows' or 'repo', how the events are split between the shards.
+            memory_report: bool
+                Measure the memory used by each column before and after
+                compacting parsed input, see Loader.compact.
         """
-        cols = [
-            'repository_url', 'repository_created_at', 'repository_name',
-            'repository_description', 'repository_owner', 'repository_open_issues',
-            'repository_watchers', 'repository_language', 'actor_attributes_login',
-            'actor_attributes_name', 'actor_attributes_location', 'created_at',
-            'payload_action', 'payload_number','payload_issue', 'actor', 'url', 'type'
-        ]
-        df_types = {
-            'repository_url': str, 'repository_created_at': str, 'repository_description': str,
-            'repository_owner': str, 'repository_open_issues': str, 'repository_watchers': str,
-            'repository_language': str, 'actor_attributes_login': str, 'actor_attributes_name': str,
-            'actor_attributes_location': str, 'created_at': str, 'payload_action': str,
-            'payload_number': str, 'payload_issue': str, 'actor': str, 'url': str, 'type': str
-        }
+        self.filename = file
+        self.shards = shards
+        self.shard_by = shard_by
+        self.sketch_options = {'capacity': 1000, 'epsilon': 0.0001, 'delta': 0.01}
+        self._data = None
+        self._pending = []
+        self._aggregates = None
+        self._issue_table = None
+        self._description_index = None
+        self._time_index = None
+        self._hourly_counts = None
+        self._contribution_matrix = None
+        self._windows = OrderedDict()
+        self._parent = None
+        self._parent_version = None
+        self._bounds = None
+        self._cache_path = None
+        self._memo_path = os.path.join(cache_dir, 'locations.json') if cache_dir else None
+        self._resolver = None
+        self._lock = threading.RLock()
+        self._generation = 0
+        self.version = None
+        self.results = ResultCache(result_cache_bytes, os.path.join(cache_dir, 'results') if cache_dir else None)
+        if dir_path:
+            paths = Loader.dirFiles(dir_path)
+        elif file.endswith('.csv') or file.endswith('.json'):
+            paths = [file]
+        else:
+            print('File must be a JSON or CSV file.')
+            sys.exit(0)
+        self.manifest = {os.path.abspath(p): Loader.fileStamp(p) for p in paths}
+        self.countries = Loader.readCountries()
+        if cache_dir:
+            key = Cache.cacheKey(paths, Loader.COUNTRIES_PATH)
+            self._cache_path = os.path.join(cache_dir, key)
+            with Stage('load_cache', 'Loading Cache', 'Cached Data Successfully Loaded!') as stage:
+                self.data = Cache.load(cache_dir, key)
+                if self.data is None:
+                    stage.info('No Cached Data Found')
+                else:
+                    stage.record['rows'] = self.rows
+            if self.data is not None:
+                self.memory_report = None
+                self._resetVersion()
+                return
         if dir_path:
-            all_files = glob.glob(dir_path + '/*.csv')
-            li = []
-            pbar = tqdm(all_files)
-            for file in pbar:
-                pbar.set_description("Reading %s" % file)
-                df = pd.read_csv(file, usecols=cols, dtype=df_types, header=0)
-                li.append(df)
-            self.data = pd.concat(li, axis=0, ignore_index=True)
+            with Stage('read_files') as stage:
+                self.data = Loader.readFiles(paths, workers)
+                stage.record['rows'] = self.rows
         else:
-            f_spinner = Halo(text='Loading', spinner='dots')
-            self.filename = file
-            if file.endswith('.csv'):
-                f_spinner.start()
-                self.data = pd.read_csv(self.filename, usecols=cols, dtype=df_types)
-                f_spinner.succeed(f'{file} Successfully Read!')
-            elif file.endswith('.json'):
-                f_spinner.start()
-                self.data = pd.read_json(self.filename, lines=True)
-                f_spinner.succeed(f'{file} Successfully Read!')
-            else:
-                print('File must be a JSON or CSV file.')
-                sys.exit(0)
-        spinner = Halo(text='Processing Data', spinner='dots')
-        spinner.start()
-        self.countries = pd.read_csv('data/countries.csv')
-        self.data['created_at'] = pd.to_datetime(self.data['created_at'], format='%Y-%m-%d %H:%M:%S')
-        self.data = self.data.join(self.countries.set_index('actor_attributes_location'), on='actor_attributes_location')
-        self.data['country'].replace('No Results', '', inplace=True)
-        spinner.succeed('Data Successfully Proccessed!')
-
-    def topLanguages(self, num):
+            with Stage('read_file', 'Loading', f'{file} Successfully Read!') as stage:
+                self.data = Loader.readFile(self.filename)
+                stage.record['rows'] = self.rows
+        with Stage('process', 'Processing Data', 'Data Successfully Proccessed!', self.rows):
+            resolver = self.locationResolver()
+            self.data = Loader.process(self.data, resolver)
+            resolver.saveMemo()
+            self.data, self.memory_report = Loader.compact(self.data, memory_report)
+            self.data = Loader.sortByTime(self.data)
+        if cache_dir:
+            with Stage('save_cache', rows=self.rows):
+                Cache.save(self.data, cache_dir, key)
+        self._resetVersion()
+
+    @property
+    def data(self):
+        """
+            The processed events sorted by time, including any appended files.
+        """
+        with self._lock:
+            if self._pending:
+                self._data = Loader.sortByTime(Loader.concatFrames([self._data] + self._pending))
+                self._pending = []
+        return self._data
+
+    @property
+    def rows(self):
+        """
+            The number of events, including appended files.
+        """
+        return sum(len(d) for d in [self._data] + self._pending if d is not None)
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._pending = []
+        self._generation += 1
+        self._updateVersion()
+        self._aggregates = None
+        self._issue_table = None
+        self._description_index = None
+        self._time_index = None
+        self._hourly_counts = None
+        self._contribution_matrix = None
+        self._windows = OrderedDict()
+
+    def append(self, path):
+        """
+            Folds a new timeline file into the data. The stored aggregates are
+            updated from the new events only, so the cost scales with the size
+            of the new file rather than the data already loaded. Files already
+            in the manifest are skipped.
+
+            Parameters
+            ----------
+            path: str
+                Path to the new CSV or JSON timeline file.
+
+            Returns
+            -------
+            int
+                The number of events appended.
+        """
+        if self._parent is not None:
+            raise ValueError('Files cannot be appended to a time window.')
+        key = os.path.abspath(path)
+        stamp = Loader.fileStamp(path)
+        if key in self.manifest:
+            if self.manifest[key] != stamp:
+                raise ValueError(f'{path} changed after it was folded in.')
+            return 0
+        with Stage('append', f'Appending {path}', f'{path} Successfully Appended!') as stage:
+            resolver = self.locationResolver()
+            events = Loader.process(Loader.readFile(path), resolver)
+            resolver.saveMemo()
+            events, _ = Loader.compact(events)
+            if self._aggregates is not None:
+                self._aggregates.update(events, defer=True)
+            stage.record['rows'] = len(events)
+        self._pending.append(events)
+        self._issue_table = None
+        self._description_index = None
+        self._time_index = None
+        self._hourly_counts = None
+        self._contribution_matrix = None
+        self._windows = OrderedDict()
+        self._cache_path = None
+        self.manifest[key] = stamp
+        self._updateVersion()
+        return len(events)
+
+    def locationResolver(self):
+        """
+            Returns the resolver of actor locations to countries. It is built
+            on first use and kept, so appended files reuse its normalized
+            countries table and resolved locations.
+
+            Returns
+            -------
+            LocationResolver
+                The resolver of the countries table.
+        """
+        with self._lock:
+            if self._resolver is None:
+                with Stage('build_location_resolver'):
+                    self._resolver = LocationResolver(self.countries, self._memo_path)
+        return self._resolver
+
+    def _resetVersion(self):
+        """
+            Marks the loaded data as the data of the input files, so results
+            can be shared with other runs over the same files.
+        """
+        self._generation = 0
+        self._updateVersion()
+
+    def _updateVersion(self):
+        """
+            Sets the dataset version from the manifest, the countries table and
+            the number of times the data was replaced since loading, dropping
+            the results of the previous version.
+        """
+        stamps = dict(self.manifest)
+        stamps[Loader.COUNTRIES_PATH] = Loader.fileStamp(Loader.COUNTRIES_PATH)
+        h = hashlib.sha1(f'v{Cache.CACHE_VERSION}|{self._generation}\n'.encode())
+        for path, stamp in sorted(stamps.items()):
+            h.update(f'{path}|{stamp["size"]}|{stamp["mtime"]}\n'.encode())
+        self.version = h.hexdigest()
+        self.results.clear()
+
+    def window(self, start=None, end=None):
+        """
+            Returns an Analyzer of the events in a time range, sharing this
+            Analyzer's result cache. The range is mapped to a slice of the
+            time sorted rows with the time index, so no events are copied.
+            The count based analyses of a window add up the hourly counts of
+            the whole hours in the range, see HourlyCounts, and scan only the
+            events of the partial hours at its ends. Recently used windows
+            are kept, see MAX_WINDOWS.
+
+            Parameters
+            ----------
+            start: str or pd.Timestamp
+                Start of the range. Defaults to the first event.
+            end: str or pd.Timestamp
+                End of the range, exclusive. Defaults to after the last event.
+
+            Returns
+            -------
+            Analyzer
+                The Analyzer of the events in the range. Events without a
+                time are in no range.
+        """
+        root = self._parent or self
+        i, j = root.timeIndex().rows(start, end)
+        if self._parent is not None:
+            i, j = min(max(i, self._bounds[0]), self._bounds[1]), max(min(j, self._bounds[1]), self._bounds[0])
+        return root._window(i, max(i, j))
+
+    def _window(self, i, j):
+        """
+            Returns the window of a range of rows, creating it on first use.
+        """
+        with self._lock:
+            view = self._windows.get((i, j))
+            if view is not None:
+                self._windows.move_to_end((i, j))
+                return view
+            view = copy.copy(self)
+            view._data = self.data.iloc[i:j]
+            view._pending = []
+            view._aggregates = None
+            view._issue_table = None
+            view._description_index = None
+            view._time_index = None
+            view._hourly_counts = None
+            view._contribution_matrix = None
+            view._windows = OrderedDict()
+            view._parent = self
+            view._parent_version = self.version
+            view._bounds = (i, j)
+            view._cache_path = None
+            view._lock = threading.RLock()
+            view.memory_report = None
+            view.version = hashlib.sha1(f'{self.version}|{i}|{j}'.encode()).hexdigest()
+            self._windows[(i, j)] = view
+            while len(self._windows) > MAX_WINDOWS:
+                self._windows.popitem(last=False)
+        return view
+
+    def timeIndex(self):
+        """
+            Returns the index of the event times. It is built on first use,
+            sorting the data by time first if it is not sorted yet.
+
+            Returns
+            -------
+            TimeIndex
+                The time index of the data.
+        """
+        with self._lock:
+            if self._time_index is None:
+                with Stage('build_time_index', rows=self.rows):
+                    data = Loader.sortByTime(self.data)
+                    if data is not self._data:
+                        self.data = data
+                    self._time_index = TimeIndex(data)
+        return self._time_index
+
+    def hourlyCounts(self):
+        """
+            Returns the event counts of every hour behind the count based
+            analyses of windows. They are built on first use.
+
+            Returns
+            -------
+            HourlyCounts
+                The hourly counts of the data.
+        """
+        with self._lock:
+            if self._hourly_counts is None:
+                self.timeIndex()
+                with Stage('build_hourly_counts', rows=self.rows):
+                    self._hourly_counts = HourlyCounts(self.data)
+        return self._hourly_counts
+
+    def aggregates(self):
+        """
+            Returns the event counts behind the count based analyses. They are
+            built on first use and kept up to date by append. The aggregates
+            of a window are added up from its parent's hourly counts while the
+            parent is unchanged since the window was made.
+
+            Returns
+            -------
+            Aggregates
+                The aggregates of the data.
+        """
+        with self._lock:
+            if self._aggregates is None:
+                with Stage('build_aggregates', rows=self.rows):
+                    parent = self._parent
+                    if parent is not None and parent.version == self._parent_version:
+                        self._aggregates = parent.hourlyCounts().window(parent.data, *self._bounds)
+                    elif parent is not None:
+                        self._aggregates = Aggregates.fromFrame(self.data, defer=True)
+                    elif self.shards and self.shards > 1:
+                        self._aggregates = self._shardedAggregates()
+                    else:
+                        self._aggregates = Aggregates.fromFrame(self.data, defer=True)
+        return self._aggregates
+
+    def _shardedAggregates(self):
+        """
+            Builds the aggregates on shard processes from the column files of
+            the cached data. Data that is not cached as loaded is first saved
+            to a temporary directory.
+        """
+        if self._generation == 0 and self._cache_path and os.path.isdir(self._cache_path):
+            cache_dir, key = os.path.split(self._cache_path)
+            return Aggregates.fromColumns(cache_dir, key, self.shards, self.shard_by)
+        tmp_dir = tempfile.mkdtemp(prefix='githubanalyzer-')
+        try:
+            Cache.save(self.data, tmp_dir, 'data')
+            return Aggregates.fromColumns(tmp_dir, 'data', self.shards, self.shard_by)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @instrumented('Analyzing Top Languages', 'Top Languages Analysis Complete!')
+    @windowed
+    @memoized
+    def topLanguages(self, num, approximate=False, start=None, end=None):
         """
             Returns the top repository languages in descending order.
             
@@ -73,6 +414,12 @@ class Analyzer:
             ----------
             num: int
                 The number of top languages to return.
+            approximate: bool
+                Estimate the counts in fixed memory with sketches, see sketch_options.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
@@ -80,16 +427,17 @@ class Analyzer:
                 A list of tuples containing the top languages and their
                 popularity based on how many repositories used that language.
         """
-        spinner = Halo(text='Analyzing Top Languages', spinner='dots')
-        spinner.start()
-        lang_count = self.data.groupby('repository_language').count()
-        lang_rank = lang_count.sort_values('repository_url', ascending=False)
-        lang_rank = lang_rank.nlargest(num, ['repository_url'])
-        top_langs = lang_rank['repository_url']
-        spinner.succeed('Top Languages Analysis Complete!')
-        return (top_langs.index.values, top_langs.values)
+        if approximate:
+            languages = self.data['repository_language'][self.data['repository_url'].notna()]
+            top_langs, _ = self._approximateTop(languages, num)
+            return top_langs
+        top_langs = self.aggregates().topLanguages(num)
+        return top_langs
 
-    def topActorCountries(self, num):
+    @instrumented('Analyzing Top Actor Countries', 'Top Country Analysis Complete!')
+    @windowed
+    @memoized
+    def topActorCountries(self, num, approximate=False, start=None, end=None):
         """
             Returns the top countires for repository contribution in descending order.
 
@@ -97,6 +445,12 @@ class Analyzer:
             ----------
             num: int
                 The number of top locations to return.
+            approximate: bool
+                Estimate the counts in fixed memory with sketches, see sketch_options.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
@@ -104,16 +458,18 @@ class Analyzer:
                 A list of tuples containing the top countries and their contribution
                 counts based on how many actors contributed to the repositories.
         """
-        spinner = Halo(text='Analyzing Top Actor Countries', spinner='dots')
-        spinner.start()
-        country_count = self.data.loc[self.data['country'] != ''].groupby('country').count()
-        country_rank = country_count.sort_values('repository_url', ascending=False)
-        country_rank = country_count.nlargest(num, ['repository_url'])
-        top_actor_countries = country_rank['repository_url']
-        spinner.succeed('Top Country Analysis Complete!')
-        return (top_actor_countries.index.values, top_actor_countries.values)
+        if approximate:
+            country_data = self.data.loc[self.data['country'] != '']
+            countries = country_data['country'][country_data['repository_url'].notna()]
+            top_actor_countries, _ = self._approximateTop(countries, num)
+            return top_actor_countries
+        top_actor_countries = self.aggregates().topActorCountries(num)
+        return top_actor_countries
 
-    def countryTopLanguages(self, country, num):
+    @instrumented('Analyzing Country Top Languages', 'Country Top Language Analysis Complete!')
+    @windowed
+    @memoized
+    def countryTopLanguages(self, country, num, start=None, end=None):
         """
             Returns a given countries top list of programming languages.
 
@@ -123,26 +479,102 @@ class Analyzer:
                 The country name to get top languages on.
             num: int
                 The number of top languages to return.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             list: tuple
                 A list of tuples containing the top languages and their repository count.
         """
-        spinner = Halo(text='Analyzing Country Top Languages', spinner='dots')
-        spinner.start()
-        country_data = self.data.loc[self.data['actor_attributes_location'] == country]
-        count = country_data.groupby('repository_language').count()
-        lang_rank = count.sort_values('repository_url', ascending=False)
-        lang_rank = lang_rank.nlargest(num, ['repository_url'])
-        top_country_languages = lang_rank['repository_url']
+        country_data = self.data.loc[self.data['country'] == country]
+        count = country_data.groupby('repository_language', observed=True)['repository_url'].count()
+        top_country_languages = count.nlargest(num)
         size = len(top_country_languages)
-        languages = np.pad(top_country_languages.index.values, (0,num-size), 'constant', constant_values=(''))
+        languages = np.pad(top_country_languages.index.to_numpy(), (0,num-size), 'constant', constant_values=(''))
         values = np.pad(top_country_languages.values, (0,num-size), 'constant', constant_values=(0))
-        spinner.succeed('Country Top Language Analysis Complete!')
         return (languages, values)
 
-    def getPopularRepo(self, num):
+    @instrumented('Analyzing Country Languages', 'Country Languages Analysis Complete!')
+    @windowed
+    @memoized
+    def countryLanguageMatrix(self, start=None, end=None):
+        """
+            Returns the repository language counts of every country, computed
+            with a single count over the encoded country and language columns.
+
+            Parameters
+            ----------
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            tuple: (list, list, np.ndarray)
+                The countries, the languages and a matrix of shape
+                (countries, languages) with the event count of each pair.
+        """
+        country_codes, countries = pd.factorize(self.data['country'], sort=True)
+        lang_codes, languages = pd.factorize(self.data['repository_language'], sort=True)
+        keep = (country_codes >= 0) & (lang_codes >= 0) & self.data['repository_url'].notna().to_numpy()
+        countries = np.asarray(countries, dtype=object)
+        if len(countries) and countries[0] == '':
+            keep &= country_codes != 0
+        codes = country_codes[keep].astype(np.int64) * len(languages) + lang_codes[keep]
+        matrix = np.bincount(codes, minlength=len(countries) * len(languages)).reshape(len(countries), len(languages))
+        if len(countries) and countries[0] == '':
+            countries, matrix = countries[1:], matrix[1:]
+        return (countries, np.asarray(languages, dtype=object), matrix)
+
+    @instrumented()
+    @windowed
+    @memoized
+    def countryTopLanguagesBatch(self, countries, num, start=None, end=None):
+        """
+            Returns the top languages of several countries at once.
+
+            Parameters
+            ----------
+            countries: list(str)
+                The country names to get top languages on.
+            num: int
+                The number of top languages to return for each country.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            tuple: (np.ndarray, np.ndarray)
+                The top languages and their repository counts, both of shape
+                (countries, num). Countries with fewer languages are padded
+                with empty languages and zero counts.
+        """
+        all_countries, languages, matrix = self.countryLanguageMatrix()
+        rows = pd.Index(all_countries).get_indexer(countries)
+        counts = np.zeros((len(countries), matrix.shape[1]), dtype=np.int64)
+        counts[rows >= 0] = matrix[rows[rows >= 0]]
+        k = min(num, counts.shape[1])
+        top = np.argpartition(-counts, k - 1, axis=1)[:, :k] if k else np.zeros((len(countries), 0), dtype=np.int64)
+        top_counts = np.take_along_axis(counts, top, axis=1)
+        order = np.lexsort((top, -top_counts), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_counts = np.take_along_axis(top_counts, order, axis=1)
+        top_languages = np.where(top_counts > 0, languages[top], '')
+        pad = ((0, 0), (0, num - k))
+        top_languages = np.pad(top_languages.astype(object), pad, 'constant', constant_values='')
+        top_counts = np.pad(top_counts, pad, 'constant', constant_values=0)
+        return (top_languages, top_counts)
+
+    @instrumented('Analyzing Most Popular Repositories', 'Most Popular Repository Analysis Complete!')
+    @windowed
+    @memoized
+    def getPopularRepo(self, num, approximate=False, start=None, end=None):
         """
             Gets the top most popular repositories.
 
@@ -150,20 +582,69 @@ class Analyzer:
             ----------
             num: int
                 The number of top respositories to return.
+            approximate: bool
+                Estimate the counts in fixed memory with sketches, see sketch_options.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             list: str
                 A list of strings containing the most popular repositories.
         """
-        spinner = Halo(text='Analyzing Most Popular Repositories', spinner='dots')
-        spinner.start()
-        repo_event_count = self.data['repository_url'].value_counts()
-        top10 = repo_event_count.nlargest(num)
-        spinner.succeed('Most Popular Repository Analysis Complete!')
-        return (top10.index.values, top10.values)
+        if approximate:
+            top10, _ = self._approximateTop(self.data['repository_url'], num)
+            return top10
+        top10 = self.aggregates().getPopularRepo(num)
+        return top10
 
-    def getWatchersContributors(self, repo_url):
+    @instrumented()
+    @windowed
+    @memoized
+    def sketchAccuracy(self, num=10, start=None, end=None):
+        """
+            Compares the approximate top counts against the exact counts.
+
+            Parameters
+            ----------
+            num: int
+                The number of top items to compare.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                For each analysis, the share of the exact top items found, the
+                largest relative count error of the found items, and the bytes
+                used by the sketch and by the exact counts.
+        """
+        columns = {
+            'topLanguages': self.data['repository_language'][self.data['repository_url'].notna()],
+            'topActorCountries': self.data['country'][(self.data['country'] != '') & self.data['repository_url'].notna()],
+            'getPopularRepo': self.data['repository_url'],
+        }
+        report = dict()
+        for name, values in columns.items():
+            exact = values.value_counts().nlargest(num)
+            (items, counts), tracker = self._approximateTop(values, num)
+            found = pd.Series(counts, index=items).reindex(exact.index).dropna()
+            report[name] = {
+                'recall': len(found) / max(len(exact), 1),
+                'max_relative_error': float(((found - exact[found.index]).abs() / exact[found.index]).max()) if len(found) else 0.0,
+                'sketch_bytes': tracker.nbytes(),
+                'exact_bytes': int(values.value_counts().memory_usage(deep=True)),
+            }
+        return pd.DataFrame(report).T
+
+    @instrumented('Analyzing Watchers and Contributors', 'Watcher and Contributors Analysis Complete!')
+    @windowed
+    @memoized
+    def getWatchersContributors(self, repo_url, start=None, end=None):
         """
             Returns the peak number of watchers of a repository at any point
             and unique contributors count as a tuple of ints.
@@ -172,22 +653,201 @@ class Analyzer:
             ----------
             repo_url: str
                 The url of the target repository.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             tuple: (int, int)
                 The peak number of watchers and unique contributors.
         """
-        spinner = Halo(text='Analyzing Watchers and Contributors', spinner='dots')
-        spinner.start()
-        repo_data = self.data[self.data['repository_url'] == repo_url]
-        contribution_events = repo_data[repo_data['type'] != 'WatchEvent']
-        watchers = repo_data['repository_watchers'].max()
-        contributors = len(contribution_events['actor_attributes_login'].unique())
-        spinner.succeed('Watcher and Contributors Analysis Complete!')
+        watchers, contributors = self.aggregates().getWatchersContributors(repo_url)
         return (watchers, contributors)
 
-    def repoDescriptionSearchYears(self, keyword):
+    @instrumented('Analyzing Watchers and Contributors', 'Watcher and Contributors Analysis Complete!')
+    @windowed
+    @memoized
+    def getWatchersContributorsBatch(self, repo_urls, start=None, end=None):
+        """
+            Returns the peak number of watchers and unique contributors count of
+            several repositories, computed in one grouped pass.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The urls of the target repositories.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            list: (int, int)
+                The peak number of watchers and unique contributors of each repository.
+        """
+        watchers_contributors = self.aggregates().getWatchersContributorsBatch(repo_urls)
+        return watchers_contributors
+
+    @instrumented('Analyzing Repository Actors', 'Repository Actor Analysis Complete!')
+    @windowed
+    @memoized
+    def repoActorCounts(self, repo_urls=None, start=None, end=None):
+        """
+            Returns the number of distinct contributors and watch event actors
+            of every repository, as row sums of the contribution matrix.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                Optional repositories to return. Defaults to every repository.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The contributors and watchers of each repository, indexed by
+                repository url.
+        """
+        return self.contributionMatrix().repoActorCounts(repo_urls)
+
+    @instrumented('Analyzing Actor Repositories', 'Actor Repository Analysis Complete!')
+    @windowed
+    @memoized
+    def actorRepoCounts(self, num=None, start=None, end=None):
+        """
+            Returns the number of repositories each actor contributed to with
+            non watch events, most first.
+
+            Parameters
+            ----------
+            num: int
+                Optional number of actors to return. Defaults to every actor.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.Series
+                The repository count of each actor, indexed by login.
+        """
+        counts = self.contributionMatrix().actorRepoCounts().sort_values(ascending=False, kind='stable')
+        return counts if num is None else counts.iloc[:num]
+
+    @instrumented('Analyzing Contributor Overlap', 'Contributor Overlap Analysis Complete!')
+    @windowed
+    @memoized
+    def contributorOverlap(self, repo_urls, metric='jaccard', start=None, end=None):
+        """
+            Returns the contributor overlap between every pair of several
+            repositories, such as the most popular repositories.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The urls of the target repositories.
+            metric: str
+                'count' for the number of shared contributors, 'jaccard' for
+                shared over combined contributors or 'cosine' for shared over
+                the geometric mean of their contributor counts.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The overlap of each pair, indexed by repository url on both axes.
+        """
+        return self.contributionMatrix().overlap(list(repo_urls), metric)
+
+    @instrumented('Analyzing Similar Repositories', 'Similar Repository Analysis Complete!')
+    @windowed
+    @memoized
+    def similarRepos(self, repo_url, num=10, metric='jaccard', start=None, end=None):
+        """
+            Returns the repositories sharing the most contributors with a repository.
+
+            Parameters
+            ----------
+            repo_url: str
+                The url of the target repository.
+            num: int
+                The number of repositories to return.
+            metric: str
+                The measure to rank by, see contributorOverlap.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The shared contributors and similarity of the most similar
+                repositories in descending order, indexed by repository url.
+        """
+        return self.contributionMatrix().similar(repo_url, num, metric)
+
+    @instrumented('Analyzing Actor Languages', 'Actor Language Analysis Complete!')
+    @windowed
+    @memoized
+    def actorLanguageAffinity(self, logins=None, num=10, start=None, end=None):
+        """
+            Returns the share of each actor's contributed repositories in each
+            language.
+
+            Parameters
+            ----------
+            logins: list(str)
+                The actors. Defaults to the num actors contributing to the
+                most repositories.
+            num: int
+                The number of actors when no logins are given.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The language shares of each actor, indexed by login with a
+                column per language.
+        """
+        if logins is None:
+            logins = self.actorRepoCounts(num).index.to_numpy()
+        return self.contributionMatrix().languageAffinity(list(logins))
+
+    def contributionMatrix(self):
+        """
+            Returns the repository by actor event counts behind the
+            contributor analyses. The matrix is built on first use.
+
+            Returns
+            -------
+            ContributionMatrix
+                The contribution matrix of the data.
+        """
+        from GitHubAnalyzer.Contributions import ContributionMatrix
+        with self._lock:
+            if self._contribution_matrix is None:
+                with Stage('build_contribution_matrix', rows=self.rows):
+                    self._contribution_matrix = ContributionMatrix.fromFrame(self.data)
+        return self._contribution_matrix
+
+    @instrumented('Analyzing for "{keyword}" Repositories', 'Analysis of "{keyword}" Repositories Completed!')
+    @windowed
+    @memoized
+    def repoDescriptionSearchYears(self, keyword, start=None, end=None):
         """
             Returns a list of years and occurrence count corresponding to the years
             a repository with a keyword in their description was created.
@@ -196,22 +856,90 @@ class Analyzer:
             ----------
             keyword: str
                 The keyword to search for in the repository description.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             list: tuples
                 List of tuples containing the years and their occurrence count.
         """
-        spinner = Halo(text=f'Analyzing for "{keyword}"" Repositories', spinner='dots')
-        spinner.start()
-        repos = self.data[self.data['repository_description'].str.contains(keyword, case=False, na=False)]
-        repos = repos.drop_duplicates('repository_url').sort_values(by=['repository_created_at'])
-        years = repos.groupby(repos['repository_created_at'].str[:4])
-        year_counts = [(g, years.groups[g].size) for g in years.groups]
-        spinner.succeed(f'Analysis of "{keyword}" Repositories Completed!')
+        index = self.descriptionIndex()
+        year_counts = index.yearCounts(index.match(keyword, substring=True))
         return year_counts
 
-    def timeOfDayActivity(self, chunks=4, main_country='United States'):
+    @instrumented()
+    @windowed
+    @memoized
+    def repoDescriptionQueryYears(self, all_of=(), any_of=(), none_of=(), substring=False, start=None, end=None):
+        """
+            Returns a list of years and occurrence count corresponding to the years
+            repositories with descriptions matching a keyword query were created.
+
+            Parameters
+            ----------
+            all_of: list(str)
+                Keywords that must all be in the description.
+            any_of: list(str)
+                Keywords of which at least one must be in the description.
+            none_of: list(str)
+                Keywords that must not be in the description.
+            substring: bool
+                Match words containing the keywords rather than whole words.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            list: tuples
+                List of tuples containing the years and their occurrence count.
+        """
+        index = self.descriptionIndex()
+        return index.yearCounts(index.search(all_of, any_of, none_of, substring))
+
+    def descriptionIndex(self):
+        """
+            Returns the inverted index of repository description words. The
+            index is built on first use and saved next to the cached data when
+            a cache directory is used.
+
+            Returns
+            -------
+            DescriptionIndex
+                The description index of the data.
+        """
+        with self._lock:
+            if self._description_index is None:
+                path = os.path.join(self._cache_path, 'description_index.npz') if self._cache_path else None
+                with Stage('build_description_index', rows=self.rows):
+                    if path and os.path.exists(path):
+                        self._description_index = DescriptionIndex.load(path)
+                    else:
+                        self._description_index = DescriptionIndex.fromFrame(self.data)
+                        if path and os.path.isdir(self._cache_path):
+                            self._description_index.save(path)
+        return self._description_index
+
+    def timeCube(self):
+        """
+            Returns the event counts by hour, weekday, event type and country
+            shared by the time of day, country and weekday activity analyses.
+
+            Returns
+            -------
+            TimeCube
+                The event counts of the data.
+        """
+        return self.aggregates().cube
+
+    @instrumented('Analyzing Time of Day Activities', 'Time of Day Analysis Complete!')
+    @windowed
+    @memoized
+    def timeOfDayActivity(self, chunks=4, main_country='United States', start=None, end=None):
         """
             Gets activity count based on time of day. Broken into four 6 hour chunks.
 
@@ -219,36 +947,23 @@ class Analyzer:
             ----------
             chunks: int
                 The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             list: (dict)
                 A list of dict containing total activity at each time of day and respective activity type.
         """
-        spinner = Halo(text='Analyzing Time of Day Activities', spinner='dots')
-        spinner.start()
-        if 24 % chunks != 0:
-            raise ValueError('Bad chunk value. Chunk value must be factor of 24.')
-        dt_data = self.data.sort_values('created_at')
-        dt_data['tod'] = dt_data['created_at'].dt.hour.floordiv(24/chunks)
-
-        # All time of day data.
-        event_group = dt_data.groupby(['tod', 'type']).groups
-        events = [{t: 0 for t in dt_data['type'].unique()} for _ in range(chunks)]
-        for t, e in event_group:
-            events[int(t)][e] = event_group[(t, e)].size
-
-        # Main country vs other countries time of day data.
-        dt_data = dt_data.loc[dt_data['country'] != '']
-        main_tod = dt_data[dt_data['country'] == main_country]
-        other_tod = dt_data[dt_data['country'] != main_country]
-        main_counts = main_tod.groupby('tod')['repository_url'].count().values
-        other_counts = other_tod.groupby('tod')['repository_url'].count().values
-        country_data = list(zip(main_counts, other_counts))
-        spinner.succeed('Time of Day Analysis Complete!')
+        events, country_data = self.timeCube().timeOfDayActivity(chunks, main_country)
         return events, country_data
 
-    def countryActivity(self, chunks=4, main_country='United States'):
+    @instrumented('Analyzing Country Activities', 'Country Activity Analysis Complete!')
+    @windowed
+    @memoized
+    def countryActivity(self, chunks=4, main_country='United States', start=None, end=None):
         """
             Returns a tuples of the contribution count of the main country and
             other countries. Will ignore activities without a proper country.
@@ -259,29 +974,23 @@ class Analyzer:
                 The number of chunks to break up a 24 hour day into. Must be a factor of 24.
             main_country: str
                 The name of the country to compare to all other countries.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
             tuple: (int, int)
                 The first int is the contribution count of the main country followed by all other countries.
         """
-        spinner = Halo(text='Analyzing Country Activities', spinner='dots')
-        spinner.start()
-        if 24 % chunks != 0:
-            raise ValueError('Bad chunk value. Chunk value must be factor of 24.')
-        dt_data = self.data.sort_values('created_at')
-        dt_data['tod'] = dt_data['created_at'].dt.hour.floordiv(24/chunks)
-
-        dt_data = dt_data.loc[dt_data['country'] != '']
-        main_tod = dt_data[dt_data['country'] == main_country]
-        other_tod = dt_data[dt_data['country'] != main_country]
-        main_counts = main_tod.groupby('tod')['repository_url'].count().values
-        other_counts = other_tod.groupby('tod')['repository_url'].count().values
-        country_data = list(zip(main_counts, other_counts))
-        spinner.succeed('Country Activity Analysis Complete!')
+        country_data = self.timeCube().countryActivity(chunks, main_country)
         return country_data
 
-    def dayOfWeek(self, chunks=4):
+    @instrumented('Analyzing Days of the Week Activities', 'Days of Week Activity Analysis Complete!')
+    @windowed
+    @memoized
+    def dayOfWeek(self, chunks=4, start=None, end=None):
         """
             Gets data on time of day activity broken into days of the week.
 
@@ -289,6 +998,10 @@ class Analyzer:
             ----------
             chunks: int
                 The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
@@ -296,22 +1009,49 @@ class Analyzer:
                 A list of list containing chunks of data for each day of the week.
                 Each list within the list represents the data for one weekday.
         """
-        spinner = Halo(text='Analyzing Days of the Week Activities', spinner='dots')
-        spinner.start()
-        if 24 % chunks != 0:
-            raise ValueError('Bad chunk value. Chunk value must be factor of 24.')
-        dt_data = self.data.sort_values('created_at')
-        dt_data['tod'] = dt_data['created_at'].dt.hour.floordiv(24/chunks)
-        dt_data['weekday'] = dt_data['created_at'].dt.weekday
-        tod_by_week = list()
-        for i in range(chunks):
-            tod_data = dt_data.groupby('tod').get_group(i)[['url', 'weekday']]
-            d = tod_data.groupby('weekday').count()['url'].values
-            tod_by_week.append(d)
-        spinner.succeed('Days of Week Activity Analysis Complete!')
-        return np.transpose(tod_by_week)
-
-    def issueResolution(self, repo_url):
+        tod_by_week = self.timeCube().dayOfWeek(chunks)
+        return tod_by_week
+
+    @instrumented('Analyzing Activity Over Time', 'Activity Over Time Analysis Complete!')
+    @windowed
+    @memoized
+    def activityFrames(self, period='D', chunks=4, start=None, end=None):
+        """
+            Gets time of day activity for every period of the data, such as
+            each day or week, to animate over the whole time window.
+
+            Parameters
+            ----------
+            period: str
+                A pandas period frequency, such as 'D' for days or 'W' for weeks.
+            chunks: int
+                The number of chunks to break up a 24 hour day into. Must be a factor of 24.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            tuple: (list, np.ndarray)
+                The label of each period and the activity counts of shape
+                (periods, chunks), including periods without events.
+        """
+        if 24 % chunks:
+            raise ValueError('chunks must be a factor of 24.')
+        times = self.data['created_at'].dropna()
+        ordinals = times.dt.to_period(period).array.asi8
+        start = ordinals.min() if len(ordinals) else 0
+        periods = ordinals.max() - start + 1 if len(ordinals) else 0
+        bins = (ordinals - start) * chunks + times.dt.hour.to_numpy() // (24 // chunks)
+        counts = np.bincount(bins, minlength=periods * chunks).reshape(periods, chunks)
+        labels = [str(p) for p in pd.period_range(pd.Period(ordinal=start, freq=period), periods=periods)] if periods else []
+        return (labels, counts)
+
+    @instrumented('Analyzing Repository Issues', 'Respository Issues Anaysis Complete!')
+    @windowed
+    @memoized
+    def issueResolution(self, repo_url, start=None, end=None):
         """
             Gets the resolution times for a repository's issues.
 
@@ -319,6 +1059,10 @@ class Analyzer:
             ----------
             repo_url: str
                 The respository url to analyze issue resolution time.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
 
             Returns
             -------
@@ -326,19 +1070,151 @@ class Analyzer:
                 A list of all the issue resolution times. With last value being
                 the number of unresolved issues.
         """
-        spinner = Halo(text='Analyzing Repository Issues', spinner='dots')
-        spinner.start()
-        repo_issues = self.data[
-            (self.data['repository_url'] == repo_url) &
-            (self.data['type'] == 'IssuesEvent')
-        ].drop_duplicates().sort_values('created_at')[['payload_issue', 'payload_action', 'created_at']]
-        opened_issues = repo_issues[repo_issues['payload_action'] == 'opened'].sort_values('created_at').drop_duplicates(subset='payload_issue', keep='first')
-        closed_issues = repo_issues[repo_issues['payload_action'] == 'closed'].sort_values('created_at').drop_duplicates(subset='payload_issue', keep='last')
-        open_times = opened_issues[['payload_issue', 'created_at']]
-        closed_times = closed_issues[['payload_issue', 'created_at']]
-        issues = pd.merge(open_times, closed_times, on='payload_issue')
-        issues['resolution_time'] = issues['created_at_y'] - issues['created_at_x']
-        time_data = issues[issues['resolution_time'] > pd.Timedelta(0)]
-        resolution_times = time_data['resolution_time'].dt.days
-        spinner.succeed('Respository Issues Anaysis Complete!')
-        return resolution_times.values
+        resolution_times = self.issueTable().resolutionDays(repo_url)
+        return resolution_times
+
+    @instrumented('Analyzing Repository Issues', 'Respository Issues Anaysis Complete!')
+    @windowed
+    @memoized
+    def issueResolutionBatch(self, repo_urls, start=None, end=None):
+        """
+            Gets the resolution times of the issues of several repositories.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The respository urls to analyze issue resolution time.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            dict: list(int)
+                The issue resolution times in days of each repository.
+        """
+        issue_table = self.issueTable()
+        resolution_times = {r: issue_table.resolutionDays(r) for r in repo_urls}
+        return resolution_times
+
+    @instrumented()
+    @windowed
+    @memoized
+    def issueHistogram(self, repo_url, bins=10, start=None, end=None):
+        """
+            Gets a histogram of a repository's issue resolution times.
+
+            Parameters
+            ----------
+            repo_url: str
+                The respository url to analyze issue resolution time.
+            bins: int or list
+                The number of bins or the bin edges in days.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            tuple: (np.ndarray, np.ndarray)
+                The issue count of each bin and the bin edges in days.
+        """
+        return self.issueTable().histogram(repo_url, bins)
+
+    @instrumented('Analyzing Repository Issues', 'Respository Issues Anaysis Complete!')
+    @windowed
+    @memoized
+    def issueSummary(self, percentiles=(0.25, 0.5, 0.75, 0.9), start=None, end=None):
+        """
+            Gets the issue counts and resolution time percentiles of every
+            repository with issues.
+
+            Parameters
+            ----------
+            percentiles: tuple(float)
+                The percentiles of the resolution times, between 0 and 1.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The issue, resolved, censored and reopen counts and resolution
+                time percentiles in days, indexed by repository url.
+        """
+        summary = self.issueTable().summary(percentiles)
+        return summary
+
+    @instrumented('Ranking Repository Issues', 'Respository Issues Ranking Complete!')
+    @windowed
+    @memoized
+    def issueRanking(self, num, min_resolved=5, ascending=True, start=None, end=None):
+        """
+            Gets the repositories ranked by median time to close their issues.
+
+            Parameters
+            ----------
+            num: int
+                The number of repositories to return.
+            min_resolved: int
+                The fewest resolved issues a repository needs to be ranked.
+            ascending: bool
+                Rank the fastest repositories first, otherwise the slowest.
+            start: str or pd.Timestamp
+                Optional start of the time range to analyze, see window.
+            end: str or pd.Timestamp
+                Optional end of the time range to analyze, exclusive.
+
+            Returns
+            -------
+            pd.DataFrame
+                The issue counts and resolution time percentiles in days of
+                the ranked repositories.
+        """
+        ranking = self.issueTable().rankByMedian(num, min_resolved, ascending)
+        return ranking
+
+    def issueTable(self):
+        """
+            Returns the lifecycle of every issue in the data. The table is
+            built on first use and shared by the issue analyses.
+
+            Returns
+            -------
+            IssueTable
+                The issue table of the data.
+        """
+        with self._lock:
+            if self._issue_table is None:
+                with Stage('build_issue_table', rows=self.rows):
+                    self._issue_table = IssueTable.fromFrame(self.data)
+        return self._issue_table
+
+    def _approximateTop(self, values, num, batch_size=1000000):
+        """
+            Streams a column through a heavy hitter tracker in batches.
+            Categorical columns are tracked by their integer codes.
+
+            Returns
+            -------
+            tuple: ((list, list), HeavyHitters)
+                The top items and estimated counts, and the tracker used.
+        """
+        tracker = HeavyHitters(**self.sketch_options)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            items = values.cat.codes.to_numpy()
+            items = items[items >= 0].astype(np.int64)
+        else:
+            categories = None
+            items = values.to_numpy()
+        for start in range(0, len(items), batch_size):
+            tracker.update(items[start:start + batch_size])
+        top, counts = tracker.top(num)
+        if categories is not None:
+            top = categories.to_numpy()[top.astype(np.int64)]
+        return (np.asarray(top, dtype=object), counts), tracker
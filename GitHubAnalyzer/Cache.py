@@ -0,0 +1,216 @@
+import os
+import json
+import shutil
+import hashlib
+import pandas as pd
+import numpy as np
+
+# Bump when the processed data layout changes so stale caches are ignored.
+CACHE_VERSION = 6
+
+def cacheKey(paths, countries_path):
+    """
+        Returns a key identifying a set of input files and the countries table.
+        The key changes whenever any of the files is moved, resized or modified.
+
+        Parameters
+        ----------
+        paths: list(str)
+            The input data file paths.
+        countries_path: str
+            Path to the location to country csv table.
+
+        Returns
+        -------
+        str
+            A hex digest of the files' paths, sizes and modification times.
+    """
+    h = hashlib.sha1(f'v{CACHE_VERSION}'.encode())
+    for path in list(paths) + [countries_path]:
+        stat = os.stat(path)
+        h.update(f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n'.encode())
+    return h.hexdigest()
+
+def save(data, cache_dir, key):
+    """
+        Writes a processed dataframe to the cache as one binary file per column.
+        Datetime and numeric columns are stored as raw arrays, nullable integers
+        with a missing value mask, and text and categorical columns as integer
+        codes plus a table of their unique values.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The processed data to cache.
+        cache_dir: str
+            Directory holding the cache entries.
+        key: str
+            The cache key of the data, see cacheKey.
+    """
+    path = os.path.join(cache_dir, key)
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    meta = {'rows': len(data), 'columns': []}
+    for i, col in enumerate(data.columns):
+        series = data[col]
+        name = f'{i}'
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind = 'category'
+            _saveStrings(os.path.join(tmp_path, name), series.cat.codes.to_numpy(), series.cat.categories)
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and series.dtype.kind in 'iu':
+            kind = 'integer'
+            np.save(os.path.join(tmp_path, name + '.npy'), series.fillna(0).to_numpy(dtype=series.dtype.numpy_dtype))
+            np.save(os.path.join(tmp_path, name + '.mask.npy'), series.isna().to_numpy())
+        elif pd.api.types.is_datetime64_dtype(series.dtype):
+            kind = 'datetime'
+            np.save(os.path.join(tmp_path, name + '.npy'), series.to_numpy().view(np.int64))
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            kind = 'numeric'
+            np.save(os.path.join(tmp_path, name + '.npy'), series.to_numpy())
+        else:
+            kind = 'string'
+            codes, uniques = pd.factorize(series)
+            _saveStrings(os.path.join(tmp_path, name), codes, uniques)
+        meta['columns'].append({'name': col, 'kind': kind, 'dtype': str(series.dtype)})
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+
+def load(cache_dir, key, columns=None, rows=None, mmap_mode=None):
+    """
+        Reads a processed dataframe from the cache.
+
+        Parameters
+        ----------
+        cache_dir: str
+            Directory holding the cache entries.
+        key: str
+            The cache key of the data, see cacheKey.
+        columns: list(str)
+            Optional names of the columns to read. Defaults to every column.
+        rows: slice or np.ndarray
+            Optional rows to read, as a slice or an array of row positions.
+            Defaults to every row.
+        mmap_mode: str
+            Optional np.load memory map mode, such as 'r'. The column files
+            are then mapped rather than read, so only the pages of the
+            selected rows are read from disk.
+
+        Returns
+        -------
+        pd.DataFrame
+            The cached data or None when there is no entry for the key.
+    """
+    meta = _loadMeta(cache_dir, key)
+    if meta is None:
+        return None
+    path = os.path.join(cache_dir, key)
+    take = (lambda values: values) if rows is None else (lambda values: np.array(values[rows]))
+    data = dict()
+    for i, col in enumerate(meta['columns']):
+        if columns is not None and col['name'] not in columns:
+            continue
+        name = os.path.join(path, f'{i}')
+        dtype = col['dtype']
+        if col['kind'] == 'category':
+            codes, uniques = _loadStrings(name, mmap_mode)
+            data[col['name']] = pd.Categorical.from_codes(take(codes), categories=uniques)
+        elif col['kind'] == 'integer':
+            values = take(np.load(name + '.npy', mmap_mode=mmap_mode))
+            mask = take(np.load(name + '.mask.npy', mmap_mode=mmap_mode))
+            data[col['name']] = pd.arrays.IntegerArray(values, mask)
+        elif col['kind'] == 'datetime':
+            data[col['name']] = take(np.load(name + '.npy', mmap_mode=mmap_mode)).view(dtype)
+        elif col['kind'] == 'numeric':
+            data[col['name']] = take(np.load(name + '.npy', mmap_mode=mmap_mode))
+        else:
+            codes, uniques = _loadStrings(name, mmap_mode)
+            codes = take(codes)
+            values = np.asarray(uniques, dtype=object).take(codes)
+            values[codes == -1] = np.nan
+            data[col['name']] = pd.Series(values, dtype=dtype)
+    return pd.DataFrame(data)
+
+def rowCount(cache_dir, key):
+    """
+        Returns the number of rows of a cache entry.
+
+        Parameters
+        ----------
+        cache_dir: str
+            Directory holding the cache entries.
+        key: str
+            The cache key of the data, see cacheKey.
+
+        Returns
+        -------
+        int
+            The number of rows or None when there is no entry for the key.
+    """
+    meta = _loadMeta(cache_dir, key)
+    return None if meta is None else meta['rows']
+
+def loadCodes(cache_dir, key, column, mmap_mode=None):
+    """
+        Reads the integer codes of a cached text or categorical column, with
+        -1 for missing values. Codes index the column's unique values.
+
+        Parameters
+        ----------
+        cache_dir: str
+            Directory holding the cache entries.
+        key: str
+            The cache key of the data, see cacheKey.
+        column: str
+            The column name.
+        mmap_mode: str
+            Optional np.load memory map mode, such as 'r'.
+
+        Returns
+        -------
+        np.ndarray
+            The code of each row.
+    """
+    meta = _loadMeta(cache_dir, key)
+    names = [c['name'] for c in meta['columns']]
+    i = names.index(column)
+    if meta['columns'][i]['kind'] not in ('category', 'string'):
+        raise ValueError(f'{column} is not a text column.')
+    return np.load(os.path.join(cache_dir, key, f'{i}.codes.npy'), mmap_mode=mmap_mode)
+
+def _loadMeta(cache_dir, key):
+    """
+        Reads the row count and column layout of a cache entry, or None when
+        there is no entry for the key.
+    """
+    try:
+        with open(os.path.join(cache_dir, key, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _saveStrings(name, codes, uniques):
+    """
+        Saves integer codes and their unique string values. The values are
+        joined into one text blob with character offsets.
+    """
+    uniques = [str(u) for u in uniques]
+    offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(u) for u in uniques])
+    np.save(name + '.codes.npy', np.asarray(codes, dtype=np.int32))
+    np.save(name + '.offsets.npy', offsets)
+    with open(name + '.txt', 'w', encoding='utf-8', newline='') as f:
+        f.write(''.join(uniques))
+
+def _loadStrings(name, mmap_mode=None):
+    """
+        Loads integer codes and their unique string values saved by _saveStrings.
+    """
+    codes = np.load(name + '.codes.npy', mmap_mode=mmap_mode)
+    offsets = np.load(name + '.offsets.npy').tolist()
+    with open(name + '.txt', encoding='utf-8', newline='') as f:
+        text = f.read()
+    uniques = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    return codes, uniques
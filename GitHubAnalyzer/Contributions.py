@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+# Similarity measures of the contributors of two repositories.
+METRICS = ['count', 'jaccard', 'cosine']
+
+class ContributionMatrix:
+    """
+        Sparse repository by actor incidence matrices of the events, built in
+        one pass with integer coded repositories and actors. Watch events and
+        all other events are kept in separate CSR matrices holding the event
+        count of each (repository, actor) pair, so each repository's actors
+        are a row and per repository or per actor totals are vectorized sums.
+        Co-contributor counts between repositories are sparse products of the
+        rows.
+    """
+
+    repos: pd.Index                 # Repository urls, positioned by row.
+    actors: pd.Index                # Actor logins, positioned by column.
+    languages: pd.Index             # Repository languages, positioned by language code.
+    repo_languages: np.ndarray      # Language code of each repository at its last event with one, -1 if unknown.
+    contributions: sparse.csr_matrix  # Non watch event count of each (repository, actor).
+    watches: sparse.csr_matrix      # Watch event count of each (repository, actor).
+
+    def __init__(self, repos, actors, languages, repo_languages, contributions, watches):
+        """
+            Create a contribution matrix from its parts. See fromFrame.
+        """
+        self.repos = repos
+        self.actors = actors
+        self.languages = languages
+        self.repo_languages = repo_languages
+        self.contributions = contributions
+        self.watches = watches
+
+    @classmethod
+    def fromFrame(cls, data):
+        """
+            Create the contribution matrix of processed data. Events without
+            a repository or actor login are left out.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+
+            Returns
+            -------
+            ContributionMatrix
+                The repository by actor event counts of the data.
+        """
+        repo_codes, repos = _codes(data['repository_url'])
+        actor_codes, actors = _codes(data['actor_attributes_login'])
+        language_codes, languages = _codes(data['repository_language'])
+        keep = (repo_codes >= 0) & (actor_codes >= 0)
+        watch = (data['type'] == 'WatchEvent').to_numpy()
+        shape = (len(repos), len(actors))
+        matrices = [
+            sparse.csr_matrix(
+                (np.ones(int(mask.sum()), dtype=np.int32), (repo_codes[mask], actor_codes[mask])), shape=shape
+            )
+            for mask in (keep & ~watch, keep & watch)
+        ]
+        repo_languages = np.full(len(repos), -1, dtype=np.int64)
+        known = (repo_codes >= 0) & (language_codes >= 0)
+        repo_languages[repo_codes[known]] = language_codes[known]
+        return cls(pd.Index(repos, name='repository_url'), pd.Index(actors, name='actor'), languages, repo_languages, *matrices)
+
+    def codes(self, repo_urls):
+        """
+            Returns the row of each repository, -1 for repositories without events.
+        """
+        return self.repos.get_indexer(repo_urls)
+
+    def repoActorCounts(self, repo_urls=None):
+        """
+            Returns the number of distinct contributors and watchers of
+            repositories, the stored entries of each of their rows.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The repositories. Defaults to every repository.
+
+            Returns
+            -------
+            pd.DataFrame
+                The contributor and watch event actor counts of each
+                repository, indexed by repository url.
+        """
+        counts = pd.DataFrame(
+            {'contributors': np.diff(self.contributions.indptr), 'watchers': np.diff(self.watches.indptr)},
+            index=self.repos
+        )
+        if repo_urls is None:
+            return counts
+        return counts.reindex(repo_urls, fill_value=0)
+
+    def actorRepoCounts(self):
+        """
+            Returns the number of repositories each actor contributed to, the
+            stored entries of each column.
+
+            Returns
+            -------
+            pd.Series
+                The repository count of each actor, indexed by login.
+        """
+        counts = np.bincount(self.contributions.indices, minlength=len(self.actors))
+        return pd.Series(counts, index=self.actors, name='repos')
+
+    def overlap(self, repo_urls, metric='count'):
+        """
+            Returns the contributor overlap between every pair of several
+            repositories, from one sparse product of their rows.
+
+            Parameters
+            ----------
+            repo_urls: list(str)
+                The repositories.
+            metric: str
+                'count' for the number of shared contributors, 'jaccard' for
+                shared over combined contributors or 'cosine' for shared over
+                the geometric mean of their contributor counts.
+
+            Returns
+            -------
+            pd.DataFrame
+                The overlap of each pair, indexed by repository url on both axes.
+        """
+        codes = self.codes(repo_urls)
+        known = codes >= 0
+        rows = _binary(self.contributions)[codes[known]]
+        shared = np.zeros((len(codes), len(codes)), dtype=np.int64)
+        shared[np.ix_(known, known)] = (rows @ rows.T).toarray()
+        sizes = np.diag(shared)
+        values = _similarity(shared, sizes[:, None], sizes[None, :], metric)
+        return pd.DataFrame(values, index=pd.Index(repo_urls, name='repository_url'), columns=list(repo_urls))
+
+    def similar(self, repo_url, num=10, metric='jaccard'):
+        """
+            Returns the repositories sharing the most contributors with a
+            repository, from one sparse product of its row with every row.
+
+            Parameters
+            ----------
+            repo_url: str
+                The repository.
+            num: int
+                The number of repositories to return.
+            metric: str
+                The measure to rank by, see overlap.
+
+            Returns
+            -------
+            pd.DataFrame
+                The shared contributors and similarity of the most similar
+                repositories in descending order, indexed by repository url.
+        """
+        code = self.codes([repo_url])[0]
+        columns = ['shared', metric]
+        if code < 0:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='repository_url'))
+        matrix = _binary(self.contributions)
+        shared = (matrix @ matrix[code].T).toarray().ravel()
+        shared[code] = 0
+        candidates = np.flatnonzero(shared)
+        sizes = np.diff(matrix.indptr)
+        values = _similarity(shared[candidates], sizes[code], sizes[candidates], metric)
+        order = np.lexsort((candidates, -shared[candidates], -values))[:num]
+        top = candidates[order]
+        return pd.DataFrame({'shared': shared[top], metric: values[order]}, index=self.repos[top])[columns]
+
+    def languageAffinity(self, logins):
+        """
+            Returns the share of each actor's contributed repositories in each
+            language, from one sparse product of their columns with the
+            repository languages. A repository counts under its language at
+            its last event, the latest one in data sorted by time, and
+            repositories without a language are left out.
+
+            Parameters
+            ----------
+            logins: list(str)
+                The actors.
+
+            Returns
+            -------
+            pd.DataFrame
+                The language shares of each actor, rows summing to 1 for
+                actors with any repository with a language, indexed by login
+                with a column per language.
+        """
+        codes = self.actors.get_indexer(logins)
+        known = np.flatnonzero(self.repo_languages >= 0)
+        languages = sparse.csr_matrix(
+            (np.ones(len(known), dtype=np.int32), (known, self.repo_languages[known])),
+            shape=(len(self.repos), len(self.languages))
+        )
+        counts = np.zeros((len(codes), len(self.languages)))
+        columns = _binary(self.contributions).T.tocsr()[codes[codes >= 0]]
+        counts[codes >= 0] = (columns @ languages).toarray()
+        totals = counts.sum(axis=1, keepdims=True)
+        shares = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        return pd.DataFrame(shares, index=pd.Index(logins, name='actor'), columns=list(self.languages))
+
+def _binary(matrix):
+    """
+        Returns a CSR matrix with ones where a matrix has entries.
+    """
+    return sparse.csr_matrix((np.ones(matrix.nnz, dtype=np.int32), matrix.indices, matrix.indptr), shape=matrix.shape)
+
+def _similarity(shared, sizes_a, sizes_b, metric):
+    """
+        Returns the similarity of contributor sets from their shared and total counts.
+    """
+    if metric not in METRICS:
+        raise ValueError(f'metric must be one of {", ".join(METRICS)}.')
+    shared = np.asarray(shared, dtype=np.float64)
+    if metric == 'count':
+        return shared.astype(np.int64)
+    if metric == 'jaccard':
+        union = sizes_a + sizes_b - shared
+    else:
+        union = np.sqrt(np.asarray(sizes_a, dtype=np.float64) * sizes_b)
+    return np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+def _codes(column):
+    """
+        Returns the integer code of each value of a column and the values of
+        the codes. Missing values get the code -1.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.int64), pd.Index(column.cat.categories.to_numpy(dtype=object))
+    codes, values = pd.factorize(column)
+    return codes.astype(np.int64), pd.Index(np.asarray(values, dtype=object))
@@ -1,13 +1,36 @@
+import os
+import time
+import shutil
+import subprocess
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib as mpl
-mpl.use("TkAgg")
-from mpl_toolkits.mplot3d import Axes3D
+
+# Backend charts are shown with. Tk unless MPLBACKEND picks another backend,
+# or matplotlib's default when Tk is not installed.
+INTERACTIVE_BACKEND = os.environ.get('MPLBACKEND') or ('TkAgg' if importlib.util.find_spec('_tkinter') else None)
+if INTERACTIVE_BACKEND:
+    mpl.use(INTERACTIVE_BACKEND)
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 from matplotlib import animation
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
 import numpy as np
 import re
+from GitHubAnalyzer.Instrument import Stage, METRICS
+
+# Where charts are saved instead of shown, see setOutput. Charts are shown in
+# a window while the directory is None.
+OUTPUT = {'dir': None, 'format': 'png', 'dpi': 100, 'animation_format': 'gif'}
+
+WEEKDAYS = [
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday',
+    'Friday', 'Saturday', 'Sunday'
+]
 
-def top_bar_chart(x_labels, data, y_label, title):
+def top_bar_chart(x_labels, data, y_label, title, filename=None):
     """
         Graphs a top N bar graph with labels.
 
@@ -21,6 +44,8 @@ def top_bar_chart(x_labels, data, y_label, title):
             The y label string to describe what is bring plotted.
         title: str
             The title of the graph.
+        filename: str
+            Name of the saved chart file, see setOutput.
 
         Returns
         -------
@@ -35,12 +60,10 @@ def top_bar_chart(x_labels, data, y_label, title):
     ax.set_ylabel(y_label)
     plt.tight_layout()
     plt.title(title)
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or title)
     return fig
 
-def top_country_langs(countries, langs):
+def top_country_langs(countries, langs, filename=None):
     """
         Graphs the top countries and their top languages.
 
@@ -48,42 +71,44 @@ def top_country_langs(countries, langs):
         ----------
         countries: list(str)
             A list of strings containing country names.
-
-        Returns
-        -------
-        pyplot.figure
-            A figure for includes the graph of the top country languages.
+        langs: list(tuple) or tuple(np.ndarray, np.ndarray)
+            Either a list with a (languages, counts) tuple for each country, or
+            the (languages, counts) matrices of shape (countries, languages)
+            returned by Analyzer.countryTopLanguagesBatch.
+        filename: str
+            Name of the saved chart file, see setOutput.
 
         Returns
         -------
         pyplot.Figure
             The py plot figure
     """
+    if isinstance(langs, tuple):
+        counts = np.asarray(langs[1])
+    else:
+        counts = np.array([arr[1] for arr in langs])
     fig = plt.figure()
-    ax = Axes3D(fig)
-    x = np.arange(10)
-    y = np.arange(1, 11)
-    x_mesh, y_mesh = np.meshgrid(x, y)
+    ax = fig.add_subplot(projection='3d')
+    x_ticks = np.arange(counts.shape[0])
+    y_ticks = np.arange(1, counts.shape[1] + 1)
+    x_mesh, y_mesh = np.meshgrid(x_ticks, y_ticks)
     x, y = x_mesh.ravel(), y_mesh.ravel()
     z = np.zeros(len(x))
     dx = np.ones(len(x)) * 0.5
     dy = np.ones(len(x)) * 0.5
-    lang_rank = np.transpose([arr[1] for arr in langs]).ravel()
+    lang_rank = np.transpose(counts).ravel()
     ax.bar3d(x, y, z, dx, dy, lang_rank, shade=True)
     ax.set_xlabel('Top Countries')
-    ax.set_xticks(x)
+    ax.set_xticks(x_ticks)
     ax.set_xticklabels(countries)
     ax.set_ylabel('Top Languages')
-    ax.set_yticks(y)
+    ax.set_yticks(y_ticks)
     ax.set_zlabel('Repo Count')
-    plt.tight_layout()
-    plt.title('Top Locations and Their Top Languages')
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    ax.set_title('Top Locations and Their Top Languages')
+    _show(fig, filename or 'top_country_langs')
     return fig
 
-def watcher_contributor_scatter(data, repo_names):
+def watcher_contributor_scatter(data, repo_names, filename=None):
     """
         Plots a scatter graph to compare watchers and contributors.
 
@@ -93,23 +118,30 @@ def watcher_contributor_scatter(data, repo_names):
             A list of tuples containing watcher and contributor data.
         repo_names: list(str)
             A list of repository names that correspond with each data point.
+        filename: str
+            Name of the saved chart file, see setOutput.
+
+        Returns
+        -------
+        pyplot.Figure
+            The py plot figure
     """
     x = [watchers[0] for watchers in data]
     y = [contributors[1] for contributors in data]
     names = [re.sub('^((http[s]?:\/\/(www.)?)?github.com\/)', '', i, flags=re.IGNORECASE) for i in repo_names]
     colors = ['tab:blue', 'tab:orange', 'tab:green', 'tab:red', 'tab:purple',
                 'tab:brown', 'tab:pink', 'tab:gray', 'tab:olive', 'tab:cyan']
-    plt.scatter(x, y, c=colors)
+    fig, ax = plt.subplots()
+    ax.scatter(x, y, c=colors[:len(x)])
     patches = [mpatches.Patch(color=colors[i], label=names[i]) for i in np.arange(len(names))]
-    plt.legend(handles=patches)
-    plt.xlabel("# of Watchers")
-    plt.ylabel("# of Contributors")
-    plt.title("Top 10 Repos: Watchers vs Contributors")
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    ax.legend(handles=patches)
+    ax.set_xlabel("# of Watchers")
+    ax.set_ylabel("# of Contributors")
+    ax.set_title("Top 10 Repos: Watchers vs Contributors")
+    _show(fig, filename or 'watcher_contributor_scatter')
+    return fig
 
-def repoYearLine(years_data, title):
+def repoYearLine(years_data, title, filename=None):
     """
         Graphs a line graph of repository creation over time.
 
@@ -119,6 +151,8 @@ def repoYearLine(years_data, title):
             A list of tuples where each tuple contains a year and repo count.
         title: str
             The title of the graph
+        filename: str
+            Name of the saved chart file, see setOutput.
 
         Returns
         -------
@@ -140,12 +174,10 @@ def repoYearLine(years_data, title):
     ax.set_xticklabels(year_range)
     ax.set_title(title)
     plt.tight_layout()
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or title)
     return fig
 
-def activityHist(data, xlabels):
+def activityHist(data, xlabels, filename=None):
     """
         A histogram of activity during certain times of the day.
 
@@ -155,6 +187,8 @@ def activityHist(data, xlabels):
             Value of each histogram bin.
         xlabels: list(str)
             List of bin values that label the times of the day.
+        filename: str
+            Name of the saved chart file, see setOutput.
 
         Returns
         -------
@@ -169,12 +203,10 @@ def activityHist(data, xlabels):
     ax.set_xlabel('Time of Day')
     ax.set_ylabel('Activity Counts')
     ax.set_title('Time of Day Activity Histogram')
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or 'activity_hist')
     return fig
 
-def activityTypesBar(data, xlabels, ylabels):
+def activityTypesBar(data, xlabels, ylabels, filename=None):
     """
         Graphs a stacked bar graph of activity type in each time period.
 
@@ -186,6 +218,8 @@ def activityTypesBar(data, xlabels, ylabels):
             List of bin values that label the times of the day.
         ylabels: list(str)
             List of strings describing the event types in order.
+        filename: str
+            Name of the saved chart file, see setOutput.
     """
     fig, ax = plt.subplots()
     bars = list()
@@ -204,12 +238,10 @@ def activityTypesBar(data, xlabels, ylabels):
     ax.set_title('Time of Day Activity Types')
     plt.legend(tuple(bars), tuple(ylabels))
     plt.tight_layout()
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or 'activity_types_bar')
     return fig
 
-def countryContributionBar(data, xlabels, ylabels):
+def countryContributionBar(data, xlabels, ylabels, filename=None):
     """
     """
     fig, ax = plt.subplots()
@@ -230,52 +262,175 @@ def countryContributionBar(data, xlabels, ylabels):
     ax.set_title('Time of Day Activity By Country')
     plt.legend(tuple(bars), tuple(ylabels))
     plt.tight_layout()
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or 'country_contribution_bar')
     return fig
 
-def weekdaysAnimated(data, xlabels):
+def weekdaysAnimated(data, xlabels, filename=None, titles=None, interval=2000):
     """
         Graphs an animated bar graph for activity during the time of day
         within a week. Animates by changing bar from weekday to weekday.
+        Any number of frames can be animated, such as the weeks or days of
+        the data from Analyzer.activityFrames. When an output directory is
+        set the animation is exported to a GIF or MP4 file, see setOutput and
+        exportAnimation, and its frame count and time per frame recorded on
+        the export's stage.
 
         Parameters
         ----------
         data: list(list)
             A list of lists containing days of the week data for activity
             broken into times of day data.
+        xlabels: list(str)
+            List of bin values that label the times of the day.
+        filename: str
+            Name of the saved chart file, see setOutput.
+        titles: list(str)
+            Title of each frame. Defaults to weekday titles.
+        interval: int
+            Milliseconds each frame is shown for.
+
+        Returns
+        -------
+        pyplot.Figure
+            The py plot figure
     """
-    weekdays = [
-        'Monday', 'Tuesday', 'Wednesday', 'Thursday',
-        'Friday', 'Saturday', 'Sunday'
-    ]
+    frames = np.asarray(data)
+    if titles is None:
+        titles = [f'{WEEKDAYS[i % 7]}\'s GitHub Activity Bar' for i in range(len(frames))]
+    if OUTPUT['dir']:
+        path = _outputPath(filename or 'weekdays_animated', OUTPUT['animation_format'])
+        with Stage('Grapher.exportAnimation') as stage:
+            fig, timings = exportAnimation(frames, xlabels, path, titles, fps=1000 / interval, dpi=OUTPUT['dpi'])
+            stage.record.update(frames=timings['frames'], frame_ms=timings['frame_ms'])
+        return fig
     fig, ax = plt.subplots()
-    rects = ax.bar(range(4), np.zeros(4), align='center')
-    annotations = [ax.text(i - 0.1, n + 10, str(n)) for i, n in enumerate(np.zeros(4))]
-    ax.set_xticks(np.arange(len(xlabels)))
+    artists, draw_frame = _animatedBars(ax, frames, xlabels, titles)
+    plt.tight_layout()
+    _ = animation.FuncAnimation(fig, draw_frame, frames=len(frames), interval=interval, blit=True)
+    _show(fig, filename or 'weekdays_animated')
+    return fig
+
+def exportAnimation(data, xlabels, path, titles=None, fps=0.5, dpi=100):
+    """
+        Writes an animated bar graph of activity frames to a GIF or MP4 file
+        without a display. The axes are drawn once and each frame only
+        redraws the bars, their labels and the title on top of the saved
+        background, then the canvas pixels are passed straight to the
+        encoder. MP4 files need ffmpeg.
+
+        Parameters
+        ----------
+        data: np.ndarray
+            Activity counts of shape (frames, bars).
+        xlabels: list(str)
+            Label of each bar.
+        path: str
+            The output file path ending in .gif or .mp4.
+        titles: list(str)
+            Title of each frame. Defaults to the frame numbers.
+        fps: float
+            Frames shown per second.
+        dpi: int
+            Resolution of the frames.
+
+        Returns
+        -------
+        tuple: (Figure, dict)
+            The figure, labeled with the path, and the number of frames, the
+            total seconds and the mean milliseconds spent rendering a frame.
+    """
+    frames = np.asarray(data)
+    if titles is None:
+        titles = [f'Frame {i + 1}' for i in range(len(frames))]
+    fig = Figure(dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    artists, draw_frame = _animatedBars(ax, frames, xlabels, titles)
+    fig.tight_layout()
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    render_times = np.zeros(len(frames))
+    def render():
+        for frame in range(len(frames)):
+            start = time.perf_counter()
+            canvas.restore_region(background)
+            for artist in draw_frame(frame):
+                ax.draw_artist(artist)
+            pixels = np.asarray(canvas.buffer_rgba()).copy()
+            render_times[frame] = time.perf_counter() - start
+            yield pixels
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.mp4'):
+        _writeMp4(path, render(), fps)
+    else:
+        _writeGif(path, render(), fps)
+    fig.set_label(path)
+    timings = {
+        'frames': len(frames), 'seconds': time.perf_counter() - start,
+        'frame_ms': float(render_times.mean() * 1000) if len(frames) else 0.0
+    }
+    return fig, timings
+
+def _animatedBars(ax, frames, xlabels, titles):
+    """
+        Sets up a bar graph whose bars, labels and title change each frame.
+        The y axis is fixed to the largest count so frames can be blitted.
+        Returns the changing artists and a function drawing a frame.
+    """
+    bars = np.arange(frames.shape[1])
+    top = frames.max() if frames.size else 1
+    rects = ax.bar(bars, np.zeros(len(bars)), align='center', animated=True)
+    annotations = [ax.text(i - 0.1, 0, '', animated=True) for i in bars]
+    title = ax.text(0.5, 1.02, max(titles, key=len, default=''), transform=ax.transAxes, ha='center', fontsize='large', animated=True)
+    ax.set_xticks(bars)
     ax.set_xticklabels(xlabels)
-    ax.set(xticks=range(len(xlabels)), xlim=[-1, len(xlabels)])
+    ax.set(xlim=[-1, len(bars)], ylim=(0, top + top / 10))
     ax.set_ylabel('Activity Counts')
     ax.set_xlabel('Time of Day')
-    def animate(frame):
-        d = data[frame]
-        ax.set(xlim=(-1, 4), ylim=(0, max(d) + max(d)/10))
-        ax.set_title(f'{weekdays[frame]}\'s GitHub Activity Bar')
+    artists = list(rects) + annotations + [title]
+    def draw_frame(frame):
+        d = frames[frame]
+        title.set_text(titles[frame])
         for i, n in enumerate(annotations):
-            n.set_position((i - 0.1, d[i] + 10))
+            n.set_position((i - 0.1, d[i] + top / 100))
             n.set_text(str(d[i]))
         for rect, h in zip(rects, d):
             rect.set_height(h)
-        return rects
-    _ = animation.FuncAnimation(fig, animate, frames=len(data), interval=2000, blit=False)
-    plt.tight_layout()
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
-    return fig
+        return artists
+    return artists, draw_frame
 
-def issueResolutionHist(data, title='Issue Resolution Times'):
+def _writeGif(path, frames, fps):
+    """
+        Encodes RGBA frames to an animated GIF.
+    """
+    images = (Image.fromarray(f[..., :3]).quantize(method=Image.Quantize.MEDIANCUT) for f in frames)
+    first = next(images)
+    first.save(path, save_all=True, append_images=images, duration=int(1000 / fps), loop=0)
+
+def _writeMp4(path, frames, fps):
+    """
+        Encodes RGBA frames to an H.264 MP4 by piping them to ffmpeg.
+    """
+    ffmpeg = shutil.which(mpl.rcParams['animation.ffmpeg_path'])
+    if ffmpeg is None:
+        raise RuntimeError('ffmpeg is needed to write MP4 files.')
+    proc = None
+    for f in frames:
+        if proc is None:
+            height, width = f.shape[:2]
+            proc = subprocess.Popen([
+                ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', path
+            ], stdin=subprocess.PIPE)
+        proc.stdin.write(f.tobytes())
+    if proc is not None:
+        proc.stdin.close()
+        if proc.wait():
+            raise RuntimeError(f'ffmpeg failed to write {path}.')
+
+def issueResolutionHist(data, title='Issue Resolution Times', filename=None):
     """
         Creates a histogram of the resolution times of issues.
 
@@ -285,13 +440,138 @@ def issueResolutionHist(data, title='Issue Resolution Times'):
             A list of all the different times it takes to close issues in days.
         title: str
             The desired title of the graph.
+        filename: str
+            Name of the saved chart file, see setOutput.
     """
     fig, ax = plt.subplots()
     ax.hist(data, np.arange(max(data)), edgecolor='black')
     ax.set_xlabel('Issue Resolution Times (Days)')
     ax.set_ylabel('Closed Issue Counts')
     ax.set_title(title)
-    manager = plt.get_current_fig_manager()
-    manager.resize(*manager.window.maxsize())
-    plt.show()
+    _show(fig, filename or title)
     return fig
+
+def setOutput(out_dir, fmt='png', dpi=100, animation_fmt='gif'):
+    """
+        Saves charts to files instead of showing them in a window. Charts are
+        drawn with the Agg backend, so no display is needed, and each figure
+        is closed once saved.
+
+        Parameters
+        ----------
+        out_dir: str
+            Directory to save the charts in, or None to show them again.
+        fmt: str
+            File format of the charts, such as png or svg.
+        dpi: int
+            Resolution of raster chart files.
+        animation_fmt: str
+            File format of the animated charts, gif or mp4. MP4 files need ffmpeg.
+    """
+    if animation_fmt not in ('gif', 'mp4'):
+        raise ValueError("animation_fmt must be 'gif' or 'mp4'.")
+    OUTPUT.update({'dir': out_dir, 'format': fmt, 'dpi': dpi, 'animation_format': animation_fmt})
+    plt.switch_backend('Agg' if out_dir else INTERACTIVE_BACKEND or mpl.rcParamsDefault['backend'])
+
+def renderAll(charts, out_dir, fmt='png', dpi=100, workers=None, animation_fmt='gif'):
+    """
+        Saves a batch of charts to files, rendering them in parallel on a
+        process pool. The stage records made while rendering on the pool,
+        such as the animation export timings, are sent back and emitted to
+        this process's METRICS.
+
+        Parameters
+        ----------
+        charts: list(tuple)
+            A (function name, args, kwargs) tuple for each chart, where the
+            function is one of this module's chart functions. The kwargs may
+            be left out.
+        out_dir: str
+            Directory to save the charts in.
+        fmt: str
+            File format of the charts, such as png or svg.
+        dpi: int
+            Resolution of raster chart files.
+        workers: int
+            Number of charts to render at once. Defaults to the CPU count, 1
+            renders the charts in this process.
+        animation_fmt: str
+            File format of the animated charts, gif or mp4.
+
+        Returns
+        -------
+        list: str
+            The path of each saved chart.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(charts)))
+    if workers == 1:
+        setOutput(out_dir, fmt, dpi, animation_fmt)
+        return [_renderChart(*chart) for chart in charts]
+    paths = list()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(out_dir, fmt, dpi, animation_fmt)) as executor:
+        for path, records in executor.map(_renderJob, *zip(*[_chartJob(chart) for chart in charts])):
+            for record in records:
+                METRICS.emit(record)
+            paths.append(path)
+    return paths
+
+def _initWorker(out_dir, fmt, dpi, animation_fmt):
+    """
+        Sets the output of a render pool worker. Sinks inherited from the
+        parent process are dropped, as the worker's records are emitted by
+        the parent.
+    """
+    setOutput(out_dir, fmt, dpi, animation_fmt)
+    for sink in list(METRICS.sinks):
+        METRICS.removeSink(sink)
+
+def _renderJob(name, args, kwargs):
+    """
+        Renders one chart on a pool worker and returns the path it was saved
+        to and the stage records made while rendering it.
+    """
+    records = list()
+    METRICS.addSink(records.append)
+    try:
+        return _renderChart(name, args, kwargs), records
+    finally:
+        METRICS.removeSink(records.append)
+
+def _chartJob(chart):
+    """
+        Returns a chart tuple with its kwargs filled in.
+    """
+    return chart if len(chart) == 3 else (chart[0], chart[1], dict())
+
+def _renderChart(name, args, kwargs=None):
+    """
+        Renders one chart and returns the path it was saved to.
+    """
+    fig = globals()[name](*args, **(kwargs or dict()))
+    return fig.get_label()
+
+def _show(fig, name):
+    """
+        Shows a chart in a maximized window, or saves and closes it when an
+        output directory is set. The saved path is kept as the figure's label.
+    """
+    if OUTPUT['dir'] is None:
+        manager = plt.get_current_fig_manager()
+        if hasattr(getattr(manager, 'window', None), 'maxsize'):
+            manager.resize(*manager.window.maxsize())
+        plt.show()
+        return
+    path = _outputPath(name, OUTPUT['format'])
+    fig.savefig(path, format=OUTPUT['format'], dpi=OUTPUT['dpi'])
+    fig.set_label(path)
+    plt.close(fig)
+
+def _outputPath(name, fmt):
+    """
+        Returns the path a chart is saved to in the output directory.
+    """
+    os.makedirs(OUTPUT['dir'], exist_ok=True)
+    slug = re.sub(r'\W+', '_', name).strip('_').lower()
+    return os.path.join(OUTPUT['dir'], f'{slug}.{fmt}')
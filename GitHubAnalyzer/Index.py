@@ -0,0 +1,326 @@
+import re
+import pandas as pd
+import numpy as np
+
+# Description words are runs of letters, digits and underscores.
+TOKEN_RE = re.compile(r'\w+')
+
+class TimeIndex:
+    """
+        Event times of data sorted by time, see Loader.sortByTime. A time
+        range maps to the slice of rows it covers with two binary searches.
+    """
+
+    times: np.ndarray               # Event times as integers of the unit, without the trailing missing times.
+    unit: str                       # Unit of the event times, such as 'us'.
+
+    def __init__(self, data):
+        """
+            Create a time index of processed data sorted by time.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data sorted by created_at.
+        """
+        created_at = data['created_at']
+        self.unit = np.datetime_data(created_at.dtype)[0]
+        self.times = created_at.to_numpy().view(np.int64)[:int(created_at.notna().sum())]
+
+    def value(self, time):
+        """
+            Returns a time as an integer of the index's unit.
+
+            Parameters
+            ----------
+            time: str or pd.Timestamp
+                The time.
+
+            Returns
+            -------
+            int
+                The time in units since the epoch.
+        """
+        return int(pd.Timestamp(time).to_datetime64().astype(f'datetime64[{self.unit}]').view(np.int64))
+
+    def rows(self, start=None, end=None):
+        """
+            Returns the rows of the events in a time range.
+
+            Parameters
+            ----------
+            start: str or pd.Timestamp
+                Start of the range. Defaults to the first event.
+            end: str or pd.Timestamp
+                End of the range, exclusive. Defaults to after the last event.
+
+            Returns
+            -------
+            tuple: (int, int)
+                The first row and the row after the last row of the range.
+                Events without a time are never in a range.
+        """
+        i = 0 if start is None else int(np.searchsorted(self.times, self.value(start), 'left'))
+        j = len(self.times) if end is None else int(np.searchsorted(self.times, self.value(end), 'left'))
+        return i, max(i, j)
+
+class DescriptionIndex:
+    """
+        Inverted index from repository description words to repositories.
+        Built once over the distinct (repository, description) pairs of the
+        data, so each description is tokenized once rather than once per event.
+        Postings are stored as sorted repository ids per word. The distinct
+        descriptions are kept too, so keywords that are not a single word are
+        checked against the text of the descriptions the postings narrow to.
+    """
+
+    repos: np.ndarray               # Repository urls, positioned by repository id.
+    years: np.ndarray               # Creation year of each repository, -1 if unknown.
+    vocabulary: np.ndarray          # Sorted distinct lower case description words.
+    offsets: np.ndarray             # Start of each word's postings, plus the end.
+    postings: np.ndarray            # Repository ids of each word's descriptions.
+    descriptions: np.ndarray        # Distinct descriptions, positioned by description id.
+    pair_repos: np.ndarray          # Repository id of each distinct (repository, description) pair.
+    pair_descs: np.ndarray          # Description id of each distinct (repository, description) pair.
+
+    def __init__(self, repos, years, vocabulary, offsets, postings, descriptions, pair_repos, pair_descs):
+        """
+            Create a description index from its arrays. See fromFrame.
+        """
+        self.repos = repos
+        self.years = years
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.descriptions = descriptions
+        self.pair_repos = pair_repos
+        self.pair_descs = pair_descs
+
+    @classmethod
+    def fromFrame(cls, data):
+        """
+            Create a description index of processed data.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+
+            Returns
+            -------
+            DescriptionIndex
+                The index of the data's repository descriptions.
+        """
+        repo_codes, repos = pd.factorize(data['repository_url'])
+        desc_codes, descs = pd.factorize(data['repository_description'])
+        pairs = pd.DataFrame({'repo': repo_codes, 'desc': desc_codes})
+        pairs = pairs[(pairs['repo'] >= 0) & (pairs['desc'] >= 0)].drop_duplicates()
+        tokens = {'desc': [], 'token': []}
+        for i, desc in enumerate(descs):
+            words = set(TOKEN_RE.findall(str(desc).lower()))
+            tokens['desc'].extend([i] * len(words))
+            tokens['token'].extend(words)
+        tokens = pd.DataFrame(tokens).merge(pairs, on='desc')[['token', 'repo']].drop_duplicates()
+        token_codes, vocabulary = pd.factorize(tokens['token'], sort=True)
+        repo_ids = tokens['repo'].to_numpy()
+        order = np.lexsort((repo_ids, token_codes))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(token_codes, minlength=len(vocabulary)), out=offsets[1:])
+        _, first_rows = np.unique(repo_codes[repo_codes >= 0], return_index=True)
+        first_rows = np.flatnonzero(repo_codes >= 0)[first_rows]
+        created = data['repository_created_at'].to_numpy()[first_rows]
+        years = np.where(np.isnat(created), -1, created.astype('datetime64[Y]').astype(np.int64) + 1970)
+        return cls(
+            np.asarray(repos, dtype=object), years, np.asarray(vocabulary, dtype=object),
+            offsets, repo_ids[order].astype(np.int32), np.asarray(descs, dtype=object),
+            pairs['repo'].to_numpy(dtype=np.int32), pairs['desc'].to_numpy(dtype=np.int32)
+        )
+
+    def lookup(self, word):
+        """
+            Returns the ids of the repositories with a word in their description.
+
+            Parameters
+            ----------
+            word: str
+                The whole word to look up, case insensitive.
+
+            Returns
+            -------
+            np.ndarray
+                Sorted repository ids.
+        """
+        word = word.lower()
+        i = np.searchsorted(self.vocabulary, word)
+        if i == len(self.vocabulary) or self.vocabulary[i] != word:
+            return np.zeros(0, dtype=np.int32)
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def match(self, keyword, substring=False):
+        """
+            Returns the ids of the repositories whose description matches a
+            keyword. A keyword of several words matches descriptions containing
+            it as written, like a str.contains scan: the postings of its words
+            narrow the candidates, whose descriptions are then checked.
+
+            Parameters
+            ----------
+            keyword: str
+                The keyword to search for, case insensitive.
+            substring: bool
+                Match text containing the keyword rather than whole words.
+
+            Returns
+            -------
+            np.ndarray
+                Sorted repository ids.
+        """
+        words = TOKEN_RE.findall(keyword.lower())
+        result = None if words else np.arange(len(self.repos), dtype=np.int32)
+        for word in words:
+            if substring:
+                found = np.flatnonzero(pd.Series(self.vocabulary).str.contains(word, regex=False).to_numpy())
+                ids = [self.postings[self.offsets[i]:self.offsets[i + 1]] for i in found]
+                ids = np.unique(np.concatenate(ids)) if ids else np.zeros(0, dtype=np.int32)
+            else:
+                ids = self.lookup(word)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        if words != [keyword.lower()]:
+            result = self._contains(result, keyword, substring)
+        return result
+
+    def _contains(self, ids, keyword, substring):
+        """
+            Returns the repositories of ids with a description containing a
+            keyword, as text or as whole words.
+        """
+        pairs = np.flatnonzero(np.isin(self.pair_repos, ids))
+        descs = np.unique(self.pair_descs[pairs])
+        texts = pd.Series(self.descriptions[descs], dtype=object)
+        if substring:
+            found = texts.str.contains(keyword, case=False, regex=False)
+        else:
+            found = texts.str.contains(r'(?<!\w)' + re.escape(keyword) + r'(?!\w)', case=False, regex=True)
+        matched = np.isin(self.pair_descs[pairs], descs[found.to_numpy(dtype=bool)])
+        return np.unique(self.pair_repos[pairs[matched]]).astype(np.int32)
+
+    def search(self, all_of=(), any_of=(), none_of=(), substring=False):
+        """
+            Returns the ids of the repositories whose description matches a
+            boolean combination of keywords, each matched as by match.
+
+            Parameters
+            ----------
+            all_of: list(str)
+                Keywords that must all match.
+            any_of: list(str)
+                Keywords of which at least one must match, if any are given.
+            none_of: list(str)
+                Keywords that must not match.
+            substring: bool
+                Match text containing the keywords rather than whole words.
+
+            Returns
+            -------
+            np.ndarray
+                Sorted repository ids.
+        """
+        result = None
+        for keyword in all_of:
+            ids = self.match(keyword, substring)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        if any_of:
+            ids = np.unique(np.concatenate([self.match(k, substring) for k in any_of]))
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        if result is None:
+            result = np.arange(len(self.repos), dtype=np.int32)
+        for keyword in none_of:
+            result = np.setdiff1d(result, self.match(keyword, substring), assume_unique=True)
+        return result
+
+    def yearCounts(self, ids):
+        """
+            Returns the number of repositories created in each year.
+
+            Parameters
+            ----------
+            ids: np.ndarray
+                Repository ids.
+
+            Returns
+            -------
+            list: tuple
+                Years and their repository count in year order.
+        """
+        years = self.years[ids]
+        years, counts = np.unique(years[years >= 0], return_counts=True)
+        return [(str(y), int(c)) for y, c in zip(years, counts)]
+
+    def save(self, path):
+        """
+            Saves the index to a numpy archive.
+
+            Parameters
+            ----------
+            path: str
+                The archive path.
+        """
+        descriptions, description_offsets = _joinTexts(self.descriptions)
+        np.savez(
+            path, years=self.years, offsets=self.offsets, postings=self.postings,
+            repos=_joinWords(self.repos), vocabulary=_joinWords(self.vocabulary),
+            descriptions=descriptions, description_offsets=description_offsets,
+            pair_repos=self.pair_repos, pair_descs=self.pair_descs
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+            Loads an index saved by save.
+
+            Parameters
+            ----------
+            path: str
+                The archive path.
+
+            Returns
+            -------
+            DescriptionIndex
+                The loaded index.
+        """
+        with np.load(path) as f:
+            return cls(
+                _splitWords(f['repos']), f['years'], _splitWords(f['vocabulary']),
+                f['offsets'], f['postings'], _splitTexts(f['descriptions'], f['description_offsets']),
+                f['pair_repos'], f['pair_descs']
+            )
+
+def _joinWords(words):
+    """
+        Packs words without newlines into a utf-8 byte array.
+    """
+    return np.frombuffer('\n'.join(words).encode('utf-8'), dtype=np.uint8)
+
+def _splitWords(packed):
+    """
+        Unpacks words packed by _joinWords.
+    """
+    text = packed.tobytes().decode('utf-8')
+    return np.asarray(text.split('\n') if text else [], dtype=object)
+
+def _joinTexts(texts):
+    """
+        Packs texts into a utf-8 byte array and the byte offset of each text,
+        plus the end.
+    """
+    encoded = [str(t).encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def _splitTexts(packed, offsets):
+    """
+        Unpacks texts packed by _joinTexts.
+    """
+    data = packed.tobytes()
+    return np.asarray([data[i:j].decode('utf-8') for i, j in zip(offsets[:-1], offsets[1:])], dtype=object)
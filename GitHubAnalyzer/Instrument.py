@@ -0,0 +1,420 @@
+import os
+import sys
+import json
+import time
+import inspect
+import threading
+import functools
+import importlib.util
+from collections import deque
+import pandas as pd
+
+# Whether stages show terminal spinners and progress bars. Batch jobs turn
+# them off with setSpinners so they do not pay for terminal output. halo and
+# tqdm are only imported once a spinner or progress bar is shown.
+SETTINGS = {'spinners': importlib.util.find_spec('halo') is not None}
+
+# Bytes in a memory page, to convert resident pages to bytes.
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+class Metrics:
+    """
+        Collector of the metrics of finished stages. Every record is kept for
+        the end of run summary and passed to each registered sink, such as a
+        JsonLinesSink or any function taking the record dict.
+    """
+
+    records: deque                  # Record of each finished stage, in finishing order.
+    sinks: list                     # Functions called with each record.
+
+    def __init__(self, max_records=None):
+        """
+            Create an empty collector without sinks.
+
+            Parameters
+            ----------
+            max_records: int
+                Optional number of most recent records to keep, see limit.
+        """
+        self.records = deque(maxlen=max_records)
+        self.sinks = list()
+        self._lock = threading.Lock()
+
+    def limit(self, max_records):
+        """
+            Keeps only the most recent records, so long running processes
+            stay in bounded memory. Sinks still get every record.
+
+            Parameters
+            ----------
+            max_records: int
+                The number of records to keep, or None to keep every record.
+        """
+        with self._lock:
+            self.records = deque(self.records, maxlen=max_records)
+
+    def addSink(self, sink):
+        """
+            Registers a function to call with the record of each finished stage.
+
+            Parameters
+            ----------
+            sink: function
+                Called with the record dict, see Stage.
+        """
+        with self._lock:
+            self.sinks.append(sink)
+
+    def removeSink(self, sink):
+        """
+            Stops sending records to a sink.
+
+            Parameters
+            ----------
+            sink: function
+                A sink registered with addSink.
+        """
+        with self._lock:
+            self.sinks.remove(sink)
+
+    def emit(self, record):
+        """
+            Stores a record and sends it to every sink.
+
+            Parameters
+            ----------
+            record: dict
+                The metrics of a finished stage.
+        """
+        with self._lock:
+            self.records.append(record)
+            sinks = list(self.sinks)
+        for sink in sinks:
+            sink(record)
+
+    def clear(self):
+        """
+            Drops every stored record. Sinks stay registered.
+        """
+        with self._lock:
+            self.records = deque(maxlen=self.records.maxlen)
+
+    def summary(self):
+        """
+            Returns the metrics of the stored records totalled by stage name.
+
+            Returns
+            -------
+            pd.DataFrame
+                The calls, wall and CPU seconds, most rows, largest peak memory
+                growth in megabytes and result cache hits and misses of each
+                stage, in the order the stages first finished.
+        """
+        with self._lock:
+            records = list(self.records)
+        columns = ['calls', 'wall_s', 'cpu_s', 'rows', 'peak_mb', 'cache_hits', 'cache_misses']
+        if not records:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame(records)
+        for name in ['rows', 'peak_mb', 'cache']:
+            if name not in frame:
+                frame[name] = None
+        frame['cache_hits'] = frame['cache'].isin(['hit', 'disk'])
+        frame['cache_misses'] = frame['cache'] == 'miss'
+        grouped = frame.groupby('name', sort=False)
+        summary = pd.DataFrame({
+            'calls': grouped.size(),
+            'wall_s': grouped['wall_s'].sum(),
+            'cpu_s': grouped['cpu_s'].sum(),
+            'rows': grouped['rows'].max(),
+            'peak_mb': grouped['peak_mb'].max(),
+            'cache_hits': grouped['cache_hits'].sum(),
+            'cache_misses': grouped['cache_misses'].sum(),
+        })
+        return summary[columns]
+
+class JsonLinesSink:
+    """
+        Sink writing each record as a line of JSON to a file.
+    """
+
+    def __init__(self, path):
+        """
+            Create a sink, truncating the file.
+
+            Parameters
+            ----------
+            path: str
+                The output file path.
+        """
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        """
+            Closes the file.
+        """
+        self._file.close()
+
+# Metrics of every stage of the process.
+METRICS = Metrics()
+
+_local = threading.local()
+
+# Number of stages running on any thread, as peak memory is only reset when
+# no stage is running.
+_active = {'stages': 0}
+_active_lock = threading.Lock()
+
+class Stage:
+    """
+        Context manager measuring a stage of work, such as reading the input
+        or an analysis. On exit it records the wall and CPU seconds, the peak
+        resident memory growth over the memory at the start, and any fields
+        set on it, such as rows or the result cache outcome, and emits the
+        record to METRICS. An optional spinner shows the stage's progress.
+
+        Peak memory is process wide, so it is only reset when a stage starts
+        while no other stage runs on any thread. A stage counts the process
+        peak when it rose while the stage ran, so stages running concurrently
+        on other threads count towards each other's peaks, and otherwise its
+        growth in resident memory. Nested stages count towards their parents.
+    """
+
+    record: dict                    # The stage name, fields set so far and, once finished, its metrics.
+
+    def __init__(self, name, text=None, success=None, rows=None):
+        """
+            Create a stage.
+
+            Parameters
+            ----------
+            name: str
+                The stage name records are totalled by.
+            text: str
+                Optional spinner text. No spinner is shown without it or when
+                spinners are turned off.
+            success: str
+                The spinner text once the stage finishes.
+            rows: int
+                Optional number of events the stage covers.
+        """
+        self.record = {'name': name}
+        if rows is not None:
+            self.record['rows'] = rows
+        self.text = text
+        self.success = success
+        self._info = None
+        self._spinner = None
+
+    def info(self, text):
+        """
+            Finishes the spinner with an informational text instead of the
+            success text, for stages that end without doing their work.
+
+            Parameters
+            ----------
+            text: str
+                The spinner text once the stage finishes.
+        """
+        self._info = text
+
+    def __enter__(self):
+        if self.text and SETTINGS['spinners']:
+            from halo import Halo
+            self._spinner = Halo(text=self.text, spinner='dots')
+            self._spinner.start()
+        stack = _stack()
+        with _active_lock:
+            alone = _active['stages'] == 0
+            _active['stages'] += 1
+        if alone:
+            resetPeakRss()
+        self._rss = currentRss()
+        self._peak = self._rss
+        self._start_peak = peakRss()
+        stack.append(self)
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        wall = time.perf_counter() - self._start
+        cpu = time.process_time() - self._cpu
+        end_peak = peakRss()
+        if end_peak > self._start_peak:
+            peak = max(self._peak, end_peak)
+        else:
+            peak = max(self._peak, currentRss())
+        with _active_lock:
+            _active['stages'] -= 1
+        stack = _stack()
+        stack.pop()
+        if stack:
+            stack[-1]._peak = max(stack[-1]._peak, peak)
+        self.record.update({
+            'wall_s': wall, 'cpu_s': cpu, 'peak_mb': (peak - self._rss) / 2**20, 'time': time.time()
+        })
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        if self._spinner is not None:
+            if exc_type is not None:
+                self._spinner.fail(f'{self.text} Failed!')
+            elif self._info:
+                self._spinner.info(self._info)
+            else:
+                self._spinner.succeed(self.success)
+        METRICS.emit(self.record)
+        return False
+
+def instrumented(text=None, success=None):
+    """
+        Decorates a method so every call runs as a Stage named after the
+        method and its class, such as Analyzer.topLanguages. The spinner
+        text may refer to the method's arguments by name, such as
+        '{keyword}'. The stage rows are the object's rows attribute when it
+        has one.
+
+        Parameters
+        ----------
+        text: str
+            Optional spinner text.
+        success: str
+            The spinner text once the method returns.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            spinner_text, success_text = text, success
+            if text and SETTINGS['spinners'] and '{' in text + (success or ''):
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                spinner_text, success_text = text.format(**bound.arguments), (success or '').format(**bound.arguments)
+            with Stage(method.__qualname__, spinner_text, success_text, getattr(self, 'rows', None)):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+    return decorator
+
+def annotate(**fields):
+    """
+        Sets fields on the record of the innermost running stage of the
+        current thread, if any.
+
+        Parameters
+        ----------
+        fields: dict
+            The record fields, such as cache='hit'.
+    """
+    stack = _stack()
+    if stack:
+        stack[-1].record.update(fields)
+
+def setSpinners(enabled):
+    """
+        Turns the stage spinners and progress bars on or off. Spinners stay
+        off when halo is not installed.
+
+        Parameters
+        ----------
+        enabled: bool
+            Whether to show spinners.
+    """
+    SETTINGS['spinners'] = bool(enabled) and importlib.util.find_spec('halo') is not None
+
+def progress(iterable, total=None):
+    """
+        Returns a tqdm progress bar over an iterable, or a stand-in showing
+        nothing when spinners are turned off.
+
+        Parameters
+        ----------
+        iterable: iterable
+            The items to iterate over.
+        total: int
+            The number of items, when the iterable has no length.
+
+        Returns
+        -------
+        iterable
+            The items, with a set_description method like tqdm's.
+    """
+    if not SETTINGS['spinners']:
+        return _QuietProgress(iterable)
+    from tqdm import tqdm
+    return tqdm(iterable, total=total)
+
+def resetPeakRss():
+    """
+        Resets the peak resident memory of the process where supported (Linux).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peakRss():
+    """
+        Returns the peak resident memory of the process in bytes since the
+        last reset, or since it started where resets are unsupported.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def currentRss():
+    """
+        Returns the resident memory of the process in bytes, or the peak where
+        the current size is unavailable.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return peakRss()
+
+class _QuietProgress:
+    """
+        Stand-in for a tqdm progress bar that shows nothing.
+    """
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def set_description(self, desc):
+        pass
+
+def _stack():
+    """
+        Returns the running stages of the current thread, innermost last.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = list()
+    return stack
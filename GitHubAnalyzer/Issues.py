@@ -0,0 +1,197 @@
+import pandas as pd
+import numpy as np
+
+# Seconds in a day, to report issue durations in fractional days.
+DAY_SECONDS = 86400
+
+class IssueTable:
+    """
+        Lifecycle of every issue in the data, built in one grouped pass over
+        the issue events. Each (repository, issue) has its first opened time,
+        last closed time and reopen count. Issues closed after they were
+        opened are resolved; issues never closed are censored at the end of
+        the data's time window. Issues are stored sorted by repository and
+        opened time with an offsets array, so the issues of any repository
+        are a slice found in constant time.
+    """
+
+    repos: pd.Index                 # Repository urls, positioned by repository code.
+    offsets: np.ndarray             # Start row of each repository's issues, plus the end.
+    issues: pd.DataFrame            # Issue lifecycles sorted by repository code and opened time.
+    end: pd.Timestamp               # End of the time window unresolved issues are censored at.
+
+    def __init__(self, repos, offsets, issues, end):
+        """
+            Create an issue table from its parts. See fromFrame.
+        """
+        self.repos = repos
+        self.offsets = offsets
+        self.issues = issues
+        self.end = end
+
+    @classmethod
+    def fromFrame(cls, data):
+        """
+            Create the issue table of processed data.
+
+            Parameters
+            ----------
+            data: pd.DataFrame
+                Processed timeline data.
+
+            Returns
+            -------
+            IssueTable
+                The lifecycle of each issue opened in the data.
+        """
+        end = data['created_at'].max()
+        urls = data['repository_url']
+        if isinstance(urls.dtype, pd.CategoricalDtype):
+            repo_codes = urls.cat.codes.to_numpy()
+            repos = urls.cat.categories
+        else:
+            repo_codes, repos = pd.factorize(urls)
+        rows = np.flatnonzero((data['type'] == 'IssuesEvent').to_numpy() & (repo_codes >= 0))
+        issue_codes, issue_ids = pd.factorize(data['payload_issue'].to_numpy()[rows])
+        known = issue_codes >= 0
+        rows, repo_codes, issue_codes = rows[known], repo_codes[rows[known]], issue_codes[known]
+        keys, groups = np.unique(repo_codes.astype(np.int64) * len(issue_ids) + issue_codes, return_inverse=True)
+        actions = data['payload_action'].to_numpy()[rows]
+        times = pd.Series(data['created_at'].to_numpy()[rows])
+        events = pd.DataFrame({
+            'group': groups,
+            'opened': times.where(actions == 'opened'),
+            'closed': times.where(actions == 'closed'),
+            'reopens': actions == 'reopened',
+        })
+        issues = events.groupby('group', sort=True).agg(opened=('opened', 'min'), closed=('closed', 'max'), reopens=('reopens', 'sum'))
+        issues['repo'] = (keys // max(len(issue_ids), 1)).astype(np.int32)
+        issues['issue'] = np.asarray(issue_ids, dtype=object)[keys % max(len(issue_ids), 1)]
+        resolved = (issues['closed'] > issues['opened']).to_numpy()
+        censored = (issues['opened'].notna() & issues['closed'].isna()).to_numpy()
+        issues = issues[resolved | censored]
+        issues['resolved'] = resolved[resolved | censored]
+        issues['duration'] = issues['closed'].where(issues['resolved'], end) - issues['opened']
+        order = np.lexsort((issues['opened'].to_numpy(), issues['repo'].to_numpy()))
+        issues = issues.iloc[order].reset_index(drop=True)
+        offsets = np.zeros(len(repos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(issues['repo'], minlength=len(repos)), out=offsets[1:])
+        columns = ['repo', 'issue', 'opened', 'closed', 'reopens', 'resolved', 'duration']
+        return cls(pd.Index(repos), offsets, issues[columns], end)
+
+    def events(self, repo_url):
+        """
+            Returns the issues of a repository in opened order.
+
+            Parameters
+            ----------
+            repo_url: str
+                The url of the repository.
+
+            Returns
+            -------
+            pd.DataFrame
+                A slice of the issue table for the repository.
+        """
+        code = self.repos.get_indexer([repo_url])[0]
+        if code < 0:
+            return self.issues.iloc[0:0]
+        return self.issues.iloc[self.offsets[code]:self.offsets[code + 1]]
+
+    def resolutionDays(self, repo_url):
+        """
+            Returns the whole days each resolved issue of a repository took
+            to close, in opened order.
+
+            Parameters
+            ----------
+            repo_url: str
+                The url of the repository.
+
+            Returns
+            -------
+            np.ndarray
+                The resolution time of each resolved issue in days.
+        """
+        issues = self.events(repo_url)
+        return issues['duration'][issues['resolved']].dt.days.to_numpy()
+
+    def histogram(self, repo_url, bins=10):
+        """
+            Returns a histogram of a repository's issue resolution times.
+
+            Parameters
+            ----------
+            repo_url: str
+                The url of the repository.
+            bins: int or list
+                The number of bins or the bin edges in days, see np.histogram.
+
+            Returns
+            -------
+            tuple: (np.ndarray, np.ndarray)
+                The issue count of each bin and the bin edges in days.
+        """
+        issues = self.events(repo_url)
+        return np.histogram(_days(issues['duration'][issues['resolved']]), bins=bins)
+
+    def summary(self, percentiles=(0.25, 0.5, 0.75, 0.9)):
+        """
+            Returns issue statistics of every repository with issues.
+
+            Parameters
+            ----------
+            percentiles: tuple(float)
+                The percentiles of the resolution times to include, between 0 and 1.
+
+            Returns
+            -------
+            pd.DataFrame
+                The issue, resolved, censored and reopen counts of each
+                repository and the percentiles of its resolution times in
+                days, indexed by repository url.
+        """
+        repo_urls = self.repos[self.issues['repo']]
+        resolved = self.issues['resolved']
+        grouped = self.issues.groupby(repo_urls, sort=False)
+        summary = pd.DataFrame({
+            'issues': grouped.size(),
+            'resolved': grouped['resolved'].sum(),
+            'reopens': grouped['reopens'].sum(),
+        })
+        summary['censored'] = summary['issues'] - summary['resolved']
+        days = pd.Series(_days(self.issues['duration']), index=self.issues.index)[resolved.to_numpy()]
+        quantiles = days.groupby(repo_urls[resolved.to_numpy()], sort=False).quantile(list(percentiles)).unstack()
+        for q in percentiles:
+            summary[f'p{q * 100:g}'] = quantiles[q] if q in quantiles else np.nan
+        return summary.sort_index()
+
+    def rankByMedian(self, num, min_resolved=1, ascending=True):
+        """
+            Returns the repositories ranked by median time to close their issues.
+
+            Parameters
+            ----------
+            num: int
+                The number of repositories to return.
+            min_resolved: int
+                The fewest resolved issues a repository needs to be ranked.
+            ascending: bool
+                Rank the fastest repositories first, otherwise the slowest.
+
+            Returns
+            -------
+            pd.DataFrame
+                The summary rows of the ranked repositories, see summary.
+        """
+        summary = self.summary()
+        summary = summary[summary['resolved'] >= max(min_resolved, 1)]
+        if ascending:
+            return summary.nsmallest(num, 'p50')
+        return summary.nlargest(num, 'p50')
+
+def _days(durations):
+    """
+        Returns timedeltas in fractional days.
+    """
+    return durations.dt.total_seconds().to_numpy() / DAY_SECONDS
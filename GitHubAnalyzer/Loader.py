@@ -0,0 +1,577 @@
+import os
+import glob
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+from GitHubAnalyzer import Instrument
+
+try:
+    import orjson
+    JSON_LOADS = orjson.loads
+except ImportError:
+    JSON_LOADS = json.loads
+
+# Columns of the GitHub timeline data used by the analyses.
+COLS = [
+    'repository_url', 'repository_created_at', 'repository_name',
+    'repository_description', 'repository_owner', 'repository_open_issues',
+    'repository_watchers', 'repository_language', 'actor_attributes_login',
+    'actor_attributes_name', 'actor_attributes_location', 'created_at',
+    'payload_action', 'payload_number','payload_issue', 'actor', 'url', 'type'
+]
+
+# Columns with few distinct values or values repeated for every event of the
+# same repository or actor. These are stored as categoricals.
+CATEGORY_COLS = [
+    'type', 'repository_language', 'payload_action', 'country',
+    'actor_attributes_location', 'repository_url', 'repository_name',
+    'repository_owner', 'repository_description',
+    'actor_attributes_login', 'actor_attributes_name', 'actor'
+]
+
+# Count columns stored as nullable integers.
+INT_COLS = ['repository_watchers', 'repository_open_issues', 'payload_number']
+
+# Timestamp columns stored as datetimes in seconds.
+TIME_COLS = ['created_at', 'repository_created_at']
+
+# Format of the timeline timestamps, such as 2012-03-11 00:00:07.
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Character positions of the digits of a timestamp in TIME_FORMAT, and the
+# positions and bytes of its date and time separators.
+TIME_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+TIME_SEPARATORS = [4, 7, 13, 16]
+TIME_SEPARATOR_BYTES = np.frombuffer(b'--::', dtype=np.uint8)
+
+# Days in each month of a common year and days before each month, with a
+# leading entry for invalid month 0.
+MONTH_DAYS = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MONTH_STARTS = np.concatenate([[0, 0], np.cumsum(MONTH_DAYS[1:-1])])
+
+# Location to country lookup table.
+COUNTRIES_PATH = 'data/countries.csv'
+
+# Types the columns are read in as.
+DF_TYPES = {
+    'repository_url': str, 'repository_created_at': str, 'repository_description': str,
+    'repository_owner': str, 'repository_open_issues': str, 'repository_watchers': str,
+    'repository_language': str, 'actor_attributes_login': str, 'actor_attributes_name': str,
+    'actor_attributes_location': str, 'created_at': str, 'payload_action': str,
+    'payload_number': str, 'payload_issue': str, 'actor': str, 'url': str, 'type': str
+}
+
+# Objects the flattened JSON fields are nested in, for events that are not
+# already flat. A field like repository_url is read from repository.url.
+JSON_PARENTS = ['repository', 'actor_attributes', 'payload']
+
+# Number of JSON events parsed per batch.
+JSON_CHUNKSIZE = 100000
+
+def dirFiles(dir_path):
+    """
+        Returns the CSV files within a directory in name order, so the rows
+        of the files come in the same order on every run and machine.
+
+        Parameters
+        ----------
+        dir_path: str
+            Path to the directory of input csv files.
+
+        Returns
+        -------
+        list: str
+            A sorted list of the csv file paths in the directory.
+    """
+    return sorted(glob.glob(dir_path + '/*.csv'))
+
+def readCsv(path):
+    """
+        Reads the used columns of a single timeline CSV file.
+
+        Parameters
+        ----------
+        path: str
+            Path to the input csv file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The file's data.
+    """
+    return pd.read_csv(path, usecols=COLS, dtype=DF_TYPES, header=0)
+
+def readChunks(paths, chunksize):
+    """
+        Reads input files in chunks of a fixed number of events.
+
+        Parameters
+        ----------
+        paths: list(str)
+            The CSV or JSON input files.
+        chunksize: int
+            Number of events in each chunk.
+
+        Yields
+        ------
+        pd.DataFrame
+            The next chunk of events.
+    """
+    for path in paths:
+        if path.endswith('.json'):
+            yield from readJsonChunks(path, chunksize)
+            continue
+        reader = pd.read_csv(path, usecols=COLS, dtype=DF_TYPES, header=0, chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                yield chunk
+
+def readJsonChunks(path, chunksize=JSON_CHUNKSIZE):
+    """
+        Reads the used columns of a line delimited JSON timeline file in
+        batches. Only the fields in COLS are extracted from each event, either
+        as flat keys or from their nested objects, and the values are read as
+        text so the batches have the same schema as the CSV reader. Uses
+        orjson to parse the events when it is installed.
+
+        Parameters
+        ----------
+        path: str
+            Path to the input json file.
+        chunksize: int
+            Number of events in each batch.
+
+        Yields
+        ------
+        pd.DataFrame
+            The next batch of events.
+    """
+    fields = [(col, _jsonParent(col)) for col in COLS]
+    rows = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = JSON_LOADS(line)
+            row = []
+            for col, (parent, key) in fields:
+                value = event.get(col)
+                if value is None and parent:
+                    nested = event.get(parent)
+                    if isinstance(nested, dict):
+                        value = nested.get(key)
+                row.append(value)
+            rows.append(row)
+            if len(rows) == chunksize:
+                yield _jsonFrame(rows)
+                rows = []
+    if rows:
+        yield _jsonFrame(rows)
+
+def readJson(path, chunksize=JSON_CHUNKSIZE):
+    """
+        Reads the used columns of a single line delimited JSON timeline file.
+        See readJsonChunks.
+
+        Parameters
+        ----------
+        path: str
+            Path to the input json file.
+        chunksize: int
+            Number of events parsed per batch.
+
+        Returns
+        -------
+        pd.DataFrame
+            The file's data.
+    """
+    frames = list(readJsonChunks(path, chunksize))
+    if not frames:
+        return _jsonFrame([])
+    return fillColumns(frames)
+
+def _jsonParent(col):
+    """
+        Returns the object a flattened JSON field is nested in and its key there.
+    """
+    for parent in JSON_PARENTS:
+        if col.startswith(parent + '_'):
+            return parent, col[len(parent) + 1:]
+    return None, None
+
+def _jsonText(value):
+    """
+        Returns a JSON value as the text the CSV export holds for it.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+def _jsonFrame(rows):
+    """
+        Returns the projected rows of a batch of JSON events as text columns.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(COLS)
+    return pd.DataFrame({
+        col: pd.Series([_jsonText(v) for v in values], dtype=DF_TYPES.get(col, str))
+        for col, values in zip(COLS, columns)
+    })
+
+def readFile(path):
+    """
+        Reads a single CSV or JSON timeline file.
+
+        Parameters
+        ----------
+        path: str
+            Path to the input file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The file's data.
+    """
+    if path.endswith('.csv'):
+        return readCsv(path)
+    return readJson(path)
+
+def fileStamp(path):
+    """
+        Returns the size and modification time of a file, used to tell
+        whether an input file has changed.
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+def readFilesSerial(paths):
+    """
+        Reads CSV files one after another and concatenates them.
+
+        Parameters
+        ----------
+        paths: list(str)
+            The paths of the csv files to read.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data of all the files in order.
+    """
+    li = []
+    pbar = Instrument.progress(paths)
+    for file in pbar:
+        pbar.set_description("Reading %s" % file)
+        df = readCsv(file)
+        li.append(df)
+    return pd.concat(li, axis=0, ignore_index=True)
+
+def readFiles(paths, workers=None, processes=False):
+    """
+        Reads CSV files concurrently on a pool of workers and copies each
+        file into preallocated columns of a single dataframe.
+
+        Parameters
+        ----------
+        paths: list(str)
+            The paths of the csv files to read.
+        workers: int
+            Number of files to read at once. Defaults to the CPU count.
+            A single worker falls back to reading the files serially.
+        processes: bool
+            Read the files in a process pool rather than a thread pool.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data of all the files in order, identical to the serial read.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    if workers == 1:
+        return readFilesSerial(paths)
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    frames = [None] * len(paths)
+    with pool(max_workers=workers) as executor:
+        futures = {executor.submit(readCsv, p): i for i, p in enumerate(paths)}
+        pbar = Instrument.progress(as_completed(futures), len(futures))
+        for future in pbar:
+            i = futures[future]
+            pbar.set_description("Read %s" % paths[i])
+            frames[i] = future.result()
+    return fillColumns(frames)
+
+def fillColumns(frames):
+    """
+        Copies a list of dataframes with the same columns into a single
+        dataframe with preallocated columns. Each frame is released as soon as
+        it is copied so peak memory stays close to the size of the result.
+
+        Parameters
+        ----------
+        frames: list(pd.DataFrame)
+            The dataframes to combine. The list is emptied.
+
+        Returns
+        -------
+        pd.DataFrame
+            The rows of all the frames in order.
+    """
+    sizes = [len(f) for f in frames]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+    first = frames[0]
+    dtypes = {c: first[c].dtype for c in first.columns}
+    columns = dict()
+    for c, dtype in dtypes.items():
+        alloc = dtype if isinstance(dtype, np.dtype) else np.dtype(object)
+        columns[c] = np.empty(offsets[-1], dtype=alloc)
+    for i in range(len(frames)):
+        frame = frames[i]
+        frames[i] = None
+        for c in columns:
+            columns[c][offsets[i]:offsets[i + 1]] = frame[c].to_numpy(dtype=columns[c].dtype)
+        del frame
+    data = pd.DataFrame(columns, copy=False)
+    for c, dtype in dtypes.items():
+        if data[c].dtype != dtype:
+            data[c] = data[c].astype(dtype)
+    return data
+
+def readCountries(path=COUNTRIES_PATH):
+    """
+        Reads the location to country lookup table.
+
+        Parameters
+        ----------
+        path: str
+            Path to the countries csv file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The location and country table.
+    """
+    return pd.read_csv(path)
+
+def parse(data):
+    """
+        Converts the timestamp columns to datetimes and the count columns to
+        nullable integers in place. Columns already converted are kept.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The raw timeline data.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data with parsed columns.
+    """
+    data['created_at'] = parseTimes(data['created_at'])
+    if 'repository_created_at' in data.columns:
+        data['repository_created_at'] = parseTimes(data['repository_created_at'], errors='coerce', repeated=True)
+    for col in INT_COLS:
+        if col in data.columns:
+            data[col] = parseInts(data[col])
+    return data
+
+def parseTimes(values, errors='raise', repeated=False):
+    """
+        Parses timestamps to datetimes in seconds. Text in TIME_FORMAT is
+        decoded from its fixed width bytes with vectorized arithmetic, and
+        any other text is handed to pd.to_datetime.
+
+        Parameters
+        ----------
+        values: pd.Series or np.ndarray
+            The timestamp text. Missing values become NaT.
+        errors: str
+            'raise' to fail on text that is not in TIME_FORMAT like
+            pd.to_datetime, or 'coerce' to parse it as any format pandas
+            reads and return NaT where that fails.
+        repeated: bool
+            Parse each distinct value once, for columns repeating the same
+            few timestamps, such as a repository's creation time.
+
+        Returns
+        -------
+        pd.Series
+            The datetimes, with the index of the values when it is a Series.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    if pd.api.types.is_datetime64_dtype(values.dtype):
+        return pd.Series(np.asarray(values, dtype='datetime64[s]'), index=index)
+    values = np.asarray(values, dtype=object)
+    if repeated:
+        codes, uniques = pd.factorize(values)
+        times = np.append(parseTimes(np.asarray(uniques, dtype=object), errors).to_numpy(), np.datetime64('NaT', 's'))
+        return pd.Series(times[codes], index=index)
+    try:
+        raw = values.astype('S20').view(np.uint8).reshape(-1, 20)
+    except (UnicodeEncodeError, ValueError):
+        raw = np.zeros((len(values), 20), dtype=np.uint8)
+    digits = raw[:, TIME_DIGITS] - np.uint8(ord('0'))
+    ok = (digits <= 9).all(axis=1) & (raw[:, 19] == 0) & (raw[:, TIME_SEPARATORS] == TIME_SEPARATOR_BYTES).all(axis=1)
+    ok &= (raw[:, 10] == ord(' ')) | (raw[:, 10] == ord('T'))
+    digits = digits.astype(np.int32)
+    year, month, day, hour, minute, second = (
+        digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3],
+        *(digits[:, i] * 10 + digits[:, i + 1] for i in range(4, 14, 2))
+    )
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = MONTH_DAYS[np.clip(month, 0, 12)] + (leap & (month == 2))
+    ok &= (month >= 1) & (day >= 1) & (day <= month_days) & (hour < 24) & (minute < 60) & (second < 60)
+    # Days since the epoch: whole years with their leap days, then the month and day.
+    before = year.astype(np.int64) - 1
+    days = (before - 1969) * 365 + before // 4 - before // 100 + before // 400 - 477
+    days += MONTH_STARTS[np.clip(month, 0, 12)] + (leap & (month > 2)) + day - 1
+    times = np.where(ok, days * 86400 + hour * 3600 + minute * 60 + second, np.iinfo(np.int64).min).view('datetime64[s]')
+    if not ok.all():
+        bad = np.flatnonzero(~ok)
+        bad = bad[pd.notna(values[bad])]
+        rest = pd.Series(values[bad], dtype=object)
+        if errors == 'raise':
+            parsed = pd.to_datetime(rest, format=TIME_FORMAT)
+        else:
+            parsed = pd.to_datetime(rest, format='mixed', errors='coerce', utc=True).dt.tz_localize(None)
+        times[bad] = parsed.to_numpy().astype('datetime64[s]')
+    return pd.Series(times, index=index)
+
+def parseInts(values):
+    """
+        Parses integer text to nullable 32 bit integers, parsing each distinct
+        value once. Text that is not an integer becomes missing.
+
+        Parameters
+        ----------
+        values: pd.Series
+            The integer text.
+
+        Returns
+        -------
+        pd.Series
+            The integers, with the index of the values.
+    """
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.astype('Int32')
+    codes, uniques = pd.factorize(values)
+    numbers = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce')
+    numbers = numbers.where(numbers == numbers.round()).astype('Int32')
+    return pd.Series(numbers.array.take(codes, allow_fill=True), index=values.index)
+
+def process(data, resolver):
+    """
+        Parses the timestamps and counts, see parse, and resolves each actor's
+        location to a country. Actors without a resolvable country get an
+        empty country string.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The raw timeline data.
+        resolver: LocationResolver
+            Resolves locations to countries.
+
+        Returns
+        -------
+        pd.DataFrame
+            The processed data.
+    """
+    with Instrument.Stage('parse', rows=len(data)):
+        parse(data)
+    data['country'] = resolver.resolveColumn(data['actor_attributes_location'])
+    return data
+
+def sortByTime(data):
+    """
+        Sorts processed data by event time. Events at the same time keep their
+        order and events without a time go last. Data already in order is
+        returned as is.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The processed data.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data sorted by created_at.
+    """
+    created_at = data['created_at']
+    valid = int(created_at.notna().sum())
+    if created_at.iloc[:valid].notna().all() and created_at.iloc[:valid].is_monotonic_increasing:
+        return data
+    times = created_at.to_numpy().view(np.int64).copy()
+    times[created_at.isna().to_numpy()] = np.iinfo(np.int64).max
+    return data.take(np.argsort(times, kind='stable')).reset_index(drop=True)
+
+def compact(data, report=False):
+    """
+        Converts the processed data to a compact schema. Repeated text columns
+        become categoricals and count columns become nullable integers. Count
+        columns already converted by parse are kept as they are.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The processed data.
+        report: bool
+            Measure each column's memory usage before and after. This is a
+            pass over every string, so it is only done when asked for.
+
+        Returns
+        -------
+        tuple: (pd.DataFrame, pd.DataFrame)
+            The compacted data and, when report is set, a report of each
+            column's memory usage in bytes before and after the conversion,
+            otherwise None.
+    """
+    before = data.memory_usage(index=False, deep=True) if report else None
+    for col in CATEGORY_COLS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    for col in INT_COLS:
+        if col in data.columns and data[col].dtype != 'Int32':
+            values = data[col] if pd.api.types.is_numeric_dtype(data[col]) else pd.to_numeric(data[col], errors='coerce')
+            data[col] = values.astype('Int32')
+    if not report:
+        return data, None
+    after = data.memory_usage(index=False, deep=True)
+    memory = pd.DataFrame({'before': before, 'after': after})
+    memory.loc['total'] = memory.sum()
+    memory['ratio'] = memory['after'] / memory['before']
+    return data, memory
+
+def concatFrames(frames):
+    """
+        Concatenates compacted dataframes, combining the categories of their
+        categorical columns so the columns stay categorical.
+
+        Parameters
+        ----------
+        frames: list(pd.DataFrame)
+            The dataframes to concatenate.
+
+        Returns
+        -------
+        pd.DataFrame
+            The rows of all the frames in order.
+    """
+    columns = dict()
+    for col in frames[0].columns:
+        parts = [f[col] for f in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            parts = [p if isinstance(p.dtype, pd.CategoricalDtype) else p.astype('category') for p in parts]
+            columns[col] = pd.api.types.union_categoricals(parts, ignore_order=True)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
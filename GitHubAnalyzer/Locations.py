@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import pandas as pd
+import numpy as np
+
+# Characters other than letters, digits, whitespace and commas.
+PUNCTUATION_RE = re.compile(r'[^\w\s,]+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+class LocationResolver:
+    """
+        Resolves free form actor locations to country names. Locations are
+        looked up exactly in the countries table first, then by a normalized
+        form ignoring case, accents, punctuation and spacing, then by their
+        comma separated parts so "City, Region" matches when either part is
+        known. Each distinct location is resolved once per column and the
+        results of the normalized lookups are memoized, optionally on disk.
+        A memo file is only used with the countries table it was resolved
+        against.
+    """
+
+    exact: dict                     # Table location to country.
+    normalized: dict                # Normalized location or country name to country.
+    memo: dict                      # Previously resolved locations to country.
+    table_hash: str                 # Digest of the countries table the memo was resolved against.
+
+    def __init__(self, countries, memo_path=None):
+        """
+            Create a location resolver.
+
+            Parameters
+            ----------
+            countries: pd.DataFrame
+                The location and country table.
+            memo_path: str
+                Optional JSON file to load and save resolved locations. A
+                memo saved with a different countries table is ignored.
+        """
+        table = countries.dropna().drop_duplicates('actor_attributes_location')
+        names = table['country'].replace('No Results', '')
+        self.exact = dict(zip(table['actor_attributes_location'], names))
+        self.normalized = dict()
+        for name in names.unique():
+            if name:
+                self.normalized[normalize(name)] = name
+        for location, name in self.exact.items():
+            key = normalize(location)
+            if key and not self.normalized.get(key):
+                self.normalized[key] = name
+        self.memo_path = memo_path
+        self.memo = dict()
+        self.table_hash = tableHash(countries)
+        self._memo_size = 0
+        if memo_path and os.path.exists(memo_path):
+            with open(memo_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('countries') == self.table_hash and isinstance(saved.get('locations'), dict):
+                self.memo = saved['locations']
+                self._memo_size = len(self.memo)
+
+    def resolve(self, location):
+        """
+            Returns the country of a location.
+
+            Parameters
+            ----------
+            location: str
+                The actor's location.
+
+            Returns
+            -------
+            str
+                The country name or an empty string when it cannot be resolved.
+        """
+        if not isinstance(location, str):
+            return ''
+        country = self.exact.get(location)
+        if country is not None:
+            return country
+        country = self.memo.get(location)
+        if country is None:
+            country = self._resolveNormalized(location)
+            self.memo[location] = country
+        return country
+
+    def resolveColumn(self, locations):
+        """
+            Returns the countries of a column of locations, resolving each
+            distinct location once.
+
+            Parameters
+            ----------
+            locations: pd.Series
+                The actors' locations.
+
+            Returns
+            -------
+            pd.Series
+                The country names, empty where the location cannot be resolved.
+        """
+        codes, uniques = pd.factorize(locations)
+        # Missing locations have code -1 and take the trailing empty country.
+        resolved = np.array([self.resolve(u) for u in uniques] + [''], dtype=object)
+        return pd.Series(resolved[codes], index=locations.index, name='country')
+
+    def saveMemo(self):
+        """
+            Writes the memoized locations and the countries table digest to
+            the memo file if any locations were added.
+        """
+        if self.memo_path and len(self.memo) != self._memo_size:
+            os.makedirs(os.path.dirname(self.memo_path) or '.', exist_ok=True)
+            tmp_path = self.memo_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'countries': self.table_hash, 'locations': self.memo}, f)
+            os.replace(tmp_path, self.memo_path)
+            self._memo_size = len(self.memo)
+
+    def _resolveNormalized(self, location):
+        """
+            Resolves a location by its normalized form and its comma separated parts.
+        """
+        key = normalize(location)
+        if key in self.normalized:
+            return self.normalized[key]
+        parts = [p for p in (p.strip() for p in key.split(',')) if p]
+        candidates = [', '.join(parts[i:]) for i in range(1, len(parts))]
+        candidates += [', '.join(parts[:i]) for i in range(len(parts) - 1, 0, -1)]
+        candidates += parts
+        for candidate in candidates:
+            country = self.normalized.get(candidate)
+            if country:
+                return country
+        return ''
+
+def tableHash(countries):
+    """
+        Returns a digest of the contents of a location and country table.
+
+        Parameters
+        ----------
+        countries: pd.DataFrame
+            The location and country table.
+
+        Returns
+        -------
+        str
+            A hex digest of the table's values.
+    """
+    hashes = pd.util.hash_pandas_object(countries, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+def normalize(location):
+    """
+        Returns a location in lower case without accents, punctuation or
+        repeated whitespace.
+
+        Parameters
+        ----------
+        location: str
+            The location to normalize.
+
+        Returns
+        -------
+        str
+            The normalized location.
+    """
+    location = unicodedata.normalize('NFKD', location)
+    location = ''.join(c for c in location if not unicodedata.combining(c)).casefold()
+    location = PUNCTUATION_RE.sub(' ', location)
+    location = ', '.join(WHITESPACE_RE.sub(' ', p).strip() for p in location.split(','))
+    return location.strip(', ')
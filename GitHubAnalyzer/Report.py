@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class Report:
+    """
+        Registry of named analyses with declared dependencies. Selected
+        analyses run with their dependencies as a DAG on a thread pool, so
+        independent analyses run concurrently and every analysis, including
+        shared intermediates, runs once.
+    """
+
+    steps: dict                     # Analysis name to its function, dependencies, charts and table.
+
+    def __init__(self):
+        """
+            Create an empty report.
+        """
+        self.steps = dict()
+
+    def add(self, name, function, deps=(), charts=None, table=None):
+        """
+            Registers an analysis.
+
+            Parameters
+            ----------
+            name: str
+                The analysis name.
+            function: function
+                Computes the analysis from the results of its dependencies,
+                passed as positional arguments in order.
+            deps: list(str)
+                Names of the analyses it depends on.
+            charts: function
+                Optional function returning the (Grapher function name, args)
+                charts of the analysis from its result.
+            table: function
+                Optional function returning the analysis result as a
+                pd.DataFrame, to export it without drawing charts.
+        """
+        self.steps[name] = {'function': function, 'deps': list(deps), 'charts': charts, 'table': table}
+
+    def order(self, names=None):
+        """
+            Returns analyses and everything they depend on, dependencies first.
+
+            Parameters
+            ----------
+            names: list(str)
+                The analyses to run. Defaults to every analysis.
+
+            Returns
+            -------
+            list: str
+                The analysis names in registration order, after their dependencies.
+        """
+        names = list(self.steps) if names is None else list(names)
+        ordered = list()
+        visiting = set()
+        def visit(name):
+            if name not in self.steps:
+                raise ValueError(f'Unknown analysis {name}.')
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f'Analysis {name} depends on itself.')
+            visiting.add(name)
+            for dep in self.steps[name]['deps']:
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+        for name in names:
+            visit(name)
+        return ordered
+
+    def run(self, names=None, workers=None):
+        """
+            Runs analyses and their dependencies, starting each as soon as its
+            dependencies finish.
+
+            Parameters
+            ----------
+            names: list(str)
+                The analyses to run. Defaults to every analysis.
+            workers: int
+                Number of analyses to run at once. Defaults to the CPU count.
+
+            Returns
+            -------
+            dict
+                The result of each analysis that ran, by name.
+        """
+        pending = self.order(names)
+        results = dict()
+        running = dict()
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            while pending or running:
+                for name in [n for n in pending if all(d in results for d in self.steps[n]['deps'])]:
+                    step = self.steps[name]
+                    future = executor.submit(step['function'], *[results[d] for d in step['deps']])
+                    running[future] = name
+                    pending.remove(name)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+    def charts(self, results, names=None):
+        """
+            Returns the charts of analyses in registration order.
+
+            Parameters
+            ----------
+            results: dict
+                The analysis results, see run.
+            names: list(str)
+                The analyses to chart. Defaults to every analysis with a result.
+
+            Returns
+            -------
+            list: tuple
+                A (Grapher function name, args) tuple for each chart.
+        """
+        names = set(results if names is None else names)
+        charts = list()
+        for name, step in self.steps.items():
+            if name in names and name in results and step['charts']:
+                charts.extend(step['charts'](results[name]))
+        return charts
+
+    def tables(self, results, names=None):
+        """
+            Returns the tables of analyses in registration order.
+
+            Parameters
+            ----------
+            results: dict
+                The analysis results, see run.
+            names: list(str)
+                The analyses to export. Defaults to every analysis with a result.
+
+            Returns
+            -------
+            dict: pd.DataFrame
+                The table of each analysis with one, by name.
+        """
+        names = set(results if names is None else names)
+        tables = dict()
+        for name, step in self.steps.items():
+            if name in names and name in results and step['table']:
+                tables[name] = step['table'](results[name])
+        return tables
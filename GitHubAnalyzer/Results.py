@@ -0,0 +1,206 @@
+import os
+import pickle
+import hashlib
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from GitHubAnalyzer import Instrument
+
+# Default memory cap of the in-process result cache in bytes.
+MAX_BYTES = 64 * 1024 * 1024
+
+class ResultCache:
+    """
+        Least recently used cache of analysis results. Results are stored
+        pickled, so every hit returns a fresh copy and the memory cap is
+        measured in pickled bytes. Entries evicted from memory or written by
+        earlier runs can be kept in an optional directory on disk. Each
+        lookup notes whether it was a hit, disk hit or miss on the running
+        Instrument stage.
+    """
+
+    entries: OrderedDict            # Pickled results by key, least recently used first.
+    hits: int                       # Lookups answered from memory.
+    disk_hits: int                  # Lookups answered from disk.
+    misses: int                     # Lookups that had to compute the result.
+    evictions: int                  # Entries dropped from memory to stay under the cap.
+
+    def __init__(self, max_bytes=MAX_BYTES, cache_dir=None):
+        """
+            Create an empty result cache.
+
+            Parameters
+            ----------
+            max_bytes: int
+                Memory cap of the cached results in pickled bytes.
+            cache_dir: str
+                Optional directory to also store results in across runs.
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, persist=True):
+        """
+            Returns the cached result of a key, computing and storing it on a miss.
+
+            Parameters
+            ----------
+            key: str
+                The key of the result, see resultKey.
+            compute: function
+                Called without arguments to compute the result on a miss.
+            persist: bool
+                Whether the disk tier may be used for the key.
+
+            Returns
+            -------
+            object
+                The result.
+        """
+        with self._lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if blob is not None:
+            Instrument.annotate(cache='hit')
+            return pickle.loads(blob)
+        path = os.path.join(self.cache_dir, key + '.pkl') if self.cache_dir and persist else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                blob = f.read()
+            with self._lock:
+                self.disk_hits += 1
+                self._put(key, blob)
+            Instrument.annotate(cache='disk')
+            return pickle.loads(blob)
+        Instrument.annotate(cache='miss')
+        result = compute()
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.misses += 1
+            self._put(key, blob)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        return result
+
+    def clear(self):
+        """
+            Drops every result held in memory. The disk tier is kept since its
+            entries are keyed by dataset version.
+        """
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """
+            Returns the cache counters.
+
+            Returns
+            -------
+            dict
+                The hit, disk hit, miss and eviction counts, the number of
+                entries and the bytes held in memory.
+        """
+        return {
+            'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+            'evictions': self.evictions, 'entries': len(self.entries), 'bytes': self.nbytes
+        }
+
+    def _put(self, key, blob):
+        """
+            Stores a pickled result in memory, evicting the least recently
+            used results to stay under the cap. Results larger than the cap
+            are not kept in memory.
+        """
+        if len(blob) > self.max_bytes:
+            return
+        self.entries[key] = blob
+        self.nbytes += len(blob)
+        while self.nbytes > self.max_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= len(old)
+            self.evictions += 1
+
+def resultKey(version, name, arguments, code=''):
+    """
+        Returns the key of a method's result on a version of the data.
+
+        Parameters
+        ----------
+        version: str
+            The dataset version.
+        name: str
+            The method name.
+        arguments: dict
+            The method's arguments by name, including defaults.
+        code: str
+            Digest of the method's code, see codeHash.
+
+        Returns
+        -------
+        str
+            A hex digest of the version, method, its code and arguments.
+    """
+    h = hashlib.sha1(f'{version}|{name}|{code}|'.encode())
+    h.update(pickle.dumps(sorted(arguments.items()), protocol=pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+def codeHash(function):
+    """
+        Returns a digest of a function's qualified name and source code, or
+        of its compiled code where the source is unavailable.
+
+        Parameters
+        ----------
+        function: function
+            The function.
+
+        Returns
+        -------
+        str
+            A hex digest that changes whenever the function's code does.
+    """
+    h = hashlib.sha1(function.__qualname__.encode())
+    try:
+        h.update(inspect.getsource(function).encode())
+    except (OSError, TypeError):
+        h.update(function.__code__.co_code)
+    return h.hexdigest()
+
+def memoized(method):
+    """
+        Decorates an Analyzer method so its results are served from the
+        Analyzer's result cache. Arguments are bound to the method's signature
+        so positional, keyword and default arguments share entries. Keys
+        include a digest of the method's source, so results stored on disk by
+        an earlier version of the method are not served; changes to the code
+        it calls still need a CACHE_VERSION bump.
+    """
+    signature = inspect.signature(method)
+    code = codeHash(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments['self']
+        arguments['sketch_options'] = sorted(self.sketch_options.items())
+        key = resultKey(self.version, method.__qualname__, arguments, code)
+        return self.results.get(key, lambda: method(self, *args, **kwargs), self._generation == 0)
+
+    return wrapper
@@ -0,0 +1,335 @@
+import json
+import math
+import time
+import inspect
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+import numpy as np
+from GitHubAnalyzer import Instrument
+
+# Analyzer methods served as endpoints and the query parameters each takes
+# with their types. Every endpoint also takes start and end times, see
+# Analyzer.window.
+ENDPOINTS = {
+    'topLanguages': {'num': int, 'approximate': 'bool'},
+    'topActorCountries': {'num': int, 'approximate': 'bool'},
+    'countryTopLanguages': {'country': str, 'num': int},
+    'getPopularRepo': {'num': int, 'approximate': 'bool'},
+    'getWatchersContributors': {'repo_url': str},
+    'issueResolution': {'repo_url': str},
+    'timeOfDayActivity': {'chunks': int, 'main_country': str},
+    'countryActivity': {'chunks': int, 'main_country': str},
+    'dayOfWeek': {'chunks': int},
+    'actorRepoCounts': {'num': int},
+    'similarRepos': {'repo_url': str, 'num': int, 'metric': str},
+}
+
+# Number of recent latencies kept per endpoint for the percentiles.
+LATENCY_WINDOW = 10000
+
+# Number of stage records the Instrument metrics keep while serving.
+MAX_RECORDS = 10000
+
+class LatencyStats:
+    """
+        Request counts and latencies of each endpoint. Percentiles are taken
+        over the most recent requests, see LATENCY_WINDOW.
+    """
+
+    counts: dict                    # Number of requests of each endpoint.
+    errors: dict                    # Number of failed requests of each endpoint.
+    latencies: dict                 # Seconds of the most recent requests of each endpoint.
+
+    def __init__(self, window=LATENCY_WINDOW):
+        """
+            Create empty stats.
+
+            Parameters
+            ----------
+            window: int
+                The number of recent latencies kept per endpoint.
+        """
+        self.window = window
+        self.counts = dict()
+        self.errors = dict()
+        self.latencies = dict()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok=True):
+        """
+            Adds a finished request.
+
+            Parameters
+            ----------
+            endpoint: str
+                The endpoint name.
+            seconds: float
+                The time taken to answer the request.
+            ok: bool
+                Whether the request succeeded.
+        """
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + (not ok)
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self):
+        """
+            Returns the stats of each endpoint.
+
+            Returns
+            -------
+            dict
+                The requests, errors and mean, 50th, 95th and 99th percentile
+                and largest latency in milliseconds of each endpoint by name.
+        """
+        with self._lock:
+            latencies = {e: np.array(l) for e, l in self.latencies.items()}
+            counts, errors = dict(self.counts), dict(self.errors)
+        summary = dict()
+        for endpoint, seconds in latencies.items():
+            p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+            summary[endpoint] = {
+                'requests': counts[endpoint], 'errors': errors[endpoint], 'mean_ms': seconds.mean() * 1000,
+                'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': seconds.max() * 1000,
+            }
+        return summary
+
+class QueryServer(HTTPServer):
+    """
+        HTTP server answering analysis queries from a loaded Analyzer as JSON.
+        Each connection is handled on a thread pool, so queries run
+        concurrently; the Analyzer's lazily built structures and result
+        cache are shared between them.
+
+        Endpoints are GET requests on the method name with the arguments as
+        query parameters, such as /topLanguages?num=10&start=2012-03-12,
+        answering {"result": ...}. /stats answers the latency stats of each
+        endpoint and the result cache counters, and / lists the endpoints.
+    """
+
+    analyzer: object                # The Analyzer queries are answered from.
+    stats: LatencyStats             # Latencies of the answered requests.
+
+    def __init__(self, analyzer, host='127.0.0.1', port=8765, workers=None, verbose=False):
+        """
+            Create a server listening on an address.
+
+            Parameters
+            ----------
+            analyzer: Analyzer
+                The loaded data to answer queries from.
+            host: str
+                The address to listen on. Defaults to local connections only.
+            port: int
+                The port to listen on, 0 to pick a free port.
+            workers: int
+                Number of requests handled at once. Defaults to the thread
+                pool default.
+            verbose: bool
+                Log each request to stderr.
+        """
+        super().__init__((host, port), QueryHandler)
+        self.analyzer = analyzer
+        self.verbose = verbose
+        self.stats = LatencyStats()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query')
+
+    @property
+    def url(self):
+        """
+            The base url the server listens on.
+        """
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def warm(self):
+        """
+            Builds the structures the endpoints are answered from, so the
+            first queries do not pay for them.
+        """
+        self.analyzer.aggregates()
+        self.analyzer.issueTable()
+        self.analyzer.timeIndex()
+
+    def query(self, endpoint, params):
+        """
+            Runs an endpoint's analysis.
+
+            Parameters
+            ----------
+            endpoint: str
+                The endpoint name, see ENDPOINTS.
+            params: dict
+                The text of each query parameter by name.
+
+            Returns
+            -------
+            object
+                The analysis result, see toJson.
+        """
+        types = dict(ENDPOINTS[endpoint], start=str, end=str)
+        unknown = [p for p in params if p not in types]
+        if unknown:
+            raise ValueError(f'unknown parameters {", ".join(unknown)}')
+        kwargs = {p: _convert(value, types[p]) for p, value in params.items()}
+        method = getattr(self.analyzer, endpoint)
+        inspect.signature(method).bind(**kwargs)
+        return method(**kwargs)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._processRequest, request, client_address)
+
+    def _processRequest(self, request, client_address):
+        """
+            Handles one connection on a pool thread.
+        """
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+        Request handler of a QueryServer.
+    """
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        name = url.path.strip('/')
+        if name == '':
+            self._send(200, {'endpoints': {e: sorted(dict(p, start=str, end=str)) for e, p in ENDPOINTS.items()}})
+            return
+        if name == 'stats':
+            self._send(200, {
+                'endpoints': self.server.stats.summary(), 'results': self.server.analyzer.results.stats(),
+                'rows': self.server.analyzer.rows,
+            })
+            return
+        if name not in ENDPOINTS:
+            self._send(404, {'error': f'unknown endpoint {name}'})
+            return
+        params = {p: values[-1] for p, values in parse_qs(url.query).items()}
+        try:
+            status, body = 200, {'result': self.server.query(name, params)}
+        except (TypeError, ValueError) as e:
+            status, body = 400, {'error': str(e)}
+        except Exception as e:
+            status, body = 500, {'error': f'{type(e).__name__}: {e}'}
+        data = _encode(body)
+        # Recorded before the response is written, so a client sees its own
+        # requests in the stats as soon as it has their answers.
+        self.server.stats.record(name, time.perf_counter() - start, status == 200)
+        self._send(status, data)
+
+    def _send(self, status, body):
+        """
+            Writes a JSON response, from a result or its encoded bytes.
+        """
+        data = body if isinstance(body, bytes) else _encode(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def toJson(value):
+    """
+        Converts an analysis result to JSON compatible values. Arrays and
+        tuples become lists, numpy scalars Python numbers, dataframes lists
+        of records, times ISO strings and missing values None.
+
+        Parameters
+        ----------
+        value: object
+            The result.
+
+        Returns
+        -------
+        object
+            The result as dicts, lists, strings, numbers and None.
+    """
+    if isinstance(value, dict):
+        return {str(k): toJson(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [toJson(v) for v in value]
+    if isinstance(value, pd.DataFrame):
+        return toJson(value.reset_index().to_dict(orient='records'))
+    if isinstance(value, pd.Series):
+        return toJson(value.to_dict())
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and not math.isfinite(value)):
+        return None
+    return value
+
+def serve(analyzer, host='127.0.0.1', port=8765, workers=None, verbose=False, ready=None):
+    """
+        Answers queries from an Analyzer until interrupted, see QueryServer.
+        Spinners are turned off and only the most recent stage metrics are
+        kept while serving.
+
+        Parameters
+        ----------
+        analyzer: Analyzer
+            The loaded data to answer queries from.
+        host: str
+            The address to listen on.
+        port: int
+            The port to listen on.
+        workers: int
+            Number of requests handled at once.
+        verbose: bool
+            Log each request to stderr.
+        ready: function
+            Optional function called with the QueryServer once it is warmed
+            up, before it starts serving, such as to learn the port picked
+            for port 0 or to shut it down from another thread.
+    """
+    Instrument.setSpinners(False)
+    Instrument.METRICS.limit(MAX_RECORDS)
+    server = QueryServer(analyzer, host, port, workers, verbose)
+    with Instrument.Stage('warm_server', rows=analyzer.rows):
+        server.warm()
+    print(f'Serving on {server.url}')
+    if ready is not None:
+        ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def _encode(body):
+    """
+        Returns a response body as JSON bytes.
+    """
+    return json.dumps(toJson(body)).encode()
+
+def _convert(text, kind):
+    """
+        Converts the text of a query parameter to its type.
+    """
+    if kind == 'bool':
+        if text.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError(f'expected true or false, got {text}')
+        return text.lower() in ('true', '1')
+    return kind(text)
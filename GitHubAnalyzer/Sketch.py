@@ -0,0 +1,256 @@
+import math
+import pandas as pd
+import numpy as np
+
+# Odd 64 bit constants used to derive independent hash functions.
+MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+MIXER = np.uint64(0xBF58476D1CE4E5B9)
+
+class CountMinSketch:
+    """
+        Count-Min sketch of item frequencies. Estimates never undercount and
+        overcount by at most epsilon times the total count with probability
+        1 - delta, using a fixed depth x width table of counters.
+    """
+
+    table: np.ndarray               # Counters of shape (depth, width).
+    seeds: np.ndarray               # Seed of each row's hash function.
+
+    def __init__(self, epsilon=0.0001, delta=0.01, seed=0):
+        """
+            Create an empty sketch.
+
+            Parameters
+            ----------
+            epsilon: float
+                Maximum overcount as a fraction of the total count.
+            delta: float
+                Probability of exceeding the maximum overcount.
+            seed: int
+                Seed of the hash functions. Only sketches with the same seed,
+                epsilon and delta can be merged.
+        """
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.seeds = np.random.default_rng(seed).integers(1, 2**63, self.depth, dtype=np.uint64)
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def update(self, hashes, counts=None):
+        """
+            Adds items to the sketch.
+
+            Parameters
+            ----------
+            hashes: np.ndarray
+                The uint64 hashes of the items, see hashValues.
+            counts: np.ndarray
+                Optional count of each item, one each if None.
+        """
+        for row, index in enumerate(self._indexes(hashes)):
+            self.table[row] += np.bincount(index, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += len(hashes) if counts is None else int(np.sum(counts))
+
+    def estimate(self, hashes):
+        """
+            Returns the estimated counts of items.
+
+            Parameters
+            ----------
+            hashes: np.ndarray
+                The uint64 hashes of the items, see hashValues.
+
+            Returns
+            -------
+            np.ndarray
+                The estimated count of each item.
+        """
+        return np.min([self.table[row][index] for row, index in enumerate(self._indexes(hashes))], axis=0)
+
+    def merge(self, other):
+        """
+            Adds the counts of another sketch with the same parameters.
+        """
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def _indexes(self, hashes):
+        """
+            Yields the column of each item in each row of the table.
+        """
+        for seed in self.seeds:
+            x = (hashes ^ seed) * MULTIPLIER
+            x ^= x >> np.uint64(31)
+            x *= MIXER
+            x ^= x >> np.uint64(29)
+            yield (x % np.uint64(self.width)).astype(np.int64)
+
+class SpaceSaving:
+    """
+        Space-Saving summary of the most frequent items. Keeps a fixed number
+        of counters. Every item with a true count above total / capacity is
+        kept, and each kept count overestimates the true count by at most its
+        recorded error.
+    """
+
+    counts: pd.Series               # Upper bound count of each kept item.
+    errors: pd.Series               # Maximum overcount of each kept item.
+
+    def __init__(self, capacity=1000):
+        """
+            Create an empty summary.
+
+            Parameters
+            ----------
+            capacity: int
+                The number of items kept.
+        """
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    def update(self, values):
+        """
+            Adds a batch of items to the summary. The batch is counted exactly
+            and merged, so memory is bounded by the capacity plus the batch.
+
+            Parameters
+            ----------
+            values: np.ndarray
+                The items.
+        """
+        counts = pd.Series(values).value_counts()
+        self._merge(counts, pd.Series(0, index=counts.index, dtype=np.int64), 0)
+        self.total += int(counts.sum())
+
+    def merge(self, other):
+        """
+            Adds the items of another summary.
+        """
+        self._merge(other.counts, other.errors, other._floor())
+        self.total += other.total
+        return self
+
+    def top(self, num):
+        """
+            Returns the most frequent items.
+
+            Parameters
+            ----------
+            num: int
+                The number of items to return.
+
+            Returns
+            -------
+            tuple: (pd.Series, pd.Series)
+                The upper bound counts and errors of the items in descending order.
+        """
+        counts = self.counts.nlargest(num)
+        return counts, self.errors[counts.index]
+
+    def _floor(self):
+        """
+            Returns the count any item missing from a full summary may have had.
+        """
+        return int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+
+    def _merge(self, counts, errors, floor):
+        """
+            Merges counts whose missing items may have had up to floor occurrences.
+        """
+        own_floor = self._floor()
+        index = self.counts.index.union(counts.index)
+        merged = self.counts.reindex(index, fill_value=own_floor) + counts.reindex(index, fill_value=floor)
+        merged_errors = self.errors.reindex(index, fill_value=own_floor) + errors.reindex(index, fill_value=floor)
+        keep = merged.nlargest(self.capacity).index
+        self.counts = merged[keep].astype(np.int64)
+        self.errors = merged_errors[keep].astype(np.int64)
+
+class HeavyHitters:
+    """
+        Approximate top-k counts in fixed memory. Space-Saving finds the
+        candidate items and a Count-Min sketch tightens their counts.
+    """
+
+    def __init__(self, capacity=1000, epsilon=0.0001, delta=0.01):
+        """
+            Create an empty heavy hitter tracker.
+
+            Parameters
+            ----------
+            capacity: int
+                The number of candidate items kept.
+            epsilon: float
+                Maximum overcount of the sketch as a fraction of the total count.
+            delta: float
+                Probability of exceeding the sketch's maximum overcount.
+        """
+        self.summary = SpaceSaving(capacity)
+        self.sketch = CountMinSketch(epsilon, delta)
+
+    def update(self, values):
+        """
+            Adds a batch of items.
+
+            Parameters
+            ----------
+            values: np.ndarray
+                The items. Missing values are ignored.
+        """
+        values = pd.Series(values).dropna().to_numpy()
+        self.summary.update(values)
+        self.sketch.update(hashValues(values))
+
+    def merge(self, other):
+        """
+            Adds the items of another heavy hitter tracker with the same parameters.
+        """
+        self.summary.merge(other.summary)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def top(self, num):
+        """
+            Returns the approximate most frequent items.
+
+            Parameters
+            ----------
+            num: int
+                The number of items to return.
+
+            Returns
+            -------
+            tuple: (list, list)
+                The items and their estimated counts in descending order.
+        """
+        candidates = self.summary.counts
+        estimates = np.minimum(candidates.values, self.sketch.estimate(hashValues(candidates.index.to_numpy())))
+        counts = pd.Series(estimates, index=candidates.index).nlargest(num)
+        return (counts.index.to_numpy(), counts.values)
+
+    def nbytes(self):
+        """
+            Returns the approximate memory used by the tracker in bytes.
+        """
+        summary = self.summary.counts.memory_usage(deep=True) + self.summary.errors.memory_usage(deep=True)
+        return int(self.sketch.table.nbytes + summary)
+
+def hashValues(values):
+    """
+        Returns uint64 hashes of an array of values.
+
+        Parameters
+        ----------
+        values: np.ndarray
+            The values to hash.
+
+        Returns
+        -------
+        np.ndarray
+            The hash of each value.
+    """
+    return pd.util.hash_array(np.asarray(values))
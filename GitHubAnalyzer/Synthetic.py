@@ -0,0 +1,243 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from GitHubAnalyzer import Loader
+
+# Repository languages and their share of repositories. None is a repository
+# without a detected language.
+LANGUAGES = {
+    'JavaScript': 0.21, 'Ruby': 0.14, 'Python': 0.11, 'Java': 0.09, 'PHP': 0.07,
+    'C': 0.06, 'C++': 0.05, 'Objective-C': 0.03, 'Shell': 0.03, 'C#': 0.03,
+    'Perl': 0.02, 'Go': 0.01, 'Scala': 0.01, 'Haskell': 0.01, None: 0.12
+}
+
+# Event types and their share of events.
+EVENT_TYPES = {
+    'PushEvent': 0.45, 'WatchEvent': 0.12, 'CreateEvent': 0.10, 'IssueCommentEvent': 0.07,
+    'IssuesEvent': 0.05, 'ForkEvent': 0.05, 'PullRequestEvent': 0.05, 'GistEvent': 0.03,
+    'FollowEvent': 0.03, 'DeleteEvent': 0.02, 'GollumEvent': 0.02, 'MemberEvent': 0.01
+}
+
+# Issue event actions and their share of issue events.
+ISSUE_ACTIONS = {'opened': 0.5, 'closed': 0.45, 'reopened': 0.05}
+
+# Words repository descriptions are made of.
+DESCRIPTION_WORDS = [
+    'web', 'framework', 'library', 'security', 'tool', 'plugin', 'api', 'client',
+    'server', 'fast', 'simple', 'crypto', 'parser', 'jquery', 'rails', 'django',
+    'node', 'mobile', 'game', 'engine', 'data', 'machine', 'learning', 'dotfiles'
+]
+
+# Share of each hour of the day's events, peaking in the afternoon UTC.
+HOUR_WEIGHTS = 1.5 + np.sin((np.arange(24) - 9) * np.pi / 12)
+
+class SyntheticTimeline:
+    """
+        Generator of synthetic GitHub timeline events with the columns of the
+        timeline CSV files. Repository and actor activity follow power laws,
+        so a few repositories and actors account for most events, and
+        languages, locations and event types follow skewed distributions.
+        Actor locations are drawn from the countries table, with some in a
+        different case or spacing than the table. Everything is generated
+        offline from a seed, so the same arguments give the same events.
+    """
+
+    repos: pd.DataFrame             # Attributes of each repository, most popular first.
+    users: pd.DataFrame             # Attributes of each actor, most active first.
+
+    def __init__(self, repos=10000, users=50000, seed=0, start='2012-03-11', days=14, countries_path=Loader.COUNTRIES_PATH):
+        """
+            Create a synthetic timeline.
+
+            Parameters
+            ----------
+            repos: int
+                Number of repositories.
+            users: int
+                Number of actors.
+            seed: int
+                Seed of the random generator.
+            start: str
+                Date of the first events.
+            days: int
+                Number of days the events span.
+            countries_path: str
+                Path to the location to country csv table locations are drawn from.
+        """
+        self.options = {
+            'repos': repos, 'users': users, 'seed': seed, 'start': start,
+            'days': days, 'countries_path': countries_path
+        }
+        self.rng = np.random.default_rng(seed)
+        self.start = np.datetime64(start, 's')
+        self.days = days
+        self.repo_weights = _powerLaw(repos, 1.1)
+        self.user_weights = _powerLaw(users, 1.2)
+        ids = np.arange(repos)
+        owners = np.char.add('o', (ids % max(repos // 3, 1)).astype(str))
+        names = np.char.add('r', ids.astype(str))
+        words = np.asarray(DESCRIPTION_WORDS, dtype=object)
+        picks = self.rng.integers(0, len(words), (repos, 3))
+        descriptions = words[picks[:, 0]] + ' ' + words[picks[:, 1]] + ' ' + words[picks[:, 2]]
+        descriptions[self.rng.random(repos) < 0.1] = None
+        created = np.datetime64('2008-01-01', 's') + self.rng.integers(0, 4 * 365 * 86400, repos).astype('timedelta64[s]')
+        self.repos = pd.DataFrame({
+            'repository_url': np.char.add(np.char.add('https://github.com/', owners), np.char.add('/', names)).astype(object),
+            'repository_created_at': np.char.replace(np.datetime_as_string(created), 'T', ' ').astype(object),
+            'repository_name': names.astype(object),
+            'repository_description': descriptions,
+            'repository_owner': owners.astype(object),
+            'repository_language': _choice(self.rng, LANGUAGES, repos),
+            'watchers': np.maximum((self.repo_weights * repos * 20).astype(np.int64), 1),
+        })
+        table = pd.read_csv(countries_path)['actor_attributes_location'].dropna().unique()
+        table = table[self.rng.permutation(len(table))]
+        locations = table[self.rng.choice(len(table), users, p=_powerLaw(len(table), 1.0))].astype(object)
+        noisy = self.rng.random(users) < 0.05
+        locations[noisy] = [f' {l.upper()} ' for l in locations[noisy]]
+        locations[self.rng.random(users) < 0.45] = None
+        logins = np.char.add('u', np.arange(users).astype(str)).astype(object)
+        self.users = pd.DataFrame({
+            'actor_attributes_login': logins,
+            'actor_attributes_name': np.char.add('User ', np.arange(users).astype(str)).astype(object),
+            'actor_attributes_location': locations,
+        })
+        self._events = 0
+
+    def chunk(self, rows):
+        """
+            Generates the next events.
+
+            Parameters
+            ----------
+            rows: int
+                Number of events.
+
+            Returns
+            -------
+            pd.DataFrame
+                The events with the timeline columns as text.
+        """
+        rng = self.rng
+        repo_ids = rng.choice(len(self.repos), rows, p=self.repo_weights)
+        user_ids = rng.choice(len(self.users), rows, p=self.user_weights)
+        repos = self.repos.iloc[repo_ids].reset_index(drop=True)
+        users = self.users.iloc[user_ids].reset_index(drop=True)
+        days = rng.integers(0, self.days, rows)
+        hours = rng.choice(24, rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+        seconds = days * 86400 + hours * 3600 + rng.integers(0, 3600, rows)
+        created = self.start + seconds.astype('timedelta64[s]')
+        types = _choice(rng, EVENT_TYPES, rows)
+        issues = types == 'IssuesEvent'
+        numbers = np.where(issues, rng.zipf(1.5, rows) % 200 + 1, 0)
+        actions = np.where(issues, _choice(rng, ISSUE_ACTIONS, rows), None)
+        growth = (seconds / (self.days * 86400) * repos['watchers'].to_numpy() * 0.1).astype(np.int64)
+        ids = np.arange(self._events, self._events + rows)
+        self._events += rows
+        events = pd.DataFrame({
+            'repository_url': repos['repository_url'],
+            'repository_created_at': repos['repository_created_at'],
+            'repository_name': repos['repository_name'],
+            'repository_description': repos['repository_description'],
+            'repository_owner': repos['repository_owner'],
+            'repository_open_issues': rng.integers(0, 50, rows).astype(str),
+            'repository_watchers': (repos['watchers'].to_numpy() + growth).astype(str),
+            'repository_language': repos['repository_language'],
+            'actor_attributes_login': users['actor_attributes_login'],
+            'actor_attributes_name': users['actor_attributes_name'],
+            'actor_attributes_location': users['actor_attributes_location'],
+            'created_at': np.char.replace(np.datetime_as_string(created), 'T', ' '),
+            'payload_action': actions,
+            'payload_number': np.where(issues, numbers.astype(str), None),
+            'payload_issue': np.where(issues, (repo_ids.astype(np.int64) * 1000 + numbers).astype(str), None),
+            'actor': users['actor_attributes_login'],
+            'url': np.char.add('https://github.com/events/', ids.astype(str)),
+            'type': types,
+        })
+        return events[Loader.COLS]
+
+    def write(self, rows, path, chunksize=1000000):
+        """
+            Writes events to a CSV or line delimited JSON file in chunks, so
+            memory stays bounded by the chunk size.
+
+            Parameters
+            ----------
+            rows: int
+                Number of events.
+            path: str
+                The output file path ending in .csv or .json.
+            chunksize: int
+                Number of events generated at a time.
+
+            Returns
+            -------
+            str
+                The output file path.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for start in range(0, rows, chunksize):
+                events = self.chunk(min(chunksize, rows - start))
+                if path.endswith('.json'):
+                    events.to_json(f, orient='records', lines=True)
+                else:
+                    events.to_csv(f, index=False, header=start == 0)
+        return path
+
+    def writeDir(self, rows, dir_path, file_rows=1000000, fmt='csv', workers=None):
+        """
+            Writes events to a directory of files, like the hourly timeline
+            files. The files are generated in parallel on a process pool, each
+            from its own seed, so the files do not depend on the number of
+            workers.
+
+            Parameters
+            ----------
+            rows: int
+                Number of events.
+            dir_path: str
+                The output directory.
+            file_rows: int
+                Number of events in each file.
+            fmt: str
+                File format, csv or json.
+            workers: int
+                Number of files to write at once. Defaults to the CPU count.
+
+            Returns
+            -------
+            list: str
+                The written file paths.
+        """
+        files = [
+            (self.options, i, start, min(file_rows, rows - start), os.path.join(dir_path, f'timeline-{i:05d}.{fmt}'))
+            for i, start in enumerate(range(0, rows, file_rows))
+        ]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            return list(executor.map(_writeFile, *zip(*files)))
+
+def _writeFile(options, i, first_event, rows, path):
+    """
+        Writes the i-th file of a synthetic timeline directory.
+    """
+    timeline = SyntheticTimeline(**options)
+    timeline.rng = np.random.default_rng([options['seed'], i])
+    timeline._events = first_event
+    return timeline.write(rows, path)
+
+def _powerLaw(n, exponent):
+    """
+        Returns probabilities of n items falling off as a power of their rank.
+    """
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+def _choice(rng, shares, size):
+    """
+        Draws values with the given shares.
+    """
+    values = np.asarray(list(shares), dtype=object)
+    p = np.asarray(list(shares.values()), dtype=float)
+    return values[rng.choice(len(values), size, p=p / p.sum())]
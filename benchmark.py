@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import sys
+import platform
+import subprocess
+import time
+import numpy as np
+import pandas as pd
+from GitHubAnalyzer import Loader
+from GitHubAnalyzer import Instrument
+from GitHubAnalyzer.Analyzer import Analyzer
+from GitHubAnalyzer.Aggregates import Aggregates
+from GitHubAnalyzer.Locations import LocationResolver
+from GitHubAnalyzer.Synthetic import SyntheticTimeline
+
+# Named dataset sizes.
+SCALES = {'10k': 10000, '100k': 100000, '1m': 1000000, '10m': 10000000, '100m': 100000000}
+
+# Modules whose import time is tracked: the compute path and the plotting path.
+IMPORTS = {'import_analyzer': 'GitHubAnalyzer.Analyzer', 'import_grapher': 'GitHubAnalyzer.Grapher'}
+
+def main():
+    # Get CLI arguments for the benchmark options.
+    argparser = argparse.ArgumentParser(description='GitHub Data Analyzer benchmarks.')
+    argparser.add_argument(
+        '--scale',
+        '-s',
+        type=str,
+        default='100k',
+        help=f'Number of synthetic events, one of {", ".join(SCALES)} or a number.'
+    )
+    argparser.add_argument(
+        '--format',
+        type=str,
+        default='csv',
+        choices=['csv', 'json'],
+        help='File format of the synthetic timeline.'
+    )
+    argparser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the synthetic timeline.'
+    )
+    argparser.add_argument(
+        '--data-dir',
+        type=str,
+        default='.bench',
+        help='Directory to generate the synthetic timelines in. Timelines are reused.'
+    )
+    argparser.add_argument(
+        '--workers',
+        '-w',
+        type=int,
+        default=None,
+        help='Number of files to generate and read in parallel. Defaults to the CPU count.'
+    )
+    argparser.add_argument(
+        '--output',
+        '-o',
+        type=str,
+        default=None,
+        help='JSON file to save the results in. Defaults to bench-<scale>.json.'
+    )
+    argparser.add_argument(
+        '--compare',
+        nargs=2,
+        metavar=('OLD', 'NEW'),
+        help='Compare two saved results instead of running the benchmarks.'
+    )
+    args = argparser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    Instrument.setSpinners(False)
+    rows = SCALES.get(args.scale.lower()) or int(args.scale)
+    paths = timeline(rows, args.format, args.seed, args.data_dir, args.workers)
+    results = {
+        'version': gitVersion(), 'python': platform.python_version(), 'pandas': pd.__version__,
+        'numpy': np.__version__, 'platform': platform.platform(), 'rows': rows,
+        'format': args.format, 'seed': args.seed, 'steps': run(paths, rows, args.workers),
+    }
+    output = args.output or f'bench-{args.scale}.json'
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Saved {output}')
+
+def timeline(rows, fmt, seed, data_dir, workers=None):
+    """
+        Returns the files of a synthetic timeline, generating them the first
+        time. Repositories and actors scale with the number of events.
+
+        Parameters
+        ----------
+        rows: int
+            Number of events.
+        fmt: str
+            File format, csv or json.
+        seed: int
+            Seed of the synthetic timeline.
+        data_dir: str
+            Directory holding the generated timelines.
+        workers: int
+            Number of files to generate in parallel.
+
+        Returns
+        -------
+        list: str
+            The timeline file paths.
+    """
+    dir_path = os.path.join(data_dir, f'timeline-{rows}-{seed}-{fmt}')
+    done_path = os.path.join(dir_path, 'done')
+    if not os.path.exists(done_path):
+        start = time.perf_counter()
+        generator = SyntheticTimeline(
+            repos=min(max(rows // 50, 1000), 1000000), users=min(max(rows // 10, 5000), 5000000), seed=seed
+        )
+        generator.writeDir(rows, dir_path, fmt=fmt, workers=workers)
+        open(done_path, 'w').close()
+        print(f'Generated {rows} events in {time.perf_counter() - start:.1f}s')
+    return sorted(os.path.join(dir_path, f) for f in os.listdir(dir_path) if f.endswith('.' + fmt))
+
+def run(paths, rows, workers=None):
+    """
+        Times importing the package, ingestion, parsing against the plain
+        pandas parsers, the countries lookup and every
+        Analyzer analysis on a timeline. Analyses run in order on one Analyzer
+        without a cache directory, after timing the lazily built structures
+        separately.
+
+        Parameters
+        ----------
+        paths: list(str)
+            The timeline file paths.
+        rows: int
+            Number of events in the timeline.
+        workers: int
+            Number of files to read in parallel.
+
+        Returns
+        -------
+        list: dict
+            The wall seconds, peak RSS in megabytes and events per second of each step.
+    """
+    steps = list()
+    for name, module in IMPORTS.items():
+        record = importTime(name, module)
+        steps.append(record)
+        print(f"{name:32} {record['seconds']:9.3f}s {record['peak_rss_mb']:9.1f}MB")
+    def step(name, function):
+        result, record = measure(name, function, rows)
+        steps.append(record)
+        print(f"{name:32} {record['seconds']:9.3f}s {record['peak_rss_mb']:9.1f}MB {record['rows_per_second']:14.0f}/s")
+        return result
+
+    csv_paths = [p for p in paths if p.endswith('.csv')]
+    if csv_paths:
+        data = step('read_files', lambda: Loader.readFiles(csv_paths, workers))
+    else:
+        data = step('read_files', lambda: Loader.fillColumns([Loader.readFile(p) for p in paths]))
+    # The previous parsing path, pd.to_datetime and pd.to_numeric over every
+    # value, against the parse stage, then the parse stage itself in place.
+    step('to_datetime', lambda: pd.to_datetime(data['created_at'], format=Loader.TIME_FORMAT))
+    step('parse_times', lambda: Loader.parseTimes(data['created_at']))
+    step('to_numeric', lambda: [pd.to_numeric(data[c], errors='coerce') for c in Loader.INT_COLS])
+    step('parse_ints', lambda: [Loader.parseInts(data[c]) for c in Loader.INT_COLS])
+    step('parse', lambda: Loader.parse(data))
+    countries = Loader.readCountries()
+    step('resolve_countries', lambda: Loader.process(data, LocationResolver(countries)))
+    step('compact', lambda: Loader.compact(data))
+    del data
+    step('stream_aggregates', lambda: Aggregates.fromFiles(paths))
+    step('stream_aggregates_sharded', lambda: Aggregates.fromFiles(paths, workers=workers or os.cpu_count()))
+
+    dir_path = os.path.dirname(paths[0])
+    if csv_paths:
+        analyzer = step('analyzer_init', lambda: Analyzer(None, dir_path, workers))
+    else:
+        analyzer = step('analyzer_init', lambda: _jsonAnalyzer(paths))
+    for name in ['aggregates', 'issueTable', 'descriptionIndex', 'contributionMatrix']:
+        step(name, getattr(analyzer, name))
+
+    top_countries = analyzer.topActorCountries(10)[0]
+    top_repos = analyzer.getPopularRepo(10)[0]
+    analyses = [
+        ('topLanguages', lambda: analyzer.topLanguages(10)),
+        ('topLanguages_approximate', lambda: analyzer.topLanguages(10, approximate=True)),
+        ('topActorCountries', lambda: analyzer.topActorCountries(5)),
+        ('topActorCountries_approximate', lambda: analyzer.topActorCountries(10, approximate=True)),
+        ('countryTopLanguages', lambda: analyzer.countryTopLanguages(top_countries[0], 10)),
+        ('countryLanguageMatrix', lambda: analyzer.countryLanguageMatrix()),
+        ('countryTopLanguagesBatch', lambda: analyzer.countryTopLanguagesBatch(top_countries, 10)),
+        ('getPopularRepo', lambda: analyzer.getPopularRepo(5)),
+        ('getPopularRepo_approximate', lambda: analyzer.getPopularRepo(10, approximate=True)),
+        ('sketchAccuracy', lambda: analyzer.sketchAccuracy(10)),
+        ('getWatchersContributors', lambda: analyzer.getWatchersContributors(top_repos[0])),
+        ('getWatchersContributorsBatch', lambda: analyzer.getWatchersContributorsBatch(top_repos)),
+        ('repoDescriptionSearchYears', lambda: analyzer.repoDescriptionSearchYears('security')),
+        ('repoDescriptionSearchYears_phrase', lambda: analyzer.repoDescriptionSearchYears('machine learning')),
+        ('repoDescriptionQueryYears', lambda: analyzer.repoDescriptionQueryYears(['web'], ['security', 'crypto'], ['game'])),
+        ('timeOfDayActivity', lambda: analyzer.timeOfDayActivity(4)),
+        ('countryActivity', lambda: analyzer.countryActivity(4)),
+        ('dayOfWeek', lambda: analyzer.dayOfWeek(4)),
+        ('activityFrames', lambda: analyzer.activityFrames('D', 4)),
+        ('issueResolution', lambda: analyzer.issueResolution(top_repos[0])),
+        ('issueResolutionBatch', lambda: analyzer.issueResolutionBatch(top_repos)),
+        ('issueHistogram', lambda: analyzer.issueHistogram(top_repos[0])),
+        ('issueSummary', lambda: analyzer.issueSummary()),
+        ('issueRanking', lambda: analyzer.issueRanking(10)),
+        ('repoActorCounts', lambda: analyzer.repoActorCounts()),
+        ('actorRepoCounts', lambda: analyzer.actorRepoCounts(10)),
+        ('contributorOverlap', lambda: analyzer.contributorOverlap(top_repos)),
+        ('similarRepos', lambda: analyzer.similarRepos(top_repos[0])),
+        ('actorLanguageAffinity', lambda: analyzer.actorLanguageAffinity()),
+    ]
+    for name, function in analyses:
+        step(name, function)
+    checkDescriptionSearch(analyzer, ['security', 'machine learning', 'learning machine', 'web api'])
+
+    # Time ranged queries: the first uses build the time index and hourly
+    # counts, then each range is answered from the hourly counts.
+    times = analyzer.data['created_at'].dropna()
+    middle = times.iloc[0] + (times.iloc[-1] - times.iloc[0]) / 2
+    step('window_topLanguages', lambda: analyzer.topLanguages(10, start=times.iloc[0], end=middle))
+    step('window_getPopularRepo', lambda: analyzer.getPopularRepo(10, start=middle))
+    step('window_timeOfDayActivity', lambda: analyzer.timeOfDayActivity(4, start=middle - pd.Timedelta('1D'), end=middle))
+    return steps
+
+def checkDescriptionSearch(analyzer, keywords):
+    """
+        Checks that description keyword searches answered from the
+        description index match a str.contains scan of every event.
+
+        Parameters
+        ----------
+        analyzer: Analyzer
+            The analyzed timeline.
+        keywords: list(str)
+            The keywords to check, including phrases of several words.
+    """
+    data = analyzer.data
+    descriptions = data['repository_description'].astype(object)
+    for keyword in keywords:
+        repos = data[descriptions.str.contains(keyword, case=False, regex=False, na=False)]
+        years = repos.drop_duplicates('repository_url')['repository_created_at'].dropna().dt.year
+        expected = [(str(y), int(c)) for y, c in years.value_counts().sort_index().items()]
+        if analyzer.repoDescriptionSearchYears(keyword) != expected:
+            raise ValueError(f'repoDescriptionSearchYears({keyword!r}) does not match a scan of the descriptions')
+
+def measure(name, function, rows):
+    """
+        Runs a function and measures it.
+
+        Parameters
+        ----------
+        name: str
+            The step name.
+        function: function
+            Called without arguments.
+        rows: int
+            Number of events the step covers.
+
+        Returns
+        -------
+        tuple: (object, dict)
+            The function's result and the step's wall seconds, peak RSS in
+            megabytes and events per second.
+    """
+    Instrument.resetPeakRss()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    record = {
+        'name': name, 'seconds': seconds, 'peak_rss_mb': Instrument.peakRss() / 2**20,
+        'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+    }
+    return result, record
+
+def importTime(name, module):
+    """
+        Measures importing a module and its dependencies in a fresh
+        interpreter, with python -X importtime.
+
+        Parameters
+        ----------
+        name: str
+            The step name.
+        module: str
+            The module to import.
+
+        Returns
+        -------
+        dict
+            The step's import seconds and the interpreter's peak RSS in megabytes.
+    """
+    code = f'import {module}; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    seconds = None
+    for line in process.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            seconds = int(parts[1]) / 1e6
+    peak = int(process.stdout.split()[-1])
+    peak = peak if sys.platform == 'darwin' else peak * 1024
+    return {'name': name, 'seconds': seconds, 'peak_rss_mb': peak / 2**20, 'rows_per_second': None}
+
+def compare(old_path, new_path):
+    """
+        Prints the change in wall time and peak RSS of each step between two
+        saved results.
+
+        Parameters
+        ----------
+        old_path: str
+            The baseline results JSON file.
+        new_path: str
+            The new results JSON file.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old_path}: {old['version']} ({old['rows']} rows)  {new_path}: {new['version']} ({new['rows']} rows)")
+    old_steps = {s['name']: s for s in old['steps']}
+    for step in new['steps']:
+        base = old_steps.get(step['name'])
+        if base is None:
+            print(f"{step['name']:32} {step['seconds']:9.3f}s    new")
+            continue
+        ratio = step['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        print(
+            f"{step['name']:32} {base['seconds']:9.3f}s -> {step['seconds']:9.3f}s ({ratio:5.2f}x)"
+            f"  {base['peak_rss_mb']:9.1f}MB -> {step['peak_rss_mb']:9.1f}MB"
+        )
+
+def gitVersion():
+    """
+        Returns the git commit of the working tree, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _jsonAnalyzer(paths):
+    """
+        Returns an Analyzer of a JSON timeline, appending files after the first.
+    """
+    analyzer = Analyzer(paths[0])
+    for path in paths[1:]:
+        analyzer.append(path)
+    analyzer.data
+    return analyzer
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,28 @@
+import sys
+import json
 import argparse
 import numpy as np
-from GitHubAnalyzer import Grapher
+import pandas as pd
+from GitHubAnalyzer import Loader
+from GitHubAnalyzer import Instrument
 from GitHubAnalyzer.Analyzer import Analyzer
+from GitHubAnalyzer.Aggregates import Aggregates
+from GitHubAnalyzer.Report import Report
+
+# Analyses of the report, run in this order after their dependencies.
+REPORTS = [
+    'top_languages', 'top_countries', 'country_languages', 'popular_repos',
+    'watchers_contributors', 'security_trend', 'time_of_day', 'weekday',
+    'issue_resolution'
+]
+
+# Analyses that need the events rather than aggregate counts, skipped in stream mode.
+EVENT_REPORTS = ['country_languages', 'security_trend', 'issue_resolution']
+
+# Labels of the four 6 hour chunks of a day.
+TIMES = ['12AM-6AM', '6AM-12PM', '12PM-6PM', '6PM-12AM']
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
 def main():
     # Get CLI arguments for program required options.
@@ -19,48 +40,326 @@ def main():
         type=str,
         help='Directory with all the input files as CSV files.'
     )
+    argparser.add_argument(
+        '--workers',
+        '-w',
+        type=int,
+        default=None,
+        help='Number of CSV files to read, report analyses to run and charts to save in parallel. Defaults to the CPU count.'
+    )
+    argparser.add_argument(
+        '--cache',
+        type=str,
+        default='.cache',
+        help='Directory to cache the processed data in.'
+    )
+    argparser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always parse the input files instead of using cached data.'
+    )
+    argparser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help='Print the memory used by each column before and after compacting.'
+    )
+    argparser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream the input in chunks and only run the count based analyses.'
+    )
+    argparser.add_argument(
+        '--chunksize',
+        type=int,
+        default=500000,
+        help='Number of events read at a time in stream mode.'
+    )
+    argparser.add_argument(
+        '--approximate',
+        action='store_true',
+        help='Approximate the top language, country and repository counts with fixed memory sketches. In stream mode only the repository counts are approximated.'
+    )
+    argparser.add_argument(
+        '--output',
+        '-o',
+        type=str,
+        default=None,
+        help='Directory to save the charts in instead of showing them.'
+    )
+    argparser.add_argument(
+        '--format',
+        type=str,
+        default='png',
+        help='File format of the saved charts, such as png or svg.'
+    )
+    argparser.add_argument(
+        '--animation-format',
+        type=str,
+        default='gif',
+        choices=['gif', 'mp4'],
+        help='File format of the saved animated charts. MP4 files need ffmpeg.'
+    )
+    argparser.add_argument(
+        '--reports',
+        '-r',
+        type=str,
+        default=None,
+        help=f'Comma separated analyses to run, from {", ".join(REPORTS)}. Defaults to all.'
+    )
+    argparser.add_argument(
+        '--shards',
+        type=int,
+        default=None,
+        help='Number of processes to build the aggregate counts on. Defaults to one.'
+    )
+    argparser.add_argument(
+        '--shard-by',
+        type=str,
+        default='rows',
+        choices=['rows', 'repo'],
+        help='Split the events between shards by row ranges or by repository.'
+    )
+    argparser.add_argument(
+        '--start',
+        type=str,
+        default=None,
+        help='Only analyze events at or after this time, such as 2012-03-12 or "2012-03-12 06:00".'
+    )
+    argparser.add_argument(
+        '--end',
+        type=str,
+        default=None,
+        help='Only analyze events before this time.'
+    )
+    argparser.add_argument(
+        '--emit',
+        type=str,
+        default=None,
+        choices=['json', 'csv'],
+        help='Print the analysis results in this format instead of drawing charts. Matplotlib is not loaded.'
+    )
+    argparser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Keep the loaded data in memory and answer queries over HTTP as JSON instead of running the report.'
+    )
+    argparser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='Address the query service listens on.'
+    )
+    argparser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Port the query service listens on.'
+    )
+    argparser.add_argument(
+        '--quiet',
+        '-q',
+        action='store_true',
+        help='Hide the spinners and progress bars.'
+    )
+    argparser.add_argument(
+        '--metrics',
+        type=str,
+        default=None,
+        help='File to write the timing and memory metrics of each stage to as JSON lines.'
+    )
     args = argparser.parse_args()
+    names = args.reports.split(',') if args.reports else list(REPORTS)
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        argparser.error(f'unknown reports {", ".join(unknown)}')
+    if args.stream and (args.start or args.end):
+        argparser.error('--start and --end need the events, they are not supported in stream mode')
+    if args.serve and args.stream:
+        argparser.error('--serve needs the events, it is not supported in stream mode')
+    Instrument.setSpinners(not args.quiet and not args.emit)
+    if args.metrics:
+        Instrument.METRICS.addSink(Instrument.JsonLinesSink(args.metrics))
+
+    # Initialize data analyzer and results grapher. Stream mode only keeps
+    # aggregate counts of the data in memory.
+    if args.stream:
+        paths = Loader.dirFiles(args.dir) if args.dir else [args.file]
+        sketch_options = {'capacity': 1000, 'epsilon': 0.0001, 'delta': 0.01} if args.approximate else None
+        source = Aggregates.fromFiles(paths, args.chunksize, sketch_options=sketch_options, workers=args.shards)
+    else:
+        analyzer = Analyzer(
+            args.file, args.dir, args.workers, None if args.no_cache else args.cache,
+            shards=args.shards, shard_by=args.shard_by, memory_report=args.memory_report
+        )
+        if args.memory_report and analyzer.memory_report is not None:
+            print(analyzer.memory_report, file=sys.stderr if args.emit else sys.stdout)
+        if args.serve:
+            from GitHubAnalyzer import Server
+            Server.serve(analyzer, args.host, args.port, verbose=not args.quiet)
+            return
+        source = analyzer.window(args.start, args.end) if args.start or args.end else analyzer
+
+    # Run the selected analyses and their dependencies, then print their
+    # results or show or save their charts. Charts are shown one at a time,
+    # or saved to files in parallel when an output directory is given.
+    # Matplotlib is only imported when charts are drawn.
+    if args.stream:
+        skipped = [n for n in names if n in EVENT_REPORTS]
+        if skipped:
+            print(f'Skipping {", ".join(skipped)} in stream mode.', file=sys.stderr if args.emit else sys.stdout)
+        names = [n for n in names if n not in EVENT_REPORTS]
+    report = buildReport(source, args.approximate and not args.stream)
+    results = report.run(names, args.workers)
+    if args.emit:
+        emit(report.tables(results, names), args.emit)
+    else:
+        from GitHubAnalyzer import Grapher
+        charts = report.charts(results, names)
+        if args.output:
+            for path in Grapher.renderAll(charts, args.output, args.format, workers=args.workers, animation_fmt=args.animation_format):
+                print(f'Saved {path}')
+        else:
+            for name, chart_args in charts:
+                getattr(Grapher, name)(*chart_args)
+
+    # Show the time, memory and cache use of each stage of the run, apart
+    # from the emitted results.
+    summary = Instrument.METRICS.summary().to_string(float_format='{:.3f}'.format)
+    print(summary, file=sys.stderr if args.emit else sys.stdout)
+
+def emit(tables, fmt, stream=sys.stdout):
+    """
+        Writes analysis results as one JSON object with the records of each
+        analysis by name, or as one CSV with the analysis name in its first
+        column.
+
+        Parameters
+        ----------
+        tables: dict
+            The table of each analysis by name, see Report.tables.
+        fmt: str
+            json or csv.
+        stream: file
+            The file to write to.
+    """
+    if fmt == 'json':
+        records = {name: json.loads(table.to_json(orient='records')) for name, table in tables.items()}
+        json.dump(records, stream, indent=2)
+        stream.write('\n')
+    else:
+        frames = [table.convert_dtypes().assign(report=name) for name, table in tables.items()]
+        combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['report'])
+        combined = combined[['report'] + [c for c in combined.columns if c != 'report']]
+        combined.to_csv(stream, index=False)
+
+def buildReport(source, approximate=False):
+    """
+        Registers the analyses of the report.
 
-    # Initialize data analyzer and results grapher.
-    analyzer = Analyzer(args.file, args.dir)
+        Parameters
+        ----------
+        source: Analyzer or Aggregates
+            The data to analyze.
+        approximate: bool
+            Estimate the top language, country and repository counts with
+            sketches, see Analyzer.topLanguages. Aggregates are approximated
+            when they are built instead.
 
-    # # Get top 10 languages and graph on bar graph.
-    # top_10_langs = analyzer.topLanguages(10)
-    # Grapher.top_bar_chart(top_10_langs[0], top_10_langs[1], 'Repo Count', 'Top 10 Languages')
+        Returns
+        -------
+        Report
+            The report of every analysis in REPORTS.
+    """
+    report = Report()
+    options = {'approximate': True} if approximate else dict()
 
-    # # Get top 10 location for repository contributions and corresponding top 10 languages.
-    # top_actor_countries = analyzer.topActorCountries(10)
-    # Grapher.top_bar_chart(top_actor_countries[0], top_actor_countries[1], 'Repo Count', 'Top 10 Countries')
-    # top_country_langs = [analyzer.countryTopLanguages(x, 10) for x in top_actor_countries[0]]
-    # Grapher.top_country_langs(top_actor_countries[0], top_country_langs)
+    # Get top 10 languages and graph on bar graph.
+    report.add(
+        'top_languages', lambda: source.topLanguages(10, **options),
+        charts=lambda langs: [('top_bar_chart', (langs[0], langs[1], 'Repo Count', 'Top 10 Languages'))],
+        table=lambda langs: pd.DataFrame({'language': langs[0], 'events': langs[1]})
+    )
 
-    # # Get Popular Repos
-    # pop_repos = analyzer.getPopularRepo(10)
-    # pop_repos_watcher_contributors = [analyzer.getWatchersContributors(r) for r in pop_repos[0]]
-    # Grapher.watcher_contributor_scatter(pop_repos_watcher_contributors, pop_repos[0])
+    # Get top 10 location for repository contributions and corresponding top 10 languages.
+    report.add(
+        'top_countries', lambda: source.topActorCountries(10, **options),
+        charts=lambda top: [('top_bar_chart', (top[0], top[1], 'Repo Count', 'Top 10 Countries'))],
+        table=lambda top: pd.DataFrame({'country': top[0], 'events': top[1]})
+    )
+    def country_languages_table(result):
+        countries, (languages, counts) = result
+        table = pd.DataFrame({
+            'country': np.repeat(np.asarray(countries, dtype=object), languages.shape[1]),
+            'rank': np.tile(np.arange(1, languages.shape[1] + 1), len(countries)),
+            'language': languages.ravel(),
+            'events': counts.ravel(),
+        })
+        return table[table['events'] > 0].reset_index(drop=True)
+    report.add(
+        'country_languages', lambda top: (top[0], source.countryTopLanguagesBatch(top[0], 10)),
+        deps=['top_countries'],
+        charts=lambda langs: [('top_country_langs', langs)],
+        table=country_languages_table
+    )
 
-    # # Graph security repository creations dates based on year.
-    # repo_years = analyzer.repoDescriptionSearchYears('security')
-    # Grapher.repoYearLine(repo_years, 'Security Repos Overtime')
+    # Get popular repos, shared by the repository analyses.
+    report.add(
+        'popular_repos', lambda: source.getPopularRepo(10, **options),
+        table=lambda pop_repos: pd.DataFrame({'repository': pop_repos[0], 'events': pop_repos[1]})
+    )
+    report.add(
+        'watchers_contributors', lambda pop_repos: (source.getWatchersContributorsBatch(pop_repos[0]), pop_repos[0]),
+        deps=['popular_repos'],
+        charts=lambda data: [('watcher_contributor_scatter', data)],
+        table=lambda data: pd.DataFrame(data[0], columns=['watchers', 'contributors']).assign(repository=data[1])[
+            ['repository', 'watchers', 'contributors']
+        ]
+    )
+
+    # Graph security repository creations dates based on year.
+    report.add(
+        'security_trend', lambda: source.repoDescriptionSearchYears('security'),
+        charts=lambda repo_years: [('repoYearLine', (repo_years, 'Security Repos Overtime'))],
+        table=lambda repo_years: pd.DataFrame(repo_years, columns=['year', 'repositories'])
+    )
 
     # Graph the most active time of the day for GitHub activities types.
-    activity, country = analyzer.timeOfDayActivity(4)
-    times = ['12AM-6AM', '6AM-12PM', '12PM-6PM', '6PM-12AM']
-    types = [key for key in activity[0]]
-    activity_types = [[t[key] for key in t] for t in activity]
-    activity_count = [sum(i) for i in activity_types]
-    Grapher.activityHist(activity_count, times)
-    types_data = np.transpose(np.array(activity_types))
-    Grapher.activityTypesBar(types_data, times, types)
-    Grapher.countryContributionBar(country, times, ['United States', 'Other Countries'])
+    def time_of_day_charts(result):
+        activity, country = result
+        types = [key for key in activity[0]]
+        activity_types = [[t[key] for key in t] for t in activity]
+        activity_count = [sum(i) for i in activity_types]
+        types_data = np.transpose(np.array(activity_types))
+        return [
+            ('activityHist', (activity_count, TIMES)),
+            ('activityTypesBar', (types_data, TIMES, types)),
+            ('countryContributionBar', (country, TIMES, ['United States', 'Other Countries'])),
+        ]
+    def time_of_day_table(result):
+        activity, country = result
+        table = pd.DataFrame(activity, index=TIMES).rename_axis('time').reset_index()
+        table[['united_states', 'other_countries']] = np.asarray(country, dtype=np.int64).reshape(len(TIMES), 2)
+        return table
+    report.add('time_of_day', lambda: source.timeOfDayActivity(4), charts=time_of_day_charts, table=time_of_day_table)
 
     # Graph and animate days of the week data.
-    weekday_data = analyzer.dayOfWeek()
-    Grapher.weekdaysAnimated(weekday_data, times)
+    report.add(
+        'weekday', lambda: source.dayOfWeek(),
+        charts=lambda weekday_data: [('weekdaysAnimated', (weekday_data, TIMES))],
+        table=lambda weekday_data: pd.DataFrame(
+            np.asarray(weekday_data), columns=TIMES,
+            index=pd.Index(WEEKDAYS, name='weekday')
+        ).reset_index()
+    )
 
-    # Graphs histogram of a repository's issue resolution time.
-    resolution_times = analyzer.issueResolution(pop_repos[0][1])
-    Grapher.issueResolutionHist(resolution_times)
+    # Graphs histogram of the second most popular repository's issue resolution time.
+    report.add(
+        'issue_resolution', lambda pop_repos: source.issueResolution(pop_repos[0][1]),
+        deps=['popular_repos'],
+        charts=lambda resolution_times: [('issueResolutionHist', (resolution_times,))],
+        table=lambda resolution_times: pd.DataFrame({'days': resolution_times})
+    )
+    return report
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,44 @@
+import os
+import pytest
+from GitHubAnalyzer import Instrument
+from GitHubAnalyzer.Synthetic import SyntheticTimeline
+
+# Repository root, where the countries table path is relative to.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='session', autouse=True)
+def quiet():
+    """
+        Runs the tests, and the fixtures of every scope, from the repository
+        root without spinners.
+    """
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    Instrument.setSpinners(False)
+    yield
+    os.chdir(cwd)
+
+@pytest.fixture(scope='session')
+def timeline():
+    """
+        A small synthetic timeline.
+    """
+    return SyntheticTimeline(repos=300, users=2000, seed=7, days=3, countries_path=os.path.join(ROOT, 'data', 'countries.csv'))
+
+@pytest.fixture(scope='session')
+def timeline_dir(timeline, tmp_path_factory):
+    """
+        A directory of four synthetic timeline CSV files.
+    """
+    dir_path = str(tmp_path_factory.mktemp('timeline'))
+    timeline.writeDir(8000, dir_path, file_rows=2000, workers=1)
+    return dir_path
+
+@pytest.fixture(scope='session')
+def timeline_json_dir(timeline, tmp_path_factory):
+    """
+        A directory of two synthetic timeline JSON lines files.
+    """
+    dir_path = str(tmp_path_factory.mktemp('timeline_json'))
+    timeline.writeDir(4000, dir_path, file_rows=2000, fmt='json', workers=1)
+    return dir_path
@@ -0,0 +1,41 @@
+import glob
+import os
+import pytest
+from GitHubAnalyzer import Loader
+from GitHubAnalyzer.Analyzer import Analyzer
+from GitHubAnalyzer.Aggregates import Aggregates
+
+def counts(result):
+    """
+        Returns a (labels, counts) analysis result as a dict, so counts tied
+        in the top order compare equal.
+    """
+    labels, values = result
+    return dict(zip(labels, (int(v) for v in values)))
+
+def assert_matches(streamed, analyzer):
+    assert streamed.rows == analyzer.rows
+    assert counts(streamed.topLanguages(1000)) == counts(analyzer.topLanguages(1000))
+    assert counts(streamed.getPopularRepo(1000)) == counts(analyzer.getPopularRepo(1000))
+    assert counts(streamed.topActorCountries(1000)) == counts(analyzer.topActorCountries(1000))
+    hours, countries = streamed.timeOfDayActivity(24)
+    expected_hours, expected_countries = analyzer.timeOfDayActivity(24)
+    assert hours == expected_hours
+    assert [list(c) for c in countries] == [list(c) for c in expected_countries]
+    repos = analyzer.getPopularRepo(5)[0]
+    assert streamed.getWatchersContributorsBatch(repos) == analyzer.getWatchersContributorsBatch(repos)
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_stream_csv_matches_analyzer(timeline_dir, workers):
+    analyzer = Analyzer(None, timeline_dir, 1)
+    streamed = Aggregates.fromFiles(Loader.dirFiles(timeline_dir), chunksize=700, workers=workers)
+    assert_matches(streamed, analyzer)
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_stream_json_matches_analyzer(timeline_json_dir, workers):
+    paths = sorted(glob.glob(os.path.join(timeline_json_dir, '*.json')))
+    analyzer = Analyzer(paths[0])
+    for path in paths[1:]:
+        analyzer.append(path)
+    streamed = Aggregates.fromFiles(paths, chunksize=700, workers=workers)
+    assert_matches(streamed, analyzer)
@@ -0,0 +1,20 @@
+import os
+import numpy as np
+from GitHubAnalyzer import Grapher
+from GitHubAnalyzer import Instrument
+
+TIMES = ['12AM-6AM', '6AM-12PM', '12PM-6PM', '6PM-12AM']
+
+def test_render_pool_reports_animation_timings(tmp_path):
+    Instrument.METRICS.clear()
+    frames = np.arange(28).reshape(7, 4)
+    charts = [
+        ('weekdaysAnimated', (frames, TIMES)),
+        ('activityHist', ([1, 2, 3, 4], TIMES)),
+    ]
+    paths = Grapher.renderAll(charts, str(tmp_path), workers=2)
+    assert [os.path.basename(p) for p in paths] == ['weekdays_animated.gif', 'activity_hist.png']
+    assert all(os.path.exists(p) for p in paths)
+    records = [r for r in Instrument.METRICS.records if r['name'] == 'Grapher.exportAnimation']
+    assert len(records) == 1
+    assert records[0]['frames'] == 7 and records[0]['frame_ms'] > 0
@@ -0,0 +1,30 @@
+import threading
+import numpy as np
+from GitHubAnalyzer.Instrument import Stage
+
+def test_concurrent_stage_keeps_peak():
+    freed, started = threading.Event(), threading.Event()
+    def other():
+        freed.wait(30)
+        with Stage('test_other'):
+            started.set()
+    thread = threading.Thread(target=other)
+    thread.start()
+    with Stage('test_peak') as stage:
+        block = np.ones(100 * 2**20, dtype=np.uint8)
+        del block
+        freed.set()
+        assert started.wait(30)
+    thread.join(30)
+    assert stage.record['peak_mb'] >= 90
+
+def test_nested_stage_peaks():
+    with Stage('test_outer') as outer:
+        with Stage('test_inner') as inner:
+            block = np.ones(50 * 2**20, dtype=np.uint8)
+            del block
+        with Stage('test_after') as after:
+            pass
+    assert inner.record['peak_mb'] >= 45
+    assert outer.record['peak_mb'] >= 45
+    assert after.record['peak_mb'] < 45
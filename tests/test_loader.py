@@ -0,0 +1,16 @@
+import os
+import pandas as pd
+from GitHubAnalyzer import Loader
+
+def test_dir_files_sorted(timeline_dir):
+    paths = Loader.dirFiles(timeline_dir)
+    assert len(paths) == 4
+    assert paths == sorted(paths)
+    assert [os.path.basename(p) for p in paths] == [f'timeline-{i:05d}.csv' for i in range(4)]
+
+def test_parallel_read_matches_serial(timeline_dir):
+    paths = Loader.dirFiles(timeline_dir)
+    serial = Loader.readFiles(paths, workers=1)
+    assert len(serial) == 8000
+    pd.testing.assert_frame_equal(Loader.readFiles(paths, workers=3), serial)
+    pd.testing.assert_frame_equal(Loader.readFiles(paths, workers=3, processes=True), serial)
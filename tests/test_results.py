@@ -0,0 +1,40 @@
+from GitHubAnalyzer import Results
+from GitHubAnalyzer.Results import ResultCache, codeHash, memoized
+
+class Counter:
+    """
+        Minimal stand-in for an Analyzer: a data version, sketch options and
+        a result cache kept on disk.
+    """
+
+    def __init__(self, cache_dir):
+        self.version = 'v1'
+        self.sketch_options = dict()
+        self._generation = 0
+        self.results = ResultCache(cache_dir=cache_dir)
+        self.calls = 0
+
+def define(body):
+    """
+        Returns a memoized method compiled from source, like a new version of
+        the module defining it.
+    """
+    namespace = dict()
+    exec(f'def count(self, n):\n    self.calls += 1\n    return {body}\n', namespace)
+    return memoized(namespace['count'])
+
+def test_code_hash_follows_code():
+    assert codeHash(Results.resultKey) == codeHash(Results.resultKey)
+    assert codeHash(define('n').__wrapped__) == codeHash(define('n').__wrapped__)
+    assert codeHash(define('n').__wrapped__) != codeHash(define('n + 1').__wrapped__)
+
+def test_disk_results_keyed_by_code(tmp_path):
+    old = define('n')
+    counter = Counter(str(tmp_path))
+    assert old(counter, 3) == 3 and counter.calls == 1
+    reloaded = Counter(str(tmp_path))
+    assert old(reloaded, 3) == 3 and reloaded.calls == 0
+    changed = define('n + 1')
+    fresh = Counter(str(tmp_path))
+    assert changed(fresh, 3) == 4
+    assert fresh.calls == 1
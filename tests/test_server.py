@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from GitHubAnalyzer import Server
+from GitHubAnalyzer.Analyzer import Analyzer
+
+@pytest.fixture(scope='module')
+def analyzer(timeline_dir):
+    return Analyzer(None, timeline_dir, 1)
+
+@pytest.fixture(scope='module')
+def server(analyzer):
+    """
+        A query server on a free localhost port, serving from a thread.
+    """
+    started = threading.Event()
+    servers = list()
+    def ready(server):
+        servers.append(server)
+        started.set()
+    thread = threading.Thread(target=Server.serve, args=(analyzer, '127.0.0.1', 0, 4, False, ready), daemon=True)
+    thread.start()
+    assert started.wait(60)
+    yield servers[0]
+    servers[0].shutdown()
+    thread.join(60)
+
+def get(server, path, **params):
+    """
+        Returns the status and JSON body of a GET request.
+    """
+    url = f'{server.url}/{path}'
+    if params:
+        url += '?' + urllib.parse.urlencode(params)
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def expected(result):
+    """
+        Returns an analysis result as the JSON the server answers.
+    """
+    return json.loads(json.dumps(Server.toJson(result)))
+
+def test_endpoints_match_analyzer(server, analyzer):
+    repos = analyzer.getPopularRepo(3)[0]
+    country = analyzer.topActorCountries(1)[0][0]
+    queries = [
+        ('topLanguages', {'num': 5}, lambda: analyzer.topLanguages(5)),
+        ('getPopularRepo', {'num': 5}, lambda: analyzer.getPopularRepo(5)),
+        ('countryTopLanguages', {'country': country, 'num': 3}, lambda: analyzer.countryTopLanguages(country, 3)),
+        ('getWatchersContributors', {'repo_url': repos[0]}, lambda: analyzer.getWatchersContributors(repos[0])),
+        ('issueResolution', {'repo_url': repos[1]}, lambda: analyzer.issueResolution(repos[1])),
+        ('timeOfDayActivity', {'chunks': 4}, lambda: analyzer.timeOfDayActivity(4)),
+    ]
+    for endpoint, params, direct in queries:
+        status, body = get(server, endpoint, **params)
+        assert status == 200, body
+        assert body['result'] == expected(direct()), endpoint
+
+def test_time_window(server, analyzer):
+    times = analyzer.data['created_at']
+    start, end = times.iloc[len(times) // 4], times.iloc[len(times) // 2]
+    status, body = get(server, 'topLanguages', num=5, start=str(start), end=str(end))
+    assert status == 200
+    assert body['result'] == expected(analyzer.topLanguages(5, start=start, end=end))
+
+def test_errors(server):
+    assert get(server, 'noSuchAnalysis')[0] == 404
+    assert get(server, 'topLanguages', num='ten')[0] == 400
+    assert get(server, 'topLanguages', num=5, colour='red')[0] == 400
+    assert get(server, 'topLanguages')[0] == 400
+
+def test_concurrent_requests_and_stats(server):
+    before = get(server, 'stats')[1]['endpoints'].get('getPopularRepo', {'requests': 0, 'errors': 0})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda n: get(server, 'getPopularRepo', num=n % 10 + 1)[0], range(40)))
+    assert statuses == [200] * 40
+    status, stats = get(server, 'stats')
+    assert status == 200
+    endpoint = stats['endpoints']['getPopularRepo']
+    assert endpoint['requests'] == before['requests'] + 40
+    assert endpoint['errors'] == before['errors']
+    assert 0 <= endpoint['p50_ms'] <= endpoint['p95_ms'] <= endpoint['p99_ms'] <= endpoint['max_ms']
+    assert stats['rows'] == 8000
+    status, index = get(server, '')
+    assert status == 200 and set(index['endpoints']) == set(Server.ENDPOINTS)